@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+HangarStack command line tools
+
+Usage:
+  python -m hangar_stack snapshot build [--source data/aircraft_database.json] [--output PATH]
+  python -m hangar_stack snapshot info [PATH]
+  python -m hangar_stack validate [--format json|ndjson] [--output PATH] [--workers N]
+  python -m hangar_stack shards split|refresh|join [--dir data/shards]
+  python -m hangar_stack serve [--host 127.0.0.1] [--port 8000] [--workers N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+DB_PATH = BASE_DIR / 'data' / 'aircraft_database.json'
+SCHEMA_PATH = BASE_DIR / 'data' / 'schema.json'
+SHARD_DIR = BASE_DIR / 'data' / 'shards'
+
+
+def print_info(info):
+    print(f"Snapshot:       {info.path}")
+    print(f"Format version: {info.format_version}")
+    print(f"Source sha256:  {info.source_hash}")
+    print(f"Schema sha256:  {info.schema_hash or 'not validated'}")
+    print(f"Aircraft:       {info.records}")
+    print(f"Manufacturers:  {info.manufacturers}")
+    print(f"Strings:        {info.strings}")
+    print(f"Size:           {info.size:,} bytes")
+
+
+def snapshot_build(args):
+    import jsonschema
+    from hangar_stack.hangar_data.snapshot import build_snapshot
+
+    start = time.perf_counter()
+    try:
+        info = build_snapshot(args.source, args.output,
+                              schema_path=None if args.skip_validation else args.schema)
+    except jsonschema.exceptions.ValidationError as e:
+        print(f"Database validation error, snapshot not built: {e.message}", file=sys.stderr)
+        print(f"  at {'/'.join(str(p) for p in e.absolute_path) or '(document)'}", file=sys.stderr)
+        return 1
+    print_info(info)
+    print(f"Built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+
+def snapshot_info(args):
+    from hangar_stack.hangar_data.database_cache import file_hash
+    from hangar_stack.hangar_data.snapshot import default_snapshot_path, read_info
+
+    path = args.path or default_snapshot_path(DB_PATH)
+    try:
+        info = read_info(path)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read snapshot: {e}", file=sys.stderr)
+        return 1
+    print_info(info)
+    try:
+        source_hash = file_hash(args.source)
+    except OSError as e:
+        print("Matches source: unavailable")
+        print(f"Cannot read source database: {e}", file=sys.stderr)
+        return 1
+    fresh = info.source_hash == source_hash
+    print(f"Matches source: {'yes' if fresh else 'no (rebuild with snapshot build)'}")
+    return 0 if fresh else 2
+
+
+def validate(args):
+    from hangar_stack.hangar_data.lint import lint_file
+
+    today = None
+    if args.today:
+        from datetime import date
+        today = date.fromisoformat(args.today)
+    try:
+        report = lint_file(args.source, args.schema, workers=args.workers, today=today,
+                           tolerance=args.tolerance)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read database or schema: {e}", file=sys.stderr)
+        return 2
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            report.write(f, args.format)
+    else:
+        report.write(sys.stdout, args.format)
+    summary = report.summary()
+    print(f"{summary['issues']} issues in {summary['records']} aircraft "
+          f"({summary['workers']} workers, {summary['elapsed_ms']:.1f} ms)", file=sys.stderr)
+    return 1 if report.issues else 0
+
+
+def shards_split(args):
+    from hangar_stack.hangar_data.shards import split_database
+
+    start = time.perf_counter()
+    manifest = split_database(args.source, args.dir)
+    for manufacturer in manifest.manufacturers:
+        record = manifest.shards[manufacturer]
+        print(f"{record['file']:<32} {record['count']:>6} aircraft  {manufacturer}")
+    print(f"Wrote {len(manifest.shards)} shards to {args.dir} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+
+def shards_refresh(args):
+    from hangar_stack.hangar_data.shards import refresh_manifest
+
+    try:
+        changed = refresh_manifest(args.dir)
+    except (OSError, ValueError) as e:
+        print(f"Cannot refresh shards: {e}", file=sys.stderr)
+        return 1
+    print(f"Updated: {', '.join(changed)}" if changed else "Manifest is up to date")
+    return 0
+
+
+def shards_join(args):
+    import json
+    from hangar_stack.hangar_data.shards import join_shards
+
+    try:
+        data = join_shards(args.dir)
+    except (OSError, ValueError) as e:
+        print(f"Cannot join shards: {e}", file=sys.stderr)
+        return 1
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f"Wrote {args.output}")
+    return 0
+
+
+def run_server(args):
+    from hangar_stack.server import serve
+
+    serve(args.host, args.port, args.workers)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='hangar_stack', description="HangarStack command line tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    snapshot = commands.add_parser('snapshot', help="compiled binary database snapshots")
+    actions = snapshot.add_subparsers(dest='action', required=True)
+
+    build = actions.add_parser('build', help="validate the JSON database and compile a snapshot")
+    build.add_argument('--source', default=str(DB_PATH), help="JSON database to compile")
+    build.add_argument('--schema', default=str(SCHEMA_PATH), help="JSON schema to validate against")
+    build.add_argument('--output', help="snapshot path (default: next to the source, .snapshot)")
+    build.add_argument('--skip-validation', action='store_true',
+                       help="compile without validating (loaders that require validation will ignore it)")
+    build.set_defaults(func=snapshot_build)
+
+    info = actions.add_parser('info', help="show a snapshot header and whether it is current")
+    info.add_argument('path', nargs='?', help="snapshot path (default: data/aircraft_database.snapshot)")
+    info.add_argument('--source', default=str(DB_PATH), help="JSON database to compare against")
+    info.set_defaults(func=snapshot_info)
+
+    lint = commands.add_parser('validate', help="report every schema violation and data-consistency issue")
+    lint.add_argument('--source', default=str(DB_PATH), help="JSON database to check")
+    lint.add_argument('--schema', default=str(SCHEMA_PATH), help="JSON schema to validate against")
+    lint.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                      help="one JSON report, or one issue per line with the summary last")
+    lint.add_argument('--output', help="write the report here instead of stdout")
+    lint.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    lint.add_argument('--tolerance', type=float, default=0.02,
+                      help="relative difference allowed between unit pairs such as feet/meters")
+    lint.add_argument('--today', help="YYYY-MM-DD used for the future last_verified check")
+    lint.set_defaults(func=validate)
+
+    shards = commands.add_parser('shards', help="per-manufacturer sharded database layout")
+    shard_actions = shards.add_subparsers(dest='action', required=True)
+    split = shard_actions.add_parser('split', help="write one file per manufacturer plus a manifest")
+    split.add_argument('--source', default=str(DB_PATH), help="JSON database to split")
+    split.set_defaults(func=shards_split)
+    refresh = shard_actions.add_parser('refresh', help="update the manifest after editing shard files")
+    refresh.set_defaults(func=shards_refresh)
+    join = shard_actions.add_parser('join', help="write the shards back out as a single JSON database")
+    join.add_argument('--output', default=str(DB_PATH), help="JSON database to write")
+    join.set_defaults(func=shards_join)
+    for action in (split, refresh, join):
+        action.add_argument('--dir', default=str(SHARD_DIR), help="shard directory (default: data/shards)")
+
+    server = commands.add_parser('serve', help="preforking production web server")
+    server.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    server.add_argument('--port', type=int, default=8000, help="port to listen on")
+    server.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    server.set_defaults(func=run_server)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
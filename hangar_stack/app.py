@@ -1,32 +1,142 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify
+from flask.json.provider import DefaultJSONProvider
 import json
 from datetime import datetime
 import logging
 import os
+import time
+from hangar_stack.hangar_data.columnar import parse_filter
+from hangar_stack.hangar_data.database_cache import DatabaseCache
+from hangar_stack.hangar_data.responses import ResponseCache
+from hangar_stack.hangar_data.page_cache import PageCache
+from hangar_stack.hangar_data.shards import ShardedDatabase
+from hangar_stack.hangar_data.snapshot import default_snapshot_path
+from hangar_stack.hangar_data.streaming import DeferredText
+from hangar_stack.hangar_data.validation import DatabaseValidator, default_stamp_path
+from hangar_stack.hangar_kafka.kafka_config import TRACKING_CONFIG
+from hangar_stack.hangar_kafka.producer_lifecycle import ManagedProducer
+from hangar_stack.hangar_kafka.spool import EventSpool, SpoolTracker
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class HangarJSONProvider(DefaultJSONProvider):
+    """Serialize text fields the streaming loader left on disk as plain strings."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, DeferredText):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+
 app = Flask(__name__)
+app.json = HangarJSONProvider(app)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# KAFKA_SPOOL_DIR keeps tracking events on disk while Kafka is unreachable
+# (each worker process locks its own slot directory on first use)
+event_spool = EventSpool(os.path.join(BASE_DIR, TRACKING_CONFIG['spool_dir']),
+                         segment_bytes=TRACKING_CONFIG['spool_segment_mb'] * 1024 * 1024,
+                         max_bytes=TRACKING_CONFIG['spool_max_mb'] * 1024 * 1024,
+                         fsync_batch=TRACKING_CONFIG['spool_fsync_batch'],
+                         fsync_interval=TRACKING_CONFIG['spool_fsync_interval_ms'] / 1000.0) if TRACKING_CONFIG['spool_dir'] else None
+spool_tracker = SpoolTracker(event_spool) if event_spool is not None else None
 
-# Initialize Kafka producer (optional - will be None if Kafka is not available)
-kafka_producer = None
-try:
+def create_kafka_producer():
+    """Kafka producer for tracking events; raises ImportError if Kafka is not installed"""
     from hangar_stack.hangar_kafka.kafka_producer import HangarStackProducer
-    kafka_producer = HangarStackProducer()
-    logger.info("Kafka producer initialized successfully")
-except ImportError as e:
-    logger.warning(f"Kafka dependencies not installed. Running without Kafka integration. Details: {e}")
-except Exception as e:
-    logger.warning(f"Failed to initialize Kafka producer: {e}. Running without Kafka integration.")
-
-# Load the aircraft database
+    return HangarStackProducer(tracking_mode='async', spool=event_spool)
+
+def event_tracker():
+    """The Kafka producer once it is ready, else the spool (if configured), else None"""
+    return kafka_producer.get() or spool_tracker
+
+# Kafka producer for tracking events. Nothing connects at import: the first
+# request (or after_fork) starts connecting in a background thread, and until
+# it is ready events go to the spool, or are not tracked without one
+kafka_producer = ManagedProducer(create_kafka_producer,
+                                 retry_max=TRACKING_CONFIG['retry_max_s'],
+                                 health_interval=TRACKING_CONFIG['health_interval_s'])
+
+# Load the aircraft database once per process; the cache re-checks the file
+# periodically and swaps in a fresh snapshot in the background when it changes
+DB_PATH = os.path.join(BASE_DIR, 'data', 'aircraft_database.json')
+# HANGAR_DB_STREAMING parses records one by one instead of reading the whole
+# file; HANGAR_DB_LAZY_FIELDS (e.g. "description") keeps long text on disk.
+# A binary snapshot built by `python -m hangar_stack snapshot build` is
+# preferred whenever it matches the JSON (HANGAR_DB_SNAPSHOT= disables it).
+# HANGAR_DB_SCHEMA validates each load, rechecking only changed aircraft
+SCHEMA_PATH = os.getenv('HANGAR_DB_SCHEMA', '') and os.path.join(BASE_DIR, os.getenv('HANGAR_DB_SCHEMA'))
+database_cache = DatabaseCache(DB_PATH,
+                               check_interval=float(os.getenv('HANGAR_DB_CHECK_INTERVAL', '1.0')),
+                               streaming=os.getenv('HANGAR_DB_STREAMING', 'false').lower() == 'true',
+                               lazy_fields=[f.strip() for f in os.getenv('HANGAR_DB_LAZY_FIELDS', '').split(',') if f.strip()],
+                               snapshot_path=os.getenv('HANGAR_DB_SNAPSHOT', default_snapshot_path(DB_PATH)) or None,
+                               validator=DatabaseValidator(SCHEMA_PATH, stamp_path=default_stamp_path(DB_PATH)) if SCHEMA_PATH else None)
+
+# HANGAR_DB_SHARDS points at a sharded layout (`python -m hangar_stack shards
+# split`): home renders from its manifest and manufacturer pages load one
+# shard each, keeping the HANGAR_DB_SHARD_CACHE most recent in memory
+SHARD_DIR = os.getenv('HANGAR_DB_SHARDS', '')
+shard_store = ShardedDatabase(os.path.join(BASE_DIR, SHARD_DIR),
+                              max_shards=int(os.getenv('HANGAR_DB_SHARD_CACHE', '16')),
+                              check_interval=float(os.getenv('HANGAR_DB_CHECK_INTERVAL', '1.0'))) if SHARD_DIR else None
+
 def load_database():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(base_dir, 'data', 'aircraft_database.json')
-    with open(db_path, 'r') as f:
-        return json.load(f)
+    return full_snapshot().data
+
+def full_snapshot():
+    """Snapshot of the whole catalog, for routes that search or aggregate across manufacturers"""
+    if shard_store is not None:
+        return shard_store.full_snapshot()
+    return database_cache.get()
+
+def catalog_version():
+    """Manifest or snapshot: whatever carries the catalog's content_hash and version cheapest"""
+    if shard_store is not None:
+        return shard_store.manifest()
+    return database_cache.get()
+
+def manufacturer_view(manufacturer_name):
+    """Indexes and stats covering one manufacturer (its shard, or the whole snapshot), None if unknown"""
+    if shard_store is not None:
+        return shard_store.shard(manufacturer_name)
+    snapshot = database_cache.get()
+    return snapshot if snapshot.indexes.has_manufacturer(manufacturer_name) else None
+
+# JSON API bodies serialized (and compressed) once per snapshot, same format as jsonify
+api_responses = ResponseCache(lambda payload: app.json.response(payload).get_data())
+
+# Rendered HTML keyed by route arguments and snapshot, emptied on every
+# reload of the database or the shard manifest
+page_cache = PageCache(max_entries=int(os.getenv('HANGAR_PAGE_CACHE_ENTRIES', '512')),
+                       max_bytes=int(os.getenv('HANGAR_PAGE_CACHE_BYTES', str(32 * 1024 * 1024))))
+database_cache.add_listener(lambda old, new: page_cache.clear())
+if shard_store is not None:
+    shard_store.add_listener(lambda old, new: page_cache.clear())
+
+def render_cached(snapshot, key, template_name, **context):
+    """render_template, but reuse the page for the same key and snapshot"""
+    return page_cache.get_or_render((key, snapshot.content_hash),
+                                    lambda: render_template(template_name, **context))
+
+def send_prepared(prepared):
+    """Serve a PreparedResponse, honoring If-None-Match and Accept-Encoding"""
+    body, encoding = prepared.choose(request.accept_encodings.quality)
+    if any(request.if_none_match.contains_weak(tag) for tag in prepared.etags):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(prepared.etag_for(encoding))
+    response.vary.add('Accept-Encoding')
+    # Clients may keep the body but must revalidate, which is a cheap 304
+    response.cache_control.no_cache = True
+    return response
 
 @app.route('/')
 def welcome():
@@ -35,56 +145,133 @@ def welcome():
 @app.route('/home')
 def home():
     """Home page showing database info and manufacturer list"""
-    db = load_database()
-    manufacturers = list(db.get('manufacturers', {}).keys())
-    return render_template('home.html', 
+    snapshot = catalog_version()
+    manufacturers = snapshot.manufacturers if shard_store is not None else snapshot.indexes.manufacturers
+    return render_cached(snapshot, ('home',), 'home.html',
                          manufacturers=manufacturers,
-                         db_version=db.get('database_version'),
-                         last_updated=db.get('last_updated'))
+                         db_version=snapshot.version,
+                         last_updated=snapshot.last_updated)
 
 @app.route('/manufacturer/<manufacturer_name>')
 def manufacturer(manufacturer_name):
     """Show aircraft list for a specific manufacturer"""
-    db = load_database()
-    manufacturers = db.get('manufacturers', {})
-    if manufacturer_name not in manufacturers:
+    snapshot = manufacturer_view(manufacturer_name)
+    if snapshot is None:
         return "Manufacturer not found", 404
-    aircraft_list = manufacturers[manufacturer_name].get('aircraft', [])
-    # Sort by introduction year
-    sorted_aircraft = sorted(aircraft_list, key=lambda x: x.get('introduction_year', 9999))
-    # Calculate summary stats
-    active = sum(1 for a in aircraft_list if a.get('status') == 'Active')
-    retired = sum(1 for a in aircraft_list if a.get('status') == 'Retired')
-    development = sum(1 for a in aircraft_list if 'Development' in str(a.get('status', '')))
-    return render_template('manufacturer.html',
+    # Sorted list and summary stats are precomputed per snapshot
+    stats = snapshot.stats.for_manufacturer(manufacturer_name)
+    return render_cached(snapshot, ('manufacturer', manufacturer_name), 'manufacturer.html',
                          manufacturer=manufacturer_name,
-                         aircraft=sorted_aircraft,
-                         total=len(aircraft_list),
-                         active=active,
-                         retired=retired,
-                         development=development)
+                         aircraft=snapshot.indexes.aircraft_for(manufacturer_name),
+                         total=stats.total,
+                         active=stats.active,
+                         retired=stats.retired,
+                         development=stats.development)
 
 @app.route('/api/aircraft/<manufacturer_name>')
 def aircraft_api(manufacturer_name):
     """API endpoint to get aircraft data as JSON"""
-    db = load_database()
-    manufacturers = db.get('manufacturers', {})
-    if manufacturer_name not in manufacturers:
+    snapshot = manufacturer_view(manufacturer_name)
+    if snapshot is None:
         return jsonify({'error': 'Manufacturer not found'}), 404
-    aircraft_list = manufacturers[manufacturer_name].get('aircraft', [])
-    sorted_aircraft = sorted(aircraft_list, key=lambda x: x.get('introduction_year', 9999))
-    return jsonify({
+    prepared = api_responses.get(catalog_version(), ('aircraft', manufacturer_name), lambda: {
         'manufacturer': manufacturer_name,
-        'aircraft': sorted_aircraft
+        'aircraft': snapshot.indexes.aircraft_for(manufacturer_name)
     })
+    return send_prepared(prepared)
+
+# Most rows one filter request may return (?limit= above it is capped)
+FILTER_MAX_LIMIT = int(os.getenv('HANGAR_FILTER_MAX_LIMIT', '1000'))
+
+@app.route('/api/aircraft/filter')
+def aircraft_filter_api():
+    """API endpoint filtering aircraft by spec ranges, e.g. ?mach>1.5&range_nm>=2000&year<1990"""
+    start = time.perf_counter()
+    snapshot = full_snapshot()
+    try:
+        predicates, options = parse_filter(request.query_string)
+        limit = int(options.get('limit', 100))
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    total, rows = snapshot.columns.filter(predicates, limit=min(limit, FILTER_MAX_LIMIT))
+    return jsonify({
+        'filters': [f"{p.field}{p.op}{p.value}" for p in predicates],
+        'total': total,
+        'returned': len(rows),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+        'aircraft': [{
+            'manufacturer': manufacturer,
+            'designation': aircraft.get('designation'),
+            'name': aircraft.get('name'),
+            'status': aircraft.get('status'),
+            'introduction_year': aircraft.get('introduction_year'),
+        } for manufacturer, aircraft in rows]
+    })
+
+# Most results one search request may return (?limit= above it is capped)
+SEARCH_MAX_LIMIT = int(os.getenv('HANGAR_SEARCH_MAX_LIMIT', '100'))
+
+@app.route('/api/search')
+def search_api():
+    """API endpoint searching aircraft by designation, name and specs"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query (q)'}), 400
+    include_description = request.args.get('description', '').lower() in ('1', 'true', 'yes')
+    try:
+        limit = int(request.args.get('limit', 20))
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = min(limit, SEARCH_MAX_LIMIT)
+
+    # Track search query with Kafka if available
+    producer = event_tracker()
+    if producer:
+        try:
+            producer.send_search_query(
+                query,
+                {'include_description': include_description, 'limit': limit},
+                request.remote_addr
+            )
+        except Exception as e:
+            logger.error(f"Failed to track search query: {e}")
+
+    results = full_snapshot().search.search(query, include_description=include_description)
+    return jsonify({
+        'query': query,
+        'total': len(results),
+        'results': [{
+            'manufacturer': r.manufacturer,
+            'designation': r.aircraft.get('designation'),
+            'name': r.aircraft.get('name'),
+            'status': r.aircraft.get('status'),
+            'introduction_year': r.aircraft.get('introduction_year'),
+            'score': r.score,
+        } for r in results[:limit]]
+    })
+
+@app.route('/api/stats')
+def stats_api():
+    """API endpoint with per-manufacturer and overall database statistics"""
+    snapshot = full_snapshot()
+    stats = snapshot.stats.to_dict()
+    stats['database_version'] = snapshot.version
+    stats['last_updated'] = snapshot.last_updated
+    return jsonify(stats)
 
 @app.route('/aircraft/<manufacturer_name>/<path:designation>')
 def aircraft_detail(manufacturer_name, designation):
     """Show detailed information for a specific aircraft"""
-    # Track aircraft view with Kafka if available
-    if kafka_producer:
+    # Track aircraft view with Kafka if available (before the page cache, so
+    # every hit is counted)
+    producer = event_tracker()
+    if producer:
         try:
-            kafka_producer.send_aircraft_view(
+            producer.send_aircraft_view(
                 designation,
                 request.remote_addr,
                 request.headers.get('User-Agent', '')
@@ -92,19 +279,13 @@ def aircraft_detail(manufacturer_name, designation):
         except Exception as e:
             logger.error(f"Failed to track aircraft view: {e}")
     
-    db = load_database()
-    manufacturers = db.get('manufacturers', {})
-    if manufacturer_name not in manufacturers:
+    snapshot = manufacturer_view(manufacturer_name)
+    if snapshot is None:
         return "Manufacturer not found", 404
-    # Find the specific aircraft
-    aircraft = None
-    for a in manufacturers[manufacturer_name].get('aircraft', []):
-        if a.get('designation') == designation:
-            aircraft = a
-            break
+    aircraft = snapshot.indexes.get(manufacturer_name, designation)
     if not aircraft:
         return "Aircraft not found", 404
-    return render_template('aircraft_detail.html',
+    return render_cached(snapshot, ('aircraft', manufacturer_name, designation), 'aircraft_detail.html',
                          aircraft=aircraft,
                          manufacturer=manufacturer_name)
 
@@ -112,9 +293,10 @@ def aircraft_detail(manufacturer_name, designation):
 @app.route('/api/aircraft/<path:designation>/view', methods=['POST'])
 def track_aircraft_view(designation):
     """API endpoint for tracking aircraft views"""
-    if kafka_producer:
+    producer = event_tracker()
+    if producer:
         try:
-            kafka_producer.send_aircraft_view(
+            producer.send_aircraft_view(
                 designation,
                 request.remote_addr,
                 request.headers.get('User-Agent', '')
@@ -126,19 +308,40 @@ def track_aircraft_view(designation):
     else:
         return jsonify({'status': 'success', 'message': 'Kafka not available'})
 
+@app.route('/api/tracking/stats')
+def tracking_stats():
+    """API endpoint exposing view-tracking buffer counters and producer connection state"""
+    producer = event_tracker()
+    stats = producer.tracking_stats() if producer else {'mode': 'disabled'}
+    stats['producer'] = kafka_producer.stats()
+    return jsonify(stats)
+
 # Cleanup on app shutdown
 import atexit
 
 def cleanup():
-    if kafka_producer:
-        try:
-            kafka_producer.close()
-            logger.info("Kafka producer closed")
-        except Exception as e:
-            logger.error(f"Error closing Kafka producer: {e}")
+    kafka_producer.close()
+    if event_spool is not None:
+        event_spool.close()
 
 # Register cleanup function to run when the app exits
 atexit.register(cleanup)
 
+# Hooks for preforking servers (see server.py and gunicorn.conf.py)
+def before_fork():
+    """Load the database in the master so forked workers share it, and drop what cannot be shared"""
+    # The producer's sender thread and broker sockets do not survive fork;
+    # forked workers see a fresh, unconnected kafka_producer (see after_fork)
+    cleanup()
+    if shard_store is not None:
+        shard_store.manifest()
+    else:
+        database_cache.get()
+
+def after_fork():
+    """Per-worker setup after fork: each worker starts connecting its own Kafka producer"""
+    kafka_producer.start()
+
 if __name__ == '__main__':
+    # Development server; use `python -m hangar_stack serve` in production
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
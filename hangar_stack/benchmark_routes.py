@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Route Latency Benchmark for HangarStack
+
+Measures throughput and p50/p95/p99 latency of the main pages and API
+routes through Flask's test client (no network, no server processes) over
+synthetic catalogs of growing size, so route cost can be tracked as the
+catalog grows. Each catalog has about sqrt(size) manufacturers of about
+sqrt(size) aircraft, cloned from the real database with unique
+designations. Requests cycle over a sample of manufacturers and aircraft
+in two modes:
+
+  warm  page and response caches stay enabled, so after the first pass the
+        numbers are those of a warm server
+  cold  the page cache and the prepared API responses are cleared before
+        every timed request, so each one renders and serializes from the
+        catalog
+
+Aircraft page views are tracked into an in-process MemoryBroker, so the
+tracking cost is included without a Kafka cluster.
+
+Results can be stored as a baseline and later runs compared against it;
+any route whose p95 latency grew, or whose throughput fell, by more than
+--threshold is reported as a regression (exit status 1).
+
+Usage:
+  python -m hangar_stack.benchmark_routes
+  python -m hangar_stack.benchmark_routes --sizes 100 10000 --duration 1
+  python -m hangar_stack.benchmark_routes --modes cold
+  python -m hangar_stack.benchmark_routes --save-baseline
+  python -m hangar_stack.benchmark_routes --compare --threshold 0.25
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import quote
+
+from hangar_stack.hangar_kafka.benchmark_producer import percentile
+
+PACKAGE_ROOT = Path(__file__).parent
+DB_PATH = PACKAGE_ROOT / 'data' / 'aircraft_database.json'
+BASELINE_PATH = PACKAGE_ROOT / 'data' / 'route_benchmark_baseline.json'
+
+DEFAULT_SIZES = (100, 10000, 100000)
+
+# Route name -> path template filled with a sampled manufacturer/designation
+ROUTES = {
+    'home': '/home',
+    'manufacturer': '/manufacturer/{manufacturer}',
+    'api_aircraft': '/api/aircraft/{manufacturer}',
+    'aircraft_detail': '/aircraft/{manufacturer}/{designation}',
+}
+
+MODES = ('warm', 'cold')
+
+
+def synthetic_catalog(size, seed=42):
+    """A database document with ``size`` aircraft cloned from the real catalog"""
+    with open(DB_PATH) as f:
+        source = json.load(f)
+    templates = [a for m in source['manufacturers'].values() for a in m['aircraft']]
+    rng = random.Random(seed)
+    manufacturer_count = max(1, round(math.sqrt(size)))
+    manufacturers = {f"Manufacturer {m:04d}": {'aircraft': []} for m in range(manufacturer_count)}
+    names = list(manufacturers)
+    for n in range(size):
+        aircraft = copy.deepcopy(templates[n % len(templates)])
+        aircraft['designation'] = f"{aircraft['designation']}-{n}"
+        aircraft['introduction_year'] = aircraft.get('introduction_year', 1950) + rng.randint(-10, 10)
+        manufacturers[names[n % manufacturer_count]]['aircraft'].append(aircraft)
+    return {
+        'database_version': f"synthetic-{size}",
+        'last_updated': source.get('last_updated'),
+        'manufacturers': manufacturers,
+    }
+
+
+def sample_paths(document, route, count, seed=42):
+    """Up to ``count`` concrete paths for ``route`` over the catalog"""
+    rng = random.Random(seed)
+    template = ROUTES[route]
+    if '{' not in template:
+        return [template]
+    pairs = [(m, a['designation']) for m, entry in document['manufacturers'].items() for a in entry['aircraft']]
+    picks = rng.sample(pairs, min(count, len(pairs)))
+    return [template.format(manufacturer=quote(m), designation=quote(d)) for m, d in picks]
+
+
+@contextmanager
+def serving(path):
+    """The Flask app serving the catalog at ``path``, with view tracking into a MemoryBroker"""
+    from hangar_stack import app as app_module
+    from hangar_stack.hangar_data.database_cache import DatabaseCache
+    from hangar_stack.hangar_kafka.kafka_producer import HangarStackProducer
+    from hangar_stack.hangar_kafka.memory_broker import MemoryBroker
+
+    if app_module.shard_store is not None:
+        raise RuntimeError("Unset HANGAR_DB_SHARDS: the benchmark serves single-file catalogs")
+    original_cache, original_tracker = app_module.database_cache, app_module.event_tracker
+    cache = DatabaseCache(str(path), check_interval=None)
+    cache.add_listener(lambda old, new: app_module.page_cache.clear())
+    cache.get()
+    tracker = HangarStackProducer(tracking_mode='async', transport=MemoryBroker())
+    app_module.database_cache = cache
+    app_module.event_tracker = lambda: tracker
+    app_module.page_cache.clear()
+    try:
+        yield app_module.app.test_client()
+    finally:
+        tracker.close()
+        app_module.database_cache, app_module.event_tracker = original_cache, original_tracker
+        app_module.page_cache.clear()
+
+
+def clear_response_caches():
+    """Drop the app's rendered pages and prepared API responses"""
+    from hangar_stack import app as app_module
+
+    app_module.page_cache.clear()
+    app_module.api_responses.clear()
+
+
+def measure(client, paths, duration, warmup=1, before_request=None):
+    """GET ``paths`` round robin for ``duration`` seconds after ``warmup`` passes.
+
+    ``before_request`` runs ahead of every timed request, outside its
+    measured latency.
+    """
+    for _ in range(warmup):
+        for path in paths:
+            client.get(path)
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    n = 0
+    while time.perf_counter() < deadline:
+        path = paths[n % len(paths)]
+        if before_request is not None:
+            before_request()
+        before = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - before)
+        if response.status_code != 200:
+            errors += 1
+        n += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def run(sizes=DEFAULT_SIZES, routes=tuple(ROUTES), duration=2.0, targets=100, workdir=None, modes=MODES):
+    """{size: {mode: {route: result}, '_load_seconds': seconds}} for each catalog size"""
+    results = {}
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size in sizes:
+            document = synthetic_catalog(size)
+            path = Path(tmp) / f"catalog_{size}.json"
+            with open(path, 'w') as f:
+                json.dump(document, f)
+            started = time.perf_counter()
+            with serving(path) as client:
+                load_seconds = time.perf_counter() - started
+                results[str(size)] = {
+                    mode: {route: measure(client, sample_paths(document, route, targets), duration,
+                                          before_request=clear_response_caches if mode == 'cold' else None)
+                           for route in routes}
+                    for mode in modes
+                }
+            results[str(size)]['_load_seconds'] = round(load_seconds, 3)
+            path.unlink()
+    return results
+
+
+def _measured(results):
+    """(size, mode, route, result) for every measurement in ``results``"""
+    for size, modes in results.items():
+        for mode in MODES:
+            for route, result in modes.get(mode, {}).items():
+                yield size, mode, route, result
+
+
+def compare(results, baseline, threshold=0.2):
+    """Rows (size, mode, route, metric, baseline, current, change) of every regression beyond ``threshold``"""
+    regressions = []
+    for size, mode, route, current in _measured(results):
+        before = baseline.get(size, {}).get(mode, {}).get(route)
+        if not before:
+            continue
+        if current['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append((size, mode, route, 'p95_ms', before['p95_ms'], current['p95_ms'],
+                                current['p95_ms'] / before['p95_ms'] - 1))
+        if current['requests_per_sec'] < before['requests_per_sec'] * (1 - threshold):
+            regressions.append((size, mode, route, 'requests_per_sec', before['requests_per_sec'],
+                                current['requests_per_sec'],
+                                current['requests_per_sec'] / before['requests_per_sec'] - 1))
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Write the baseline atomically, with enough context to judge whether it still applies"""
+    document = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.baseline-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(document, f, indent=2)
+        f.write('\n')
+    os.replace(tmp, path)
+
+
+def print_report(results, baseline=None):
+    print("\nRoute latency benchmark (Flask test client)")
+    print("=" * 98)
+    print(f"{'catalog':>9} {'mode':<6}{'route':<17}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'vs base p95':>14}")
+    print("-" * 98)
+    for size, modes in results.items():
+        for _, mode, route, r in _measured({size: modes}):
+            before = (baseline or {}).get(size, {}).get(mode, {}).get(route)
+            change = f"{r['p95_ms'] / before['p95_ms'] - 1:>+13.0%}" if before and before['p95_ms'] else ''
+            print(f"{int(size):>9,} {mode:<6}{route:<17}{r['requests_per_sec']:>10,.0f}{r['p50_ms']:>9.3f}"
+                  f"{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f}{r['errors']:>8} {change}")
+        print(f"{'':>9} (catalog loaded in {modes['_load_seconds']:.2f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark HangarStack routes over synthetic catalogs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="aircraft per catalog")
+    parser.add_argument('--routes', nargs='+', default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES),
+                        help="warm: caches enabled; cold: page and response caches cleared per request")
+    parser.add_argument('--duration', type=float, default=2.0, help="seconds per route and catalog")
+    parser.add_argument('--targets', type=int, default=100, help="distinct manufacturers/aircraft requested")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help="baseline file")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="fail on regressions against the baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative p95/throughput change counted as a regression")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) else None
+    results = run(args.sizes, args.routes, args.duration, args.targets, modes=args.modes)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, baseline)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+    if args.compare:
+        if baseline is None:
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for size, mode, route, metric, before, current, change in regressions:
+                print(f"  {int(size):>9,} {mode:<6}{route:<17}{metric:<18}{before:>12.3f} -> {current:>12.3f} "
+                      f"({change:+.0%})")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Server Scaling Benchmark for HangarStack
+
+Starts `python -m hangar_stack serve` with each worker count in turn,
+drives it with client processes over keep-alive connections for a fixed
+time and reports requests/sec, p50/p99 latency and the speedup over the
+first (smallest) worker count. Run it on the machine you deploy to: the
+speedup is bounded by its free cores, and the clients need cores too.
+
+Usage:
+  python -m hangar_stack.benchmark_server
+  python -m hangar_stack.benchmark_server --workers 1 2 4 8 --clients 16 --duration 15
+  python -m hangar_stack.benchmark_server --paths /home /api/aircraft/Boeing --json results.json
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PACKAGE_ROOT = Path(__file__).parent.parent
+
+DEFAULT_PATHS = (
+    '/home',
+    '/manufacturer/Boeing',
+    '/aircraft/Lockheed%20Martin/F-22A',
+    '/api/aircraft/Boeing',
+    '/api/search?q=stealth',
+    '/api/aircraft/filter?mach%3E1.5',
+    '/api/stats',
+)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, port, startup_timeout=120.0):
+    process = subprocess.Popen([sys.executable, '-m', 'hangar_stack', 'serve',
+                                '--workers', str(workers), '--port', str(port)],
+                               cwd=PACKAGE_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/home')
+            ok = conn.getresponse().status == 200
+            conn.close()
+            if ok:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Server did not answer within {startup_timeout:.0f}s")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def client(port, paths, start_at, stop_at, offset):
+    """One client process: GET ``paths`` round robin until ``stop_at``; returns (count, errors, latencies)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    latencies = []
+    errors = 0
+    i = offset
+    while time.time() < start_at:
+        time.sleep(0.001)
+    while time.time() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        sent = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - sent)
+    conn.close()
+    return len(latencies), errors, latencies
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(workers, clients, duration, paths, warmup):
+    port = free_port()
+    process = start_server(workers, port)
+    try:
+        # Fill every worker's page and response caches before measuring
+        client(port, paths, 0, time.time() + warmup, 0)
+        start_at = time.time() + 0.5
+        stop_at = start_at + duration
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.starmap(client, [(port, paths, start_at, stop_at, n) for n in range(clients)])
+    finally:
+        stop_server(process)
+
+    count = sum(r[0] for r in results)
+    latencies = sorted(l for r in results for l in r[2])
+    return {
+        'workers': workers,
+        'clients': clients,
+        'requests': count,
+        'errors': sum(r[1] for r in results),
+        'rps': count / duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HangarStack multi-worker server benchmark")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, max(1, (os.cpu_count() or 1) // 2), os.cpu_count() or 1}),
+                        help="worker counts to compare (default: 1, 2, half and all cores)")
+    parser.add_argument('--clients', type=int, default=2 * (os.cpu_count() or 1),
+                        help="concurrent client processes (default: 2 per core)")
+    parser.add_argument('--duration', type=float, default=10.0, help="measured seconds per run")
+    parser.add_argument('--warmup', type=float, default=2.0, help="seconds of single-client warmup per run")
+    parser.add_argument('--paths', nargs='+', default=list(DEFAULT_PATHS), help="request paths, used round robin")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    print(f"Cores: {os.cpu_count()}  clients: {args.clients}  duration: {args.duration:.0f}s  "
+          f"paths: {len(args.paths)}")
+    print(f"{'workers':>7} {'req/s':>10} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    results = []
+    for workers in args.workers:
+        result = run(workers, args.clients, args.duration, args.paths, args.warmup)
+        result['speedup'] = result['rps'] / results[0]['rps'] if results and results[0]['rps'] else 1.0
+        results.append(result)
+        print(f"{workers:>7} {result['rps']:>10.0f} {result['speedup']:>7.2f}x "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cores': os.cpu_count(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
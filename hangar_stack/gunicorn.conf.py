@@ -0,0 +1,27 @@
+# Gunicorn settings for HangarStack, equivalent to `python -m hangar_stack serve`
+#
+#   gunicorn -c hangar_stack/gunicorn.conf.py hangar_stack.app:app
+#
+# The app is loaded in the master (preload_app) and the database is read
+# before forking, so workers share it copy-on-write; each worker then opens
+# its own Kafka producer.
+import os
+
+bind = os.getenv('HANGAR_BIND', '127.0.0.1:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('HANGAR_WORKER_THREADS', '4'))
+timeout = 30
+keepalive = 2
+preload_app = True
+
+
+def when_ready(server):
+    from hangar_stack import app as app_module
+    from hangar_stack.server import prepare_master
+    prepare_master(app_module)
+
+
+def post_fork(server, worker):
+    from hangar_stack import app as app_module
+    app_module.after_fork()
@@ -0,0 +1,194 @@
+import operator
+import re
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import unquote_plus
+
+import numpy as np
+
+# Numeric columns and where each one lives in an aircraft record
+NUMERIC_FIELDS = {
+    'mach': ('specifications', 'performance', 'max_speed', 'mach'),
+    'knots': ('specifications', 'performance', 'max_speed', 'knots'),
+    'range_nm': ('specifications', 'performance', 'range', 'nautical_miles'),
+    'range_km': ('specifications', 'performance', 'range', 'kilometers'),
+    'ceiling_ft': ('specifications', 'performance', 'service_ceiling', 'feet'),
+    'ceiling_m': ('specifications', 'performance', 'service_ceiling', 'meters'),
+    'empty_lb': ('specifications', 'weights', 'empty', 'pounds'),
+    'empty_kg': ('specifications', 'weights', 'empty', 'kilograms'),
+    'mtow_lb': ('specifications', 'weights', 'max_takeoff', 'pounds'),
+    'mtow_kg': ('specifications', 'weights', 'max_takeoff', 'kilograms'),
+    'length_ft': ('specifications', 'dimensions', 'length', 'feet'),
+    'length_m': ('specifications', 'dimensions', 'length', 'meters'),
+    'wingspan_ft': ('specifications', 'dimensions', 'wingspan', 'feet'),
+    'wingspan_m': ('specifications', 'dimensions', 'wingspan', 'meters'),
+    'height_ft': ('specifications', 'dimensions', 'height', 'feet'),
+    'height_m': ('specifications', 'dimensions', 'height', 'meters'),
+    'year': ('introduction_year',),
+}
+
+# Dictionary-coded string columns (equality predicates only)
+CATEGORY_FIELDS = ('status', 'manufacturer')
+
+OPERATORS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '!=': operator.ne,
+    '==': operator.eq,
+    '=': operator.eq,
+    '>': operator.gt,
+    '<': operator.lt,
+}
+
+_PREDICATE = re.compile(r'^\s*([A-Za-z_]+)\s*(>=|<=|!=|==|=|>|<)\s*(.*?)\s*$')
+
+
+class Predicate(NamedTuple):
+    field: str
+    op: str
+    value: object
+
+
+def _lookup(record, path):
+    value = record
+    try:
+        for key in path:
+            value = value[key]
+    except (KeyError, TypeError, IndexError):
+        return None
+    # Free-text values (e.g. "Classified") and bools count as missing
+    if value.__class__ is int or value.__class__ is float:
+        return value
+    return None
+
+
+def parse_filter(query_string, reserved=('limit',)):
+    """Parse ``mach>1.5&range_nm>=2000&status=Active`` into predicates.
+
+    The raw query string is used because range operators are not valid
+    key=value pairs. Terms named in ``reserved`` (e.g. ``limit``) are
+    returned separately as plain options.
+    """
+    if isinstance(query_string, bytes):
+        query_string = query_string.decode('utf-8')
+    predicates = []
+    options = {}
+    for term in query_string.split('&'):
+        term = unquote_plus(term)
+        if not term.strip():
+            continue
+        match = _PREDICATE.match(term)
+        if not match:
+            raise ValueError(f"Invalid filter term '{term}'")
+        field, op, raw = match.groups()
+        if field in reserved:
+            options[field] = raw
+            continue
+        if field in NUMERIC_FIELDS:
+            try:
+                value = float(raw)
+            except ValueError:
+                raise ValueError(f"Filter value for '{field}' must be a number, got '{raw}'")
+        elif field in CATEGORY_FIELDS:
+            if op not in ('=', '==', '!='):
+                raise ValueError(f"Only =, == and != are supported for '{field}'")
+            value = raw
+        else:
+            raise ValueError(f"Unknown filter field '{field}'")
+        predicates.append(Predicate(field, op, value))
+    return predicates, options
+
+
+class ColumnarSpecs:
+    """Column-oriented copy of the numeric aircraft specifications.
+
+    Each numeric field is a float64 array with a boolean ``valid`` mask for
+    records that do not have the value; status and manufacturer are
+    dictionary-coded into small integer arrays. Row ``i`` in every column
+    refers to ``rows[i]``, a (manufacturer, record) pair from the snapshot.
+    """
+
+    def __init__(self, data: Optional[dict] = None):
+        self.rows = []
+        self.values: Dict[str, np.ndarray] = {}
+        self.valid: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List[str]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self._pending = {field: [] for field in NUMERIC_FIELDS}
+
+        if data is not None:
+            for manufacturer, entry in data.get('manufacturers', {}).items():
+                for aircraft in entry.get('aircraft', []):
+                    self.add(manufacturer, aircraft)
+            self.finish()
+
+    def add(self, manufacturer: str, aircraft: dict):
+        """Append one record; call finish() once all records are added."""
+        self.rows.append((manufacturer, aircraft))
+        for field, path in NUMERIC_FIELDS.items():
+            self._pending[field].append(_lookup(aircraft, path))
+
+    def finish(self):
+        count = len(self.rows)
+        for field, values in self._pending.items():
+            # None becomes NaN when numpy builds a float array
+            column = np.array(values, dtype=np.float64).reshape(count)
+            self.values[field] = column
+            self.valid[field] = ~np.isnan(column)
+        self._pending = {field: [] for field in NUMERIC_FIELDS}
+
+        self._encode('status', [str(a.get('status', 'Unknown')) for _, a in self.rows])
+        self._encode('manufacturer', [m for m, _ in self.rows])
+
+    @classmethod
+    def from_arrays(cls, rows, values: Dict[str, np.ndarray], categories=None) -> 'ColumnarSpecs':
+        """Wrap prebuilt numeric columns (e.g. from a binary snapshot).
+
+        ``rows`` may be any sequence, such as one that decodes records on
+        access. ``categories`` maps each CATEGORY_FIELDS name to prebuilt
+        ``(sorted names, codes)``; without it they are encoded from the rows.
+        """
+        specs = cls()
+        specs.rows = rows
+        for field in NUMERIC_FIELDS:
+            specs.values[field] = values[field]
+            specs.valid[field] = ~np.isnan(values[field])
+        specs._pending = None
+        if categories is not None:
+            for field in CATEGORY_FIELDS:
+                specs.categories[field], specs.codes[field] = categories[field]
+        else:
+            specs._encode('status', [str(a.get('status', 'Unknown')) for _, a in specs.rows])
+            specs._encode('manufacturer', [m for m, _ in specs.rows])
+        return specs
+
+    def _encode(self, field, values):
+        names = sorted(set(values))
+        lookup = {name: code for code, name in enumerate(names)}
+        self.categories[field] = names
+        self.codes[field] = np.fromiter((lookup[v] for v in values), dtype=np.int32, count=len(values))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def mask(self, predicates: List[Predicate]) -> np.ndarray:
+        """Boolean mask of rows matching all predicates (missing values never match)."""
+        result = np.ones(len(self.rows), dtype=bool)
+        for predicate in predicates:
+            compare = OPERATORS[predicate.op]
+            if predicate.field in NUMERIC_FIELDS:
+                column = self.values[predicate.field]
+                with np.errstate(invalid='ignore'):
+                    result &= self.valid[predicate.field] & compare(column, predicate.value)
+            else:
+                names = self.categories[predicate.field]
+                code = names.index(predicate.value) if predicate.value in names else -1
+                result &= compare(self.codes[predicate.field], code)
+        return result
+
+    def filter(self, predicates: List[Predicate], limit=None):
+        """Return ``(total_matches, rows)`` with up to ``limit`` matching rows."""
+        indices = np.flatnonzero(self.mask(predicates))
+        total = len(indices)
+        if limit is not None:
+            indices = indices[:limit]
+        return total, [self.rows[i] for i in indices]
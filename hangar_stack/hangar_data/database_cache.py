@@ -0,0 +1,347 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Optional
+from hangar_stack.hangar_data.columnar import ColumnarSpecs
+from hangar_stack.hangar_data.indexes import AircraftIndex
+from hangar_stack.hangar_data.search import DeferredSearchIndex, SearchIndex
+from hangar_stack.hangar_data.snapshot import SnapshotIndex, open_snapshot
+from hangar_stack.hangar_data.stats import DatabaseStats
+from hangar_stack.hangar_data.streaming import stream_database
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DatabaseSnapshot:
+    """Immutable, fully loaded view of the aircraft database.
+
+    Readers get a reference to a snapshot and keep using it for the whole
+    request; a reload never mutates an existing snapshot, it swaps in a new one.
+
+    Snapshots loaded from a compiled binary snapshot (from_binary) decode
+    records on demand: ``document`` stays None until something asks for
+    ``data``, the whole document.
+    """
+    document: Optional[dict]
+    content_hash: str
+    mtime: float
+    size: int
+    indexes: AircraftIndex = None
+    stats: DatabaseStats = None
+    columns: ColumnarSpecs = None
+    search: SearchIndex = None
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def data(self):
+        document = self.document
+        if document is None:
+            document = self.indexes.document()
+            # Built once; a racing second build is equal and simply replaced
+            object.__setattr__(self, 'document', document)
+        return document
+
+    @property
+    def _top_level(self):
+        return self.document if self.document is not None else self.indexes.shell
+
+    @property
+    def version(self):
+        return self._top_level.get('database_version')
+
+    @property
+    def last_updated(self):
+        return self._top_level.get('last_updated')
+
+    @property
+    def manufacturers(self):
+        return self.data.get('manufacturers', {})
+
+    @classmethod
+    def from_bytes(cls, raw, mtime=0.0, size=None, content_hash=None, previous=None):
+        """Build a snapshot (with indexes, stats, spec columns and search index) from the raw JSON document."""
+        if content_hash is None:
+            content_hash = hashlib.sha256(raw).hexdigest()
+        return cls.from_data(json.loads(raw), content_hash, mtime=mtime,
+                             size=len(raw) if size is None else size, previous=previous)
+
+    @classmethod
+    def from_data(cls, data, content_hash, mtime=0.0, size=0, previous=None):
+        """Build a snapshot (with indexes, stats, spec columns and search index) from a parsed document.
+
+        With ``previous`` (the snapshot being replaced) stats are updated from
+        its stats with just the records that changed instead of recounted.
+        """
+        if previous is not None and previous.document is not None and previous.stats is not None:
+            stats = previous.stats.updated(previous.document, data)
+        else:
+            stats = DatabaseStats.from_data(data)
+        return cls(document=data,
+                   content_hash=content_hash,
+                   mtime=mtime,
+                   size=size,
+                   indexes=AircraftIndex(data),
+                   stats=stats,
+                   columns=ColumnarSpecs(data),
+                   search=SearchIndex(data))
+
+    @classmethod
+    def from_stream(cls, path, lazy_fields=(), mtime=0.0, size=0, content_hash=None):
+        """Build a snapshot while streaming the file record by record.
+
+        Indexes, stats, spec columns and the search index are fed each
+        aircraft as it is parsed, so the raw document is never held in
+        memory. Fields in ``lazy_fields`` stay on disk (see DeferredText).
+        """
+        if content_hash is None:
+            content_hash = file_hash(path)
+        indexes = AircraftIndex()
+        stats = DatabaseStats()
+        columns = ColumnarSpecs()
+        search = SearchIndex()
+
+        def on_manufacturer(manufacturer):
+            indexes.add_manufacturer(manufacturer)
+            stats.add_manufacturer(manufacturer)
+
+        def on_aircraft(manufacturer, aircraft):
+            indexes.add(manufacturer, aircraft)
+            stats.add_aircraft(manufacturer, aircraft)
+            columns.add(manufacturer, aircraft)
+            search.add(manufacturer, aircraft)
+
+        data = stream_database(path, lazy_fields=lazy_fields,
+                               on_manufacturer=on_manufacturer,
+                               on_aircraft=on_aircraft)
+        indexes.finish()
+        columns.finish()
+        search.finish()
+        return cls(document=data,
+                   content_hash=content_hash,
+                   mtime=mtime,
+                   size=size,
+                   indexes=indexes,
+                   stats=stats,
+                   columns=columns,
+                   search=search)
+
+    @classmethod
+    def from_binary(cls, reader, mtime=0.0, size=0):
+        """Build a snapshot from a compiled binary snapshot (SnapshotReader).
+
+        Nothing is computed per record: indexes, stats and spec columns come
+        precomputed from the memory-mapped file, records are decoded through
+        its offset table when a page first needs them, and the search index
+        is built on the first search.
+        """
+        indexes = SnapshotIndex(reader)
+        return cls(document=None,
+                   content_hash=reader.source_hash,
+                   mtime=mtime,
+                   size=size,
+                   indexes=indexes,
+                   stats=reader.stats(),
+                   columns=ColumnarSpecs.from_arrays(indexes.rows, reader.columns(), reader.categories()),
+                   search=DeferredSearchIndex(indexes.rows))
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatabaseCache:
+    """Process-wide holder for the current DatabaseSnapshot.
+
+    The first call to get() loads the database synchronously. After that,
+    get() checks the file's mtime/size at most once every ``check_interval``
+    seconds and, when it changed, rebuilds the snapshot on a background
+    thread. Readers keep getting the previous snapshot until the new one is
+    complete, so they never block on a reload or see a half-loaded state.
+    Content is hashed so a touch without a real change does not rebuild.
+
+    With ``streaming=True`` the file is parsed record by record instead of
+    read whole (see DatabaseSnapshot.from_stream); ``lazy_fields`` then
+    names text fields to leave on disk until a page needs them.
+
+    With ``snapshot_path`` a compiled binary snapshot (see snapshot.py) is
+    used instead of parsing the JSON whenever it was built from the same
+    content. While the JSON still has the size and mtime recorded at build
+    time it is not read at all, and records are decoded as pages need them.
+
+    A reload that fails (unreadable, malformed or invalid file) keeps the
+    previous snapshot, and the file's mtime/size are remembered so the same
+    broken file is not loaded again on every check; the next change to the
+    file is picked up as usual.
+
+    With ``validator`` (a DatabaseValidator) every load is schema-validated
+    before it is swapped in, so an invalid edit keeps the previous snapshot.
+    Only aircraft changed since the last load are revalidated, and content
+    already validated (or a binary snapshot validated against the same
+    schema) is not validated again. Validation needs every field in memory,
+    so it cannot be combined with ``lazy_fields``.
+    """
+
+    def __init__(self, path, check_interval=1.0, streaming=False, lazy_fields=(), snapshot_path=None,
+                 validator=None):
+        if validator is not None and lazy_fields:
+            raise ValueError("Schema validation needs every field in memory; drop lazy_fields or the validator")
+        self.path = path
+        self.check_interval = check_interval
+        self.snapshot_path = snapshot_path
+        self.streaming = streaming
+        self.lazy_fields = tuple(lazy_fields)
+        self.validator = validator
+        self.last_validation = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._reload_thread = None
+        self._last_check = 0.0
+        self._listeners = []
+        self.reload_count = 0
+        self.last_reload_error = None
+        # (mtime, size) of the file version whose load last failed
+        self._failed_stat = None
+
+    def get(self):
+        """Return the current snapshot, scheduling a reload if the file changed."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load()
+                return self._snapshot
+
+        now = time.monotonic()
+        if self.check_interval is not None and now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if self._file_changed(snapshot):
+                self._start_background_reload()
+        return snapshot
+
+    def reload(self):
+        """Synchronously reload the database and return the new snapshot."""
+        with self._lock:
+            self._load()
+            return self._snapshot
+
+    def wait_for_reload(self, timeout=None):
+        """Block until any in-flight background reload finishes (used by tests)."""
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def add_listener(self, callback):
+        """Register ``callback(old_snapshot, new_snapshot)`` to run after each swap."""
+        self._listeners.append(callback)
+
+    def _file_changed(self, snapshot):
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.warning(f"Cannot stat database file {self.path}: {e}")
+            return False
+        if (stat.st_mtime, stat.st_size) == self._failed_stat:
+            return False
+        return stat.st_mtime != snapshot.mtime or stat.st_size != snapshot.size
+
+    def _start_background_reload(self):
+        # Separate lock so readers never wait on a reload that holds _lock.
+        with self._thread_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return
+            self._reload_thread = threading.Thread(target=self._background_reload,
+                                                   name='hangarstack-db-reload',
+                                                   daemon=True)
+            self._reload_thread.start()
+
+    def _background_reload(self):
+        try:
+            with self._lock:
+                self._load()
+        except Exception as e:
+            self.last_reload_error = e
+            logger.error(f"Database reload failed, keeping previous snapshot: {e}")
+
+    def _load(self):
+        """Read, hash and parse the file, then swap the snapshot. Caller holds the lock."""
+        stat = os.stat(self.path)
+        try:
+            self._load_stat(stat)
+        except Exception:
+            self._failed_stat = (stat.st_mtime, stat.st_size)
+            raise
+        self._failed_stat = None
+
+    def _load_stat(self, stat):
+        """_load() for the file version described by ``stat``"""
+        reader = open_snapshot(self.snapshot_path)
+        raw = None
+        if reader is not None and reader.built_from(stat):
+            # The JSON is exactly what the snapshot was compiled from: its
+            # recorded hash stands in for reading and hashing the file
+            content_hash = reader.source_hash
+        elif self.streaming:
+            content_hash = file_hash(self.path)
+        else:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            content_hash = hashlib.sha256(raw).hexdigest()
+
+        old = self._snapshot
+        # Deferred fields are tied to the file's mtime, so a touched file with
+        # lazy fields is streamed again to get fresh references
+        reusable = not self.lazy_fields or (old is not None and old.mtime == stat.st_mtime)
+        if old is not None and old.content_hash == content_hash and reusable:
+            # Same content (e.g. touched or rewritten identically): keep the
+            # parsed data and just remember the new file metadata.
+            self._snapshot = replace(old, mtime=stat.st_mtime, size=stat.st_size)
+            return
+
+        start = time.perf_counter()
+        if reader is not None and reader.source_hash != content_hash:
+            logger.info(f"Snapshot {self.snapshot_path} is stale (source changed); using JSON")
+            reader = None
+        if reader is not None:
+            new = DatabaseSnapshot.from_binary(reader, mtime=stat.st_mtime, size=stat.st_size)
+        elif self.streaming:
+            new = DatabaseSnapshot.from_stream(self.path, lazy_fields=self.lazy_fields,
+                                               mtime=stat.st_mtime, size=stat.st_size,
+                                               content_hash=content_hash)
+        else:
+            if raw is None:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+            new = DatabaseSnapshot.from_bytes(raw, mtime=stat.st_mtime,
+                                              size=stat.st_size,
+                                              content_hash=content_hash,
+                                              previous=old)
+        if self.validator is not None:
+            if reader is not None and reader.schema_hash == self.validator.schema_hash:
+                # Validated when the snapshot was built; no record is decoded
+                self.last_validation = self.validator.mark_validated(content_hash, records=len(reader))
+            else:
+                self.last_validation = self.validator.validate(new.data, content_hash)
+        self._snapshot = new
+        self.reload_count += 1
+        self.last_reload_error = None
+        source = 'binary snapshot' if reader is not None else 'JSON'
+        logger.info(f"Loaded aircraft database v{new.version} from {source} "
+                    f"({new.size} bytes, sha256 {content_hash[:12]}) "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        for callback in list(self._listeners):
+            try:
+                callback(old, new)
+            except Exception as e:
+                logger.error(f"Database reload listener failed: {e}")
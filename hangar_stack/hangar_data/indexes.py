@@ -0,0 +1,98 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Variants are usually objects with a designation, but older entries are
+# free text such as "A-6A: Initial production version"
+_VARIANT_TEXT_SPLIT = re.compile(r'\s*(?::|\s-\s)\s*')
+
+
+def introduction_sort_key(aircraft):
+    """Sort key used everywhere aircraft are listed: by introduction year."""
+    return aircraft.get('introduction_year', 9999)
+
+
+def variant_designation(variant) -> Optional[str]:
+    """Return the designation of a variant entry, whatever its shape."""
+    if isinstance(variant, dict):
+        return variant.get('designation')
+    if isinstance(variant, str) and variant.strip():
+        return _VARIANT_TEXT_SPLIT.split(variant.strip(), 1)[0]
+    return None
+
+
+class AircraftIndex:
+    """Lookup tables built once per database snapshot.
+
+    - ``by_key``: (manufacturer, designation) -> aircraft record
+    - ``sorted_aircraft``: manufacturer -> records sorted by introduction year
+    - ``by_designation``: designation -> (manufacturer, record) for base aircraft
+    - ``by_variant``: variant designation -> (manufacturer, base record, variant)
+
+    The index only holds references to the records in the snapshot, so it
+    must be rebuilt (not patched) when a new snapshot is loaded.
+    """
+
+    def __init__(self, data: Optional[dict] = None):
+        self.by_key: Dict[Tuple[str, str], dict] = {}
+        self.sorted_aircraft: Dict[str, List[dict]] = {}
+        self.by_designation: Dict[str, Tuple[str, dict]] = {}
+        self.by_variant: Dict[str, Tuple[str, dict, object]] = {}
+        self._pending: Dict[str, List[dict]] = {}
+
+        if data is not None:
+            for manufacturer, entry in data.get('manufacturers', {}).items():
+                self.add_manufacturer(manufacturer)
+                for aircraft in entry.get('aircraft', []):
+                    self.add(manufacturer, aircraft)
+            self.finish()
+
+    def add_manufacturer(self, manufacturer: str):
+        self._pending.setdefault(manufacturer, [])
+
+    def add(self, manufacturer: str, aircraft: dict):
+        """Index one record; call finish() once all records are added."""
+        self._pending.setdefault(manufacturer, []).append(aircraft)
+        designation = aircraft.get('designation')
+        if designation is None:
+            return
+        # First occurrence wins, matching the linear scans this replaces
+        self.by_key.setdefault((manufacturer, designation), aircraft)
+        self.by_designation.setdefault(designation, (manufacturer, aircraft))
+        for variant in aircraft.get('variants', []) or []:
+            name = variant_designation(variant)
+            if name:
+                self.by_variant.setdefault(name, (manufacturer, aircraft, variant))
+
+    def finish(self):
+        for manufacturer, aircraft_list in self._pending.items():
+            self.sorted_aircraft[manufacturer] = sorted(aircraft_list, key=introduction_sort_key)
+        self._pending = {}
+
+    @property
+    def manufacturers(self) -> List[str]:
+        return list(self.sorted_aircraft)
+
+    def has_manufacturer(self, manufacturer: str) -> bool:
+        return manufacturer in self.sorted_aircraft
+
+    def aircraft_for(self, manufacturer: str) -> List[dict]:
+        """Aircraft for a manufacturer sorted by introduction year (empty if unknown)."""
+        return self.sorted_aircraft.get(manufacturer, [])
+
+    def get(self, manufacturer: str, designation: str) -> Optional[dict]:
+        """Return the aircraft record for a manufacturer/designation pair."""
+        return self.by_key.get((manufacturer, designation))
+
+    def find(self, designation: str) -> Optional[Tuple[str, dict]]:
+        """Find a base aircraft or variant by designation across all manufacturers.
+
+        Returns ``(manufacturer, base_record)``; base designations take
+        precedence over variant designations.
+        """
+        hit = self.by_designation.get(designation)
+        if hit is not None:
+            return hit
+        variant_hit = self.by_variant.get(designation)
+        if variant_hit is not None:
+            return variant_hit[0], variant_hit[1]
+        return None
@@ -0,0 +1,192 @@
+import json
+import math
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from hangar_stack.hangar_data.validation import (compile_validator, document_shell, locate,
+                                                 record_schema_pointers, record_validators, schema_hash)
+
+# (unit, other unit, factor): other = unit * factor, wherever both appear in a measurement
+UNIT_PAIRS = (
+    ('feet', 'meters', 0.3048),
+    ('pounds', 'kilograms', 0.45359237),
+    ('nautical_miles', 'kilometers', 1.852),
+)
+
+DEFAULT_TOLERANCE = 0.02
+
+# Worker state, set once per process by _init_worker
+_worker = {}
+
+
+class Issue(NamedTuple):
+    kind: str            # 'schema' or 'consistency'
+    check: str           # schema keyword (e.g. 'required') or consistency check name
+    path: list
+    message: str
+    manufacturer: Optional[str] = None
+    index: Optional[int] = None
+    designation: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class LintReport(NamedTuple):
+    issues: List[Issue]
+    records: int
+    manufacturers: int
+    workers: int
+    elapsed_ms: float
+
+    def summary(self) -> dict:
+        return {
+            'records': self.records,
+            'manufacturers': self.manufacturers,
+            'issues': len(self.issues),
+            'by_check': dict(Counter(f"{i.kind}:{i.check}" for i in self.issues)),
+            'workers': self.workers,
+            'elapsed_ms': round(self.elapsed_ms, 1),
+        }
+
+    def to_dict(self) -> dict:
+        return {'summary': self.summary(), 'issues': [i.to_dict() for i in self.issues]}
+
+    def write(self, f, fmt='json'):
+        """Write the report as one JSON document or as NDJSON (one issue per line, summary last)."""
+        if fmt == 'ndjson':
+            for issue in self.issues:
+                f.write(json.dumps(issue.to_dict(), ensure_ascii=False) + '\n')
+            f.write(json.dumps({'summary': self.summary()}) + '\n')
+        else:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+
+def check_consistency(aircraft: dict, today: date, tolerance=DEFAULT_TOLERANCE):
+    """Yield ``(check, relative path, message)`` for data problems the schema cannot express."""
+    specifications = aircraft.get('specifications')
+    if isinstance(specifications, dict):
+        for group, measures in specifications.items():
+            if not isinstance(measures, dict):
+                continue
+            for name, values in measures.items():
+                if not isinstance(values, dict):
+                    continue
+                for unit, other, factor in UNIT_PAIRS:
+                    a, b = values.get(unit), values.get(other)
+                    if not _is_number(a) or not _is_number(b):
+                        continue
+                    expected = a * factor
+                    if abs(expected - b) > tolerance * max(abs(expected), abs(b)):
+                        yield (f"{unit}_{other}", ['specifications', group, name],
+                               f"{group}.{name}: {a} {unit} is {expected:.2f} {other}, not {b}")
+
+    verified = aircraft.get('last_verified')
+    if isinstance(verified, str):
+        try:
+            day = date.fromisoformat(verified[:10])
+        except ValueError:
+            day = None
+        if day is not None and day > today:
+            yield ('last_verified_future', ['last_verified'],
+                   f"last_verified {verified} is after {today.isoformat()}")
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _init_worker(schema, digest, pointers, today, tolerance):
+    _worker.update(schema=schema, digest=digest, pointers=pointers, today=today,
+                   tolerance=tolerance, validators={})
+
+
+def _lint_chunk(chunk) -> List[Issue]:
+    """Schema and consistency issues for ``[(manufacturer, index, aircraft), ...]``."""
+    issues = []
+    validators = _worker['validators']
+    for manufacturer, index, aircraft in chunk:
+        designation = aircraft.get('designation') if isinstance(aircraft, dict) else None
+        if manufacturer not in validators:
+            validators[manufacturer] = record_validators(_worker['schema'], _worker['digest'],
+                                                         _worker['pointers'], manufacturer)
+        for pointer, validator in validators[manufacturer]:
+            for error in validator.iter_errors(aircraft):
+                locate(error, manufacturer, index, pointer)
+                issues.append(Issue('schema', error.validator, list(error.absolute_path), error.message,
+                                    manufacturer, index, designation))
+        if not isinstance(aircraft, dict):
+            continue
+        base = ['manufacturers', manufacturer, 'aircraft', index]
+        for check, path, message in check_consistency(aircraft, _worker['today'], _worker['tolerance']):
+            issues.append(Issue('consistency', check, base + path, message, manufacturer, index, designation))
+    return issues
+
+
+def lint_database(data: dict, schema: dict, workers: Optional[int] = None, today: Optional[date] = None,
+                  tolerance=DEFAULT_TOLERANCE, chunk_size: Optional[int] = None) -> LintReport:
+    """Collect every schema violation and consistency issue in ``data``.
+
+    Aircraft records are split into chunks and checked on a process pool
+    (``workers`` defaults to the CPU count; 1 checks in this process).
+    Everything outside the aircraft lists is validated here first. If the
+    schema cannot validate records on their own (see
+    record_schema_pointers), the whole document is validated in one piece.
+    """
+    start = time.perf_counter()
+    today = today or date.today()
+    digest = schema_hash(schema)
+    pointers = record_schema_pointers(schema)
+    manufacturers = data.get('manufacturers') if isinstance(data.get('manufacturers'), dict) else {}
+    rows = [(manufacturer, i, aircraft)
+            for manufacturer, entry in manufacturers.items()
+            if isinstance(entry, dict) and isinstance(entry.get('aircraft'), list)
+            for i, aircraft in enumerate(entry['aircraft'])]
+
+    validator = compile_validator(schema, digest)
+    issues = []
+    if pointers is None:
+        # Records cannot be split off, so schema errors come from one pass
+        # and the workers only run the consistency checks
+        instance, pointers = data, []
+    else:
+        instance = document_shell(data)
+    for error in validator.iter_errors(instance):
+        path = list(error.absolute_path)
+        manufacturer = path[1] if len(path) > 1 and path[0] == 'manufacturers' else None
+        index = path[3] if len(path) > 3 and path[2] == 'aircraft' else None
+        issues.append(Issue('schema', error.validator, path, error.message, manufacturer, index))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(rows) or 1))
+    chunk_size = chunk_size or max(64, math.ceil(len(rows) / (workers * 8)))
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    init_args = (schema, digest, pointers, today, tolerance)
+    if workers == 1 or len(chunks) == 1:
+        workers = 1
+        _init_worker(*init_args)
+        for chunk in chunks:
+            issues.extend(_lint_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            for chunk_issues in pool.map(_lint_chunk, chunks):
+                issues.extend(chunk_issues)
+
+    return LintReport(issues=issues,
+                      records=len(rows),
+                      manufacturers=len(manufacturers),
+                      workers=workers,
+                      elapsed_ms=(time.perf_counter() - start) * 1000)
+
+
+def lint_file(source_path, schema_path, **options) -> LintReport:
+    """lint_database for the JSON database and schema files."""
+    with open(schema_path) as f:
+        schema = json.load(f)
+    with open(source_path) as f:
+        data = json.load(f)
+    return lint_database(data, schema, **options)
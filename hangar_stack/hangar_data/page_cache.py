@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+
+class PageCache:
+    """LRU cache of rendered HTML pages with an entry and memory cap.
+
+    Keys should include the snapshot content hash so a page rendered from
+    an old snapshot is never served for a new one; clear() is also wired to
+    database reloads so stale pages do not hold memory until evicted.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_render(self, key, render):
+        """Return the cached page for ``key`` or call ``render()`` and cache it."""
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Render outside the lock; concurrent misses for the same key just
+        # render twice and the last one wins
+        page = render()
+        self.put(key, page)
+        return page
+
+    def put(self, key, page):
+        size = len(page.encode('utf-8')) if isinstance(page, str) else len(page)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._pages.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._pages[key] = (page, size)
+            self.current_bytes += size
+            while self._pages and (len(self._pages) > self.max_entries or self.current_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._pages.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._pages)
+
+    def info(self):
+        return {
+            'entries': len(self._pages),
+            'bytes': self.current_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
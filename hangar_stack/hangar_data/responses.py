@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Brotli is optional - without it we only precompress with gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Encodings in order of preference when the client accepts several
+ENCODINGS = ('br', 'gzip')
+
+
+class PreparedResponse:
+    """A JSON body serialized once, with precompressed variants and an ETag."""
+
+    def __init__(self, body: bytes, version=None):
+        self.body = body
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        self.etag = f"{version}-{digest}" if version else digest
+        self.encoded = {}
+        gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+        if len(gzipped) < len(body):
+            self.encoded['gzip'] = gzipped
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=9)
+            if len(compressed) < len(body):
+                self.encoded['br'] = compressed
+
+    def etag_for(self, encoding=None):
+        """Strong ETag for a representation; each encoding gets its own tag."""
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+    @property
+    def etags(self):
+        return [self.etag] + [self.etag_for(encoding) for encoding in self.encoded]
+
+    def choose(self, accepts):
+        """Pick the best representation.
+
+        ``accepts`` is a callable returning the client's quality value for an
+        encoding name (e.g. ``request.accept_encodings.quality``). Returns
+        ``(body, encoding)`` with encoding None for the identity body.
+        """
+        for encoding in ENCODINGS:
+            if encoding in self.encoded and accepts(encoding) > 0:
+                return self.encoded[encoding], encoding
+        return self.body, None
+
+
+class ResponseCache:
+    """Prepared responses for one database snapshot at a time.
+
+    Entries are built on first request and kept until a snapshot with a
+    different content hash is seen, at which point the whole cache is
+    dropped in one assignment. The swap and the counters are guarded by a
+    lock for threaded workers; payloads are serialized outside it, and
+    concurrent misses for one key all return the first response stored.
+    """
+
+    def __init__(self, dumps):
+        self.dumps = dumps
+        self._entries = (None, {})
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, snapshot, key, build_payload):
+        with self._lock:
+            content_hash, entries = self._entries
+            if content_hash != snapshot.content_hash:
+                entries = {}
+                self._entries = (snapshot.content_hash, entries)
+
+            prepared = entries.get(key)
+            if prepared is not None:
+                self.hits += 1
+                return prepared
+            self.misses += 1
+
+        body = self.dumps(build_payload())
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        prepared = PreparedResponse(body, version=snapshot.version)
+        with self._lock:
+            return entries.setdefault(key, prepared)
+
+    def clear(self):
+        with self._lock:
+            self._entries = (None, {})
@@ -0,0 +1,197 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set
+
+# Substrings up to this length are indexed directly; longer query terms are
+# answered by intersecting their n-gram posting lists and verifying
+GRAM_SIZE = 3
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+class SearchResult(NamedTuple):
+    manufacturer: str
+    aircraft: dict
+    score: int
+
+
+def _number(value):
+    return value if value.__class__ in (int, float) else None
+
+
+class SearchIndex:
+    """Posting-list search over aircraft designations, names and specs.
+
+    Scores are the same as the original linear scan in
+    AircraftViewer.search_aircraft:
+
+    - whole query equals a designation/name: 100, starts one: 75, inside one: 50
+    - each query word found in designation/name: +15
+    - "mach"/"supersonic" words on Mach > 1, "subsonic" on Mach < 1: +10
+    - "large"/"heavy" words over 100,000 lb MTOW, "small"/"light" under 50,000 lb: +10
+    - a word equal to the status: +20, a word equal to the introduction year: +25
+
+    Substring checks use an n-gram index, "starts with" uses a sorted prefix
+    index, and the spec heuristics use precomputed flag sets, so a query only
+    touches the aircraft that can score. Description words are indexed too
+    and add +5 each when ``include_description`` is requested.
+    """
+
+    def __init__(self, data: Optional[dict] = None):
+        self.docs = []
+        self._texts = []
+        self._grams: Dict[str, Set[int]] = defaultdict(set)
+        self._exact: Dict[str, Set[int]] = defaultdict(set)
+        self._prefix = []
+        self._status: Dict[str, Set[int]] = defaultdict(set)
+        self._year: Dict[str, Set[int]] = defaultdict(set)
+        self._description: Dict[str, Set[int]] = defaultdict(set)
+        self.flags: Dict[str, Set[int]] = {name: set() for name in ('supersonic', 'subsonic', 'heavy', 'light')}
+
+        self._prefix_keys = []
+        self._all = set()
+
+        if data is not None:
+            for manufacturer, entry in data.get('manufacturers', {}).items():
+                for aircraft in entry.get('aircraft', []):
+                    self.add(manufacturer, aircraft)
+            self.finish()
+
+    def finish(self):
+        self._prefix.sort()
+        self._prefix_keys = [text for text, _ in self._prefix]
+        self._all = set(range(len(self.docs)))
+
+    def add(self, manufacturer, aircraft):
+        """Index one record; call finish() once all records are added."""
+        doc = len(self.docs)
+        self.docs.append((manufacturer, aircraft))
+        designation = str(aircraft.get('designation', '')).lower()
+        name = str(aircraft.get('name', '')).lower()
+        self._texts.append((designation, name))
+
+        for text in (designation, name):
+            self._exact[text].add(doc)
+            self._prefix.append((text, doc))
+            for size in range(1, GRAM_SIZE + 1):
+                for i in range(len(text) - size + 1):
+                    self._grams[text[i:i + size]].add(doc)
+
+        self._status[str(aircraft.get('status', '')).lower()].add(doc)
+        if 'introduction_year' in aircraft:
+            self._year[str(aircraft['introduction_year'])].add(doc)
+        description = aircraft.get('description', '')
+        if isinstance(description, str):
+            for token in _TOKEN.findall(description.lower()):
+                self._description[token].add(doc)
+
+        specs = aircraft.get('specifications', {})
+        mach = _number(specs.get('performance', {}).get('max_speed', {}).get('mach'))
+        if mach is not None:
+            if mach > 1.0:
+                self.flags['supersonic'].add(doc)
+            elif mach < 1.0:
+                self.flags['subsonic'].add(doc)
+        mtow = _number(specs.get('weights', {}).get('max_takeoff', {}).get('pounds'))
+        if mtow is not None:
+            if mtow > 100000:
+                self.flags['heavy'].add(doc)
+            elif mtow < 50000:
+                self.flags['light'].add(doc)
+
+    def _starting_with(self, prefix) -> Set[int]:
+        """Docs whose designation or name starts with ``prefix``."""
+        start = bisect.bisect_left(self._prefix_keys, prefix)
+        docs = set()
+        for i in range(start, len(self._prefix)):
+            text, doc = self._prefix[i]
+            if not text.startswith(prefix):
+                break
+            docs.add(doc)
+        return docs
+
+    def _containing(self, text) -> Set[int]:
+        """Docs whose designation or name contains ``text`` as a substring."""
+        if not text:
+            return set(self._all)
+        if len(text) <= GRAM_SIZE:
+            return set(self._grams.get(text, ()))
+        postings = [self._grams.get(text[i:i + GRAM_SIZE], set())
+                    for i in range(len(text) - GRAM_SIZE + 1)]
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        return {doc for doc in candidates
+                if text in self._texts[doc][0] or text in self._texts[doc][1]}
+
+    def search(self, query: str, include_description=False) -> List[SearchResult]:
+        """Return matching aircraft sorted by score, then designation."""
+        query = query.lower()
+        scores = defaultdict(int)
+
+        exact = self._exact.get(query, set())
+        starts = self._starting_with(query) - exact
+        contains = self._containing(query) - exact - starts
+        for docs, points in ((exact, 100), (starts, 75), (contains, 50)):
+            for doc in docs:
+                scores[doc] = points
+
+        for word in query.split():
+            for doc in self._containing(word):
+                scores[doc] += 15
+            if 'mach' in word or 'supersonic' in word:
+                self._bump(scores, self.flags['supersonic'], 10)
+            if 'subsonic' in word:
+                self._bump(scores, self.flags['subsonic'], 10)
+            if 'large' in word or 'heavy' in word:
+                self._bump(scores, self.flags['heavy'], 10)
+            if 'small' in word or 'light' in word:
+                self._bump(scores, self.flags['light'], 10)
+            self._bump(scores, self._status.get(word, ()), 20)
+            if word.isdigit():
+                self._bump(scores, self._year.get(word, ()), 25)
+            if include_description:
+                self._bump(scores, self._description.get(word, ()), 5)
+
+        results = [SearchResult(self.docs[doc][0], self.docs[doc][1], score)
+                   for doc, score in scores.items() if score > 0]
+        results.sort(key=lambda r: (-r.score, r.aircraft['designation']))
+        return results
+
+    @staticmethod
+    def _bump(scores, docs, points):
+        for doc in docs:
+            scores[doc] += points
+
+
+class DeferredSearchIndex:
+    """SearchIndex over ``rows`` ((manufacturer, record) pairs), built on the first search.
+
+    Used for binary snapshots, whose records are only decoded when a page
+    needs them: the catalog-wide index is not paid for at startup.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> SearchIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    index = SearchIndex()
+                    for manufacturer, aircraft in self.rows:
+                        index.add(manufacturer, aircraft)
+                    index.finish()
+                    self._index = index
+        return self._index
+
+    def search(self, query: str, include_description=False) -> List[SearchResult]:
+        return self.index.search(query, include_description=include_description)
@@ -0,0 +1,346 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from hangar_stack.hangar_data.database_cache import DatabaseSnapshot
+from hangar_stack.hangar_data.indexes import AircraftIndex
+from hangar_stack.hangar_data.stats import DatabaseStats
+
+logger = logging.getLogger(__name__)
+
+# Sharded layout: one JSON file per manufacturer (the manufacturer entry,
+# aircraft list included) plus manifest.json:
+#
+#   {"format": 1,
+#    "document": <top-level fields, "manufacturers": null keeps key order>,
+#    "manufacturers": {name: {"file": ..., "count": ..., "sha256": ...}}}
+#
+# The manifest is all the home page needs; a shard is parsed only when one
+# of its manufacturer's pages is requested, and an edit to one shard
+# changes only that shard's sha256.
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+def _write_atomic(path, raw: bytes):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.shard-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _dumps(value) -> bytes:
+    return (json.dumps(value, indent=2, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def shard_filename(manufacturer: str, taken=()) -> str:
+    """``"Lockheed Martin"`` -> ``lockheed-martin.json`` (suffixed if the name is taken)."""
+    slug = re.sub(r'[^a-z0-9]+', '-', manufacturer.lower()).strip('-') or 'manufacturer'
+    name, n = f"{slug}.json", 2
+    while name in taken:
+        name, n = f"{slug}-{n}.json", n + 1
+    return name
+
+
+def _shard_record(filename, raw: bytes, entry: dict) -> dict:
+    aircraft = entry.get('aircraft') if isinstance(entry, dict) else None
+    return {'file': filename,
+            'count': len(aircraft) if isinstance(aircraft, list) else 0,
+            'sha256': hashlib.sha256(raw).hexdigest()}
+
+
+def split_database(source_path, shard_dir) -> 'Manifest':
+    """Write the JSON database at ``source_path`` as shards plus a manifest in ``shard_dir``.
+
+    Shard files that an earlier split wrote but the new manifest does not
+    list are removed. The manifest is written last, so readers switch to
+    the new layout in one step.
+    """
+    with open(source_path, 'rb') as f:
+        data = json.load(f)
+    os.makedirs(shard_dir, exist_ok=True)
+    previous = _read_manifest_file(shard_dir, required=False)
+
+    document = dict(data)
+    shards = {}
+    taken = set()
+    for manufacturer, entry in data.get('manufacturers', {}).items():
+        filename = shard_filename(manufacturer, taken)
+        taken.add(filename)
+        raw = _dumps(entry)
+        _write_atomic(os.path.join(shard_dir, filename), raw)
+        shards[manufacturer] = _shard_record(filename, raw, entry)
+    if 'manufacturers' in document:
+        document['manufacturers'] = None
+
+    _write_manifest(shard_dir, document, shards)
+    if previous is not None:
+        for record in previous['manufacturers'].values():
+            if record['file'] not in taken:
+                path = os.path.join(shard_dir, record['file'])
+                if os.path.exists(path):
+                    os.unlink(path)
+    return read_manifest(shard_dir)
+
+
+def write_shard(shard_dir, manufacturer: str, entry: dict) -> 'Manifest':
+    """Replace (or add) one manufacturer's shard and update the manifest."""
+    manifest = _read_manifest_file(shard_dir)
+    shards = manifest['manufacturers']
+    record = shards.get(manufacturer)
+    filename = record['file'] if record else shard_filename(manufacturer, {r['file'] for r in shards.values()})
+    raw = _dumps(entry)
+    _write_atomic(os.path.join(shard_dir, filename), raw)
+    shards[manufacturer] = _shard_record(filename, raw, entry)
+    _write_manifest(shard_dir, manifest['document'], shards)
+    return read_manifest(shard_dir)
+
+
+def refresh_manifest(shard_dir) -> List[str]:
+    """Re-hash the shard files after hand edits; returns the manufacturers whose shard changed.
+
+    Only shards whose bytes changed are parsed (to recount their aircraft).
+    """
+    manifest = _read_manifest_file(shard_dir)
+    changed = []
+    for manufacturer, record in manifest['manufacturers'].items():
+        with open(os.path.join(shard_dir, record['file']), 'rb') as f:
+            raw = f.read()
+        if hashlib.sha256(raw).hexdigest() != record['sha256']:
+            manifest['manufacturers'][manufacturer] = _shard_record(record['file'], raw, json.loads(raw))
+            changed.append(manufacturer)
+    if changed:
+        _write_manifest(shard_dir, manifest['document'], manifest['manufacturers'])
+    return changed
+
+
+def join_shards(shard_dir) -> dict:
+    """Rebuild the single-file database document from a sharded layout."""
+    manifest = _read_manifest_file(shard_dir)
+    document = dict(manifest['document'])
+    manufacturers = {}
+    for manufacturer, record in manifest['manufacturers'].items():
+        with open(os.path.join(shard_dir, record['file']), 'rb') as f:
+            manufacturers[manufacturer] = json.load(f)
+    document['manufacturers'] = manufacturers
+    return document
+
+
+def _write_manifest(shard_dir, document, shards):
+    _write_atomic(os.path.join(shard_dir, MANIFEST_NAME),
+                  _dumps({'format': FORMAT_VERSION, 'document': document, 'manufacturers': shards}))
+
+
+def _read_manifest_file(shard_dir, required=True) -> Optional[dict]:
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        if required:
+            raise FileNotFoundError(f"No shard manifest in {shard_dir} (run `python -m hangar_stack shards split`)")
+        return None
+    with open(path, 'rb') as f:
+        return _check_format(json.load(f), path)
+
+
+def _check_format(manifest, path) -> dict:
+    if not isinstance(manifest, dict) or manifest.get('format') != FORMAT_VERSION:
+        found = manifest.get('format') if isinstance(manifest, dict) else None
+        raise ValueError(f"{path} has shard format {found}, expected {FORMAT_VERSION}")
+    return manifest
+
+
+@dataclass(frozen=True)
+class Manifest:
+    """The parsed manifest: top-level database fields and one record per shard."""
+    document: dict
+    shards: Dict[str, dict]
+    content_hash: str
+    mtime: float
+    size: int
+
+    @property
+    def version(self):
+        return self.document.get('database_version')
+
+    @property
+    def last_updated(self):
+        return self.document.get('last_updated')
+
+    @property
+    def manufacturers(self) -> List[str]:
+        return list(self.shards)
+
+    def count(self, manufacturer: str) -> int:
+        record = self.shards.get(manufacturer)
+        return record['count'] if record else 0
+
+
+def read_manifest(shard_dir) -> Manifest:
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    manifest = _check_format(json.loads(raw), path)
+    return Manifest(document=manifest['document'],
+                    shards=manifest['manufacturers'],
+                    content_hash=hashlib.sha256(raw).hexdigest(),
+                    mtime=stat.st_mtime,
+                    size=stat.st_size)
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One manufacturer's records with their indexes and stats.
+
+    Has the ``indexes``, ``stats``, ``content_hash`` and ``version``
+    attributes routes use on a DatabaseSnapshot, so manufacturer and
+    aircraft pages can render from either.
+    """
+    manufacturer: str
+    entry: dict
+    content_hash: str
+    version: Optional[str]
+    size: int
+    indexes: AircraftIndex
+    stats: DatabaseStats
+    loaded_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_bytes(cls, manufacturer, raw, version=None):
+        entry = json.loads(raw)
+        data = {'manufacturers': {manufacturer: entry}}
+        return cls(manufacturer=manufacturer,
+                   entry=entry,
+                   content_hash=hashlib.sha256(raw).hexdigest(),
+                   version=version,
+                   size=len(raw),
+                   indexes=AircraftIndex(data),
+                   stats=DatabaseStats.from_data(data))
+
+
+class ShardedDatabase:
+    """Manifest plus an LRU of loaded shards.
+
+    manifest() re-reads manifest.json when its mtime/size changed, checked
+    at most once every ``check_interval`` seconds. shard() parses a
+    manufacturer's file on first access and keeps up to ``max_shards`` of
+    them; entries are keyed by the shard's sha256 from the manifest, so
+    when one shard changes only that one is parsed again.
+
+    Catalog-wide views (search, spec filter, stats) still need every
+    record: full_snapshot() joins all shards into a DatabaseSnapshot, built
+    once per manifest version and only when such a route is used.
+
+    Listeners registered with add_listener() run after every manifest
+    swap, like DatabaseCache's after a snapshot swap.
+    """
+
+    def __init__(self, shard_dir, max_shards=16, check_interval=1.0):
+        self.shard_dir = str(shard_dir)
+        self.max_shards = max_shards
+        self.check_interval = check_interval
+        self._manifest = None
+        self._last_check = 0.0
+        self._shards = OrderedDict()
+        self._full = None
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def manifest(self) -> Manifest:
+        manifest = self._manifest
+        now = time.monotonic()
+        if manifest is None or (self.check_interval is not None
+                                and now - self._last_check >= self.check_interval):
+            self._last_check = now
+            path = os.path.join(self.shard_dir, MANIFEST_NAME)
+            try:
+                stat = os.stat(path)
+                if manifest is None or (stat.st_mtime, stat.st_size) != (manifest.mtime, manifest.size):
+                    old, manifest = manifest, read_manifest(self.shard_dir)
+                    self._manifest = manifest
+                    self._notify(old, manifest)
+            except (OSError, ValueError) as e:
+                if manifest is None:
+                    raise
+                logger.error(f"Cannot reload shard manifest, keeping previous one: {e}")
+        return manifest
+
+    def add_listener(self, callback):
+        """Register ``callback(old_manifest, new_manifest)`` to run after each manifest swap."""
+        self._listeners.append(callback)
+
+    def _notify(self, old, new):
+        for callback in list(self._listeners):
+            try:
+                callback(old, new)
+            except Exception as e:
+                logger.error(f"Shard manifest listener failed: {e}")
+
+    def shard(self, manufacturer: str) -> Optional[Shard]:
+        """The loaded shard for ``manufacturer``, or None if the manifest does not list it."""
+        manifest = self.manifest()
+        record = manifest.shards.get(manufacturer)
+        if record is None:
+            return None
+        key = (manufacturer, record['sha256'])
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is not None:
+                self._shards.move_to_end(key)
+                self.hits += 1
+                return shard
+
+        # Parse outside the lock; concurrent misses for one shard just load it twice
+        start = time.perf_counter()
+        with open(os.path.join(self.shard_dir, record['file']), 'rb') as f:
+            raw = f.read()
+        shard = Shard.from_bytes(manufacturer, raw, version=manifest.version)
+        if shard.content_hash != record['sha256']:
+            logger.warning(f"Shard {record['file']} does not match the manifest; "
+                           f"run `python -m hangar_stack shards refresh`")
+        logger.info(f"Loaded shard {record['file']} ({shard.size} bytes, "
+                    f"{shard.stats.overall.total} aircraft) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        with self._lock:
+            self.loads += 1
+            # Drop this manufacturer's older versions before applying the cap
+            for stale in [k for k in self._shards if k[0] == manufacturer]:
+                del self._shards[stale]
+            self._shards[key] = shard
+            while len(self._shards) > self.max_shards:
+                self._shards.popitem(last=False)
+                self.evictions += 1
+        return shard
+
+    def full_snapshot(self) -> DatabaseSnapshot:
+        manifest = self.manifest()
+        full = self._full
+        if full is None or full.content_hash != manifest.content_hash:
+            data = join_shards(self.shard_dir)
+            full = self._full = DatabaseSnapshot.from_data(data, manifest.content_hash,
+                                                           mtime=manifest.mtime, size=manifest.size,
+                                                           previous=full)
+        return full
+
+    def info(self) -> dict:
+        return {
+            'loaded': [manufacturer for manufacturer, _ in self._shards],
+            'max_shards': self.max_shards,
+            'loads': self.loads,
+            'hits': self.hits,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,491 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections.abc import Sequence
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from hangar_stack.hangar_data.columnar import CATEGORY_FIELDS, ColumnarSpecs, NUMERIC_FIELDS
+from hangar_stack.hangar_data.indexes import introduction_sort_key, variant_designation
+from hangar_stack.hangar_data.stats import DatabaseStats
+
+logger = logging.getLogger(__name__)
+
+# Binary snapshot layout (little endian):
+#
+#   header    magic, format version, flags, source sha256, schema sha256,
+#             record/manufacturer/string counts, source size and mtime
+#   sections  (offset, length) for each name in SECTIONS
+#   strings   u32 end offsets followed by a UTF-8 blob
+#   meta      compact JSON: document with null aircraft lists, per-manufacturer
+#             (first record, count), column names and DatabaseStats counters
+#   table     one RECORD_DTYPE row per aircraft (string ids + byte range)
+#   records   all aircraft as one compact JSON array; each table row points
+#             at its element so single records can be decoded on their own
+#   columns   float64 column per numeric field (NaN = missing), 8-byte aligned
+#   order     u32 row numbers, each manufacturer's rows by introduction year
+#   variants  compact JSON {variant designation: row of its base aircraft}
+MAGIC = b'HSNAPSHT'
+FORMAT_VERSION = 2
+FLAG_VALIDATED = 1
+
+SECTIONS = ('strings', 'meta', 'table', 'records', 'columns', 'order', 'variants')
+
+_HEADER = struct.Struct('<8sHH32s32sIIIQq')
+_SECTION = struct.Struct('<QQ')
+
+RECORD_DTYPE = np.dtype([
+    ('manufacturer', '<u4'),
+    ('designation', '<u4'),
+    ('name', '<u4'),
+    ('status', '<u4'),
+    ('offset', '<u8'),
+    ('length', '<u4'),
+])
+
+
+class SnapshotInfo(NamedTuple):
+    path: str
+    format_version: int
+    source_hash: str
+    schema_hash: Optional[str]
+    records: int
+    manufacturers: int
+    strings: int
+    size: int
+    source_size: int
+    source_mtime_ns: int
+
+
+def default_snapshot_path(source_path) -> str:
+    """``data/aircraft_database.json`` -> ``data/aircraft_database.snapshot``."""
+    return os.path.splitext(str(source_path))[0] + '.snapshot'
+
+
+def build_snapshot(source_path, output_path=None, schema_path=None) -> SnapshotInfo:
+    """Compile the JSON database into a binary snapshot.
+
+    Besides the records, the snapshot stores what DatabaseSnapshot would
+    otherwise compute at load time: per-manufacturer order, statistics,
+    numeric and category columns, and the variant lookup table.
+
+    When ``schema_path`` is given the document is validated first (a
+    ``jsonschema.ValidationError`` aborts the build) and the schema's hash
+    is recorded, so loaders can skip validation while both files match.
+    The snapshot is written to a temporary file and renamed into place, so
+    processes that have the old one mapped keep a consistent view.
+    """
+    output_path = output_path or default_snapshot_path(source_path)
+    # Stat before reading: if the file changes meanwhile, the recorded stat
+    # no longer matches and loaders fall back to comparing hashes
+    source_stat = os.stat(source_path)
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    source_hash = hashlib.sha256(raw).digest()
+    data = json.loads(raw)
+
+    schema_hash = bytes(32)
+    flags = 0
+    if schema_path is not None:
+        from hangar_stack.hangar_data.validation import compile_validator
+        with open(schema_path, 'rb') as f:
+            schema_raw = f.read()
+        schema_hash = hashlib.sha256(schema_raw).digest()
+        compile_validator(json.loads(schema_raw), schema_hash.hex()).validate(data)
+        flags |= FLAG_VALIDATED
+
+    strings: Dict[str, int] = {}
+
+    def intern(value) -> int:
+        value = '' if value is None else str(value)
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    # Aircraft lists are left as null placeholders so key order survives
+    document = dict(data)
+    manufacturers = {}
+    ranges = {}
+    rows = []
+    blobs = []
+    order = []
+    variants = {}
+    offset = 1  # after the opening '['
+    for manufacturer, entry in data.get('manufacturers', {}).items():
+        manufacturers[manufacturer] = dict(entry, aircraft=None)
+        aircraft_list = entry.get('aircraft', [])
+        first = len(rows)
+        ranges[manufacturer] = [first, len(aircraft_list)]
+        for aircraft in aircraft_list:
+            blob = json.dumps(aircraft, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            rows.append((intern(manufacturer), intern(aircraft.get('designation')),
+                         intern(aircraft.get('name')), intern(str(aircraft.get('status', 'Unknown'))),
+                         offset, len(blob)))
+            blobs.append(blob)
+            offset += len(blob) + 1
+            # Same first-occurrence rule as AircraftIndex.add
+            if aircraft.get('designation') is not None:
+                for variant in aircraft.get('variants', []) or []:
+                    name = variant_designation(variant)
+                    if name:
+                        variants.setdefault(name, len(rows) - 1)
+        order.extend(sorted(range(first, len(rows)), key=lambda i: introduction_sort_key(aircraft_list[i - first])))
+    if 'manufacturers' in document:
+        document['manufacturers'] = manufacturers
+
+    encoded = [s.encode('utf-8') for s in strings]
+    ends = np.cumsum([len(s) for s in encoded], dtype=np.uint32) if encoded else np.zeros(0, np.uint32)
+    sections = {
+        'strings': ends.astype('<u4').tobytes() + b''.join(encoded),
+        'meta': json.dumps({'document': document, 'aircraft': ranges,
+                            'columns': list(NUMERIC_FIELDS),
+                            'stats': DatabaseStats.from_data(data).to_state()},
+                           separators=(',', ':'), ensure_ascii=False).encode('utf-8'),
+        'table': np.array(rows, dtype=RECORD_DTYPE).tobytes(),
+        'records': b'[' + b','.join(blobs) + b']',
+        'order': np.array(order, dtype='<u4').tobytes(),
+        'variants': json.dumps(variants, separators=(',', ':'), ensure_ascii=False).encode('utf-8'),
+    }
+    columns = ColumnarSpecs(data)
+    sections['columns'] = b''.join(columns.values[field].astype('<f8').tobytes() for field in NUMERIC_FIELDS)
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, flags, source_hash, schema_hash,
+                          len(rows), len(manufacturers), len(strings),
+                          source_stat.st_size, source_stat.st_mtime_ns)
+    position = len(header) + _SECTION.size * len(SECTIONS)
+    layout = []
+    body = []
+    for name in SECTIONS:
+        padding = -position % 8
+        body.append(b'\0' * padding)
+        position += padding
+        layout.append(_SECTION.pack(position, len(sections[name])))
+        body.append(sections[name])
+        position += len(sections[name])
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(b''.join(layout))
+            for part in body:
+                f.write(part)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return read_info(output_path)
+
+
+def read_info(path) -> SnapshotInfo:
+    """Read just the header of a snapshot file."""
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+    return _parse_header(header, path, os.path.getsize(path))
+
+
+def _parse_header(header, path, size) -> SnapshotInfo:
+    if len(header) < _HEADER.size:
+        raise ValueError(f"{path} is too short to be a snapshot")
+    (magic, version, flags, source_hash, schema_hash, records, manufacturers, strings,
+     source_size, source_mtime_ns) = _HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a HangarStack snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+    return SnapshotInfo(path=str(path),
+                        format_version=version,
+                        source_hash=source_hash.hex(),
+                        schema_hash=schema_hash.hex() if flags & FLAG_VALIDATED else None,
+                        records=records,
+                        manufacturers=manufacturers,
+                        strings=strings,
+                        size=size,
+                        source_size=source_size,
+                        source_mtime_ns=source_mtime_ns)
+
+
+class SnapshotReader:
+    """Memory-mapped view of a snapshot file.
+
+    Opening one reads the header, the section table and the small meta
+    section only. Numeric columns, row order and the record table are
+    zero-copy NumPy views of the mapping, and single records are decoded on
+    demand; ``to_data()`` decodes the whole catalog with one ``json.loads``
+    of the records section.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.info = _parse_header(self._map[:_HEADER.size], self.path, len(self._map))
+            self._sections = {}
+            position = _HEADER.size
+            for name in SECTIONS:
+                offset, length = self._sections[name] = _SECTION.unpack_from(self._map, position)
+                position += _SECTION.size
+                if offset + length > len(self._map):
+                    raise ValueError(f"{self.path} is truncated ({name} section ends past the file)")
+        except struct.error as e:
+            self._map.close()
+            raise ValueError(f"{self.path} is truncated: {e}")
+        except ValueError:
+            self._map.close()
+            raise
+
+        offset, length = self._sections['strings']
+        count = self.info.strings
+        self._string_ends = np.frombuffer(self._map, dtype='<u4', count=count, offset=offset)
+        self._string_base = offset + 4 * count
+        offset, _ = self._sections['table']
+        self.table = np.frombuffer(self._map, dtype=RECORD_DTYPE, count=self.info.records, offset=offset)
+        self.meta = json.loads(self._section('meta'))
+
+    def _section(self, name) -> bytes:
+        offset, length = self._sections[name]
+        return self._map[offset:offset + length]
+
+    @property
+    def source_hash(self) -> str:
+        return self.info.source_hash
+
+    @property
+    def schema_hash(self) -> Optional[str]:
+        return self.info.schema_hash
+
+    def built_from(self, stat) -> bool:
+        """Whether the source file (an ``os.stat`` result) is unchanged since the build.
+
+        Size and nanosecond mtime are compared, so loaders can trust the
+        recorded source hash without reading the JSON; any edit, touch or
+        copy that does not preserve the mtime falls back to hashing.
+        """
+        return (self.info.source_size == stat.st_size
+                and self.info.source_mtime_ns == stat.st_mtime_ns)
+
+    def __len__(self):
+        return self.info.records
+
+    def string(self, string_id: int) -> str:
+        start = int(self._string_ends[string_id - 1]) if string_id else 0
+        end = int(self._string_ends[string_id])
+        return self._map[self._string_base + start:self._string_base + end].decode('utf-8')
+
+    def record(self, i: int) -> dict:
+        """Decode one aircraft record without touching the others."""
+        row = self.table[i]
+        start = self._sections['records'][0] + int(row['offset'])
+        return json.loads(self._map[start:start + int(row['length'])])
+
+    def designations(self, manufacturer: str) -> List[str]:
+        first, count = self.meta['aircraft'].get(manufacturer, (0, 0))
+        return [self.string(int(s)) for s in self.table['designation'][first:first + count]]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Numeric columns as read-only arrays backed by the mapping."""
+        offset, _ = self._sections['columns']
+        count = self.info.records
+        result = {}
+        for i, field in enumerate(self.meta['columns']):
+            result[field] = np.frombuffer(self._map, dtype='<f8', count=count, offset=offset + 8 * count * i)
+        return result
+
+    def categories(self) -> Dict[str, Tuple[List[str], np.ndarray]]:
+        """``(sorted names, codes)`` for each ColumnarSpecs category field, from the string ids."""
+        result = {}
+        for field in CATEGORY_FIELDS:
+            ids, codes = np.unique(self.table[field], return_inverse=True)
+            names = [self.string(int(string_id)) for string_id in ids]
+            ranking = sorted(range(len(names)), key=names.__getitem__)
+            remap = np.empty(len(names), dtype=np.int32)
+            remap[ranking] = np.arange(len(names), dtype=np.int32)
+            result[field] = ([names[i] for i in ranking], remap[codes.reshape(-1)])
+        return result
+
+    def order(self) -> np.ndarray:
+        """Row numbers with each manufacturer's rows sorted by introduction year."""
+        offset, _ = self._sections['order']
+        return np.frombuffer(self._map, dtype='<u4', count=self.info.records, offset=offset)
+
+    def variants(self) -> Dict[str, int]:
+        """Variant designation -> row of its base aircraft."""
+        return json.loads(self._section('variants'))
+
+    def stats(self) -> DatabaseStats:
+        return DatabaseStats.from_state(self.meta['stats'])
+
+    def to_data(self) -> dict:
+        """Rebuild the full database document."""
+        aircraft = json.loads(self._section('records'))
+        document = dict(self.meta['document'])
+        manufacturers = {}
+        for manufacturer, entry in document.get('manufacturers', {}).items():
+            first, count = self.meta['aircraft'][manufacturer]
+            manufacturers[manufacturer] = dict(entry, aircraft=aircraft[first:first + count])
+        document['manufacturers'] = manufacturers
+        return document
+
+
+class SnapshotIndex:
+    """AircraftIndex over a SnapshotReader that decodes records on demand.
+
+    Manufacturer order, each manufacturer's order by introduction year and
+    the variant table come precomputed from the snapshot, so creating one
+    costs nothing per record. A manufacturer's records are decoded the first
+    time one of them is asked for; decoded records are kept, so repeated
+    lookups return the same dicts, as with AircraftIndex.
+    """
+
+    def __init__(self, reader: SnapshotReader):
+        self.reader = reader
+        # Top-level fields of the document, aircraft lists left out
+        self.shell = reader.meta['document']
+        self.ranges = reader.meta['aircraft']
+        self.order = reader.order()
+        self.rows = SnapshotRows(self)
+        self._records: List[Optional[dict]] = [None] * len(reader)
+        self._by_manufacturer: Dict[str, Tuple[List[dict], Dict[str, dict]]] = {}
+        self._by_designation: Optional[Dict[str, int]] = None
+        self._variants: Optional[Dict[str, int]] = None
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, i: int) -> dict:
+        aircraft = self._records[i]
+        if aircraft is None:
+            aircraft = self._records[i] = self.reader.record(i)
+        return aircraft
+
+    def manufacturer_of(self, i: int) -> str:
+        string_id = int(self.reader.table['manufacturer'][i])
+        name = self._names.get(string_id)
+        if name is None:
+            name = self._names[string_id] = self.reader.string(string_id)
+        return name
+
+    def _manufacturer(self, manufacturer):
+        entry = self._by_manufacturer.get(manufacturer)
+        if entry is None:
+            with self._lock:
+                entry = self._by_manufacturer.get(manufacturer)
+                if entry is None:
+                    first, count = self.ranges[manufacturer]
+                    by_key = {}
+                    for i in range(first, first + count):
+                        aircraft = self.record(i)
+                        # First occurrence wins, as in AircraftIndex.add
+                        if aircraft.get('designation') is not None:
+                            by_key.setdefault(aircraft['designation'], aircraft)
+                    ordered = [self.record(int(i)) for i in self.order[first:first + count]]
+                    entry = self._by_manufacturer[manufacturer] = (ordered, by_key)
+        return entry
+
+    @property
+    def manufacturers(self) -> List[str]:
+        return list(self.ranges)
+
+    def has_manufacturer(self, manufacturer: str) -> bool:
+        return manufacturer in self.ranges
+
+    def aircraft_for(self, manufacturer: str) -> List[dict]:
+        """Aircraft for a manufacturer sorted by introduction year (empty if unknown)."""
+        if manufacturer not in self.ranges:
+            return []
+        return self._manufacturer(manufacturer)[0]
+
+    def get(self, manufacturer: str, designation: str) -> Optional[dict]:
+        """Return the aircraft record for a manufacturer/designation pair."""
+        if manufacturer not in self.ranges:
+            return None
+        return self._manufacturer(manufacturer)[1].get(designation)
+
+    def find(self, designation: str) -> Optional[Tuple[str, dict]]:
+        """Same contract as AircraftIndex.find; the lookup tables are read on first use."""
+        if self._by_designation is None:
+            ids, first_rows = np.unique(self.reader.table['designation'], return_index=True)
+            by_designation = {self.reader.string(int(s)): int(row) for s, row in zip(ids, first_rows)}
+            # Records without a designation are stored as the empty string
+            by_designation.pop('', None)
+            self._by_designation = by_designation
+        row = self._by_designation.get(designation)
+        if row is None:
+            if self._variants is None:
+                self._variants = self.reader.variants()
+            row = self._variants.get(designation)
+        if row is None:
+            return None
+        return self.manufacturer_of(row), self.record(row)
+
+    def document(self) -> dict:
+        """The full database document, built from the (shared) decoded records."""
+        document = dict(self.shell)
+        document['manufacturers'] = {
+            manufacturer: dict(entry, aircraft=[self.record(i) for i in range(*_span(self.ranges[manufacturer]))])
+            for manufacturer, entry in self.shell.get('manufacturers', {}).items()
+        }
+        return document
+
+
+def _span(first_count):
+    first, count = first_count
+    return first, first + count
+
+
+class SnapshotRows(Sequence):
+    """``(manufacturer, record)`` for every row of a SnapshotIndex, decoded on access."""
+
+    def __init__(self, index: SnapshotIndex):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index.reader)
+
+    def __getitem__(self, i):
+        i = int(i)
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        return self.index.manufacturer_of(i), self.index.record(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.index.manufacturer_of(i), self.index.record(i)
+
+
+def open_snapshot(snapshot_path) -> Optional[SnapshotReader]:
+    """Open ``snapshot_path``, or return None (and log why) if it is missing or unreadable."""
+    if not snapshot_path or not os.path.exists(snapshot_path):
+        return None
+    try:
+        return SnapshotReader(snapshot_path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Ignoring unreadable snapshot {snapshot_path}: {e}")
+        return None
+
+
+def open_matching(snapshot_path, source_hash, schema_hash=None) -> Optional[SnapshotReader]:
+    """Open ``snapshot_path`` if it was built from this exact source.
+
+    With ``schema_hash`` the snapshot must also have been validated against
+    that schema. Returns None (and logs why) when the snapshot is missing,
+    unreadable or stale, so callers fall back to the JSON file.
+    """
+    reader = open_snapshot(snapshot_path)
+    if reader is None:
+        return None
+    if reader.source_hash != source_hash:
+        logger.info(f"Snapshot {snapshot_path} is stale (source changed); using JSON")
+        return None
+    if schema_hash is not None and reader.schema_hash != schema_hash:
+        logger.info(f"Snapshot {snapshot_path} was not validated against the current schema; using JSON")
+        return None
+    return reader
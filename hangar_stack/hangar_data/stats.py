@@ -0,0 +1,243 @@
+from collections import Counter
+from typing import Dict, Optional
+
+
+class ManufacturerStats:
+    """Aggregates for one manufacturer, maintained incrementally.
+
+    Counters are kept for introduction years and verification dates so the
+    min/max values stay exact when records are removed or updated.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.variants = 0
+        self.by_status = Counter()
+        self._years = Counter()
+        self._verified = Counter()
+
+    @staticmethod
+    def _variant_count(aircraft):
+        return len(aircraft.get('variants', []) or [])
+
+    def add(self, aircraft: dict):
+        self._apply(aircraft, 1)
+
+    def remove(self, aircraft: dict):
+        self._apply(aircraft, -1)
+
+    def update(self, old: dict, new: dict):
+        self.remove(old)
+        self.add(new)
+
+    def _apply(self, aircraft, sign):
+        self.total += sign
+        self.variants += sign * self._variant_count(aircraft)
+        self._bump(self.by_status, aircraft.get('status', 'Unknown'), sign)
+        year = aircraft.get('introduction_year')
+        if isinstance(year, int):
+            self._bump(self._years, year, sign)
+        verified = aircraft.get('last_verified')
+        if verified:
+            self._bump(self._verified, verified, sign)
+
+    @staticmethod
+    def _bump(counter, key, sign):
+        counter[key] += sign
+        if counter[key] <= 0:
+            del counter[key]
+
+    @property
+    def active(self) -> int:
+        return self.by_status.get('Active', 0)
+
+    @property
+    def retired(self) -> int:
+        return self.by_status.get('Retired', 0)
+
+    @property
+    def development(self) -> int:
+        # Matches both "In Development" and "Development/Testing"
+        return sum(count for status, count in self.by_status.items() if 'Development' in str(status))
+
+    @property
+    def latest_verified(self) -> Optional[str]:
+        return max(self._verified) if self._verified else None
+
+    @property
+    def first_year(self) -> Optional[int]:
+        return min(self._years) if self._years else None
+
+    @property
+    def last_year(self) -> Optional[int]:
+        return max(self._years) if self._years else None
+
+    def merge(self, other: 'ManufacturerStats'):
+        self.total += other.total
+        self.variants += other.variants
+        self.by_status.update(other.by_status)
+        self._years.update(other._years)
+        self._verified.update(other._verified)
+
+    def copy(self) -> 'ManufacturerStats':
+        clone = ManufacturerStats()
+        clone.merge(self)
+        return clone
+
+    def to_state(self) -> dict:
+        """Counters in a JSON-serializable form (see from_state); keys keep their types."""
+        return {
+            'total': self.total,
+            'variants': self.variants,
+            'by_status': list(self.by_status.items()),
+            'years': list(self._years.items()),
+            'verified': list(self._verified.items()),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'ManufacturerStats':
+        stats = cls()
+        stats.total = state['total']
+        stats.variants = state['variants']
+        stats.by_status = Counter(dict(state['by_status']))
+        stats._years = Counter(dict(state['years']))
+        stats._verified = Counter(dict(state['verified']))
+        return stats
+
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total,
+            'active': self.active,
+            'retired': self.retired,
+            'development': self.development,
+            'by_status': dict(self.by_status),
+            'variants': self.variants,
+            'latest_verified': self.latest_verified,
+            'introduction_years': {'first': self.first_year, 'last': self.last_year},
+        }
+
+
+class DatabaseStats:
+    """Per-manufacturer and global aggregates for a database snapshot.
+
+    Built once when a snapshot is created. On a reload, updated() derives
+    the new snapshot's stats from the previous one's: manufacturers whose
+    aircraft lists are unchanged keep their stats, and in the others only
+    added, removed and edited records are applied (add_aircraft/
+    remove_aircraft/update_aircraft keep both levels in step).
+    """
+
+    def __init__(self):
+        self.manufacturers: Dict[str, ManufacturerStats] = {}
+        self.overall = ManufacturerStats()
+
+    @classmethod
+    def from_data(cls, data: dict) -> 'DatabaseStats':
+        stats = cls()
+        for manufacturer, entry in data.get('manufacturers', {}).items():
+            stats.add_manufacturer(manufacturer)
+            for aircraft in entry.get('aircraft', []):
+                stats.add_aircraft(manufacturer, aircraft)
+        return stats
+
+    def for_manufacturer(self, manufacturer: str) -> ManufacturerStats:
+        """Stats for a manufacturer (empty stats if it has no aircraft)."""
+        return self.manufacturers.get(manufacturer) or ManufacturerStats()
+
+    def add_manufacturer(self, manufacturer: str):
+        self.manufacturers.setdefault(manufacturer, ManufacturerStats())
+
+    def add_aircraft(self, manufacturer: str, aircraft: dict):
+        self.manufacturers.setdefault(manufacturer, ManufacturerStats()).add(aircraft)
+        self.overall.add(aircraft)
+
+    def remove_aircraft(self, manufacturer: str, aircraft: dict):
+        self.manufacturers[manufacturer].remove(aircraft)
+        self.overall.remove(aircraft)
+
+    def update_aircraft(self, manufacturer: str, old: dict, new: dict):
+        self.manufacturers[manufacturer].update(old, new)
+        self.overall.update(old, new)
+
+    def updated(self, old_data: dict, new_data: dict) -> 'DatabaseStats':
+        """Stats for ``new_data``, given that these are the stats of ``old_data``.
+
+        Neither these stats nor their ManufacturerStats are modified: those
+        of unchanged manufacturers are shared with the result, which is safe
+        because snapshot stats are never mutated once built.
+        """
+        stats = DatabaseStats()
+        stats.overall = self.overall.copy()
+        old_manufacturers = old_data.get('manufacturers', {})
+        new_manufacturers = new_data.get('manufacturers', {})
+        for manufacturer, entry in new_manufacturers.items():
+            new_list = entry.get('aircraft', [])
+            old_entry = old_manufacturers.get(manufacturer)
+            old_list = old_entry.get('aircraft', []) if old_entry is not None else []
+            previous = self.manufacturers.get(manufacturer) if old_entry is not None else None
+            if previous is not None and old_list == new_list:
+                stats.manufacturers[manufacturer] = previous
+                continue
+            stats.manufacturers[manufacturer] = previous.copy() if previous is not None else ManufacturerStats()
+            for old, new in _record_changes(old_list, new_list):
+                if old is None:
+                    stats.add_aircraft(manufacturer, new)
+                elif new is None:
+                    stats.remove_aircraft(manufacturer, old)
+                else:
+                    stats.update_aircraft(manufacturer, old, new)
+        for manufacturer, entry in old_manufacturers.items():
+            if manufacturer not in new_manufacturers:
+                for aircraft in entry.get('aircraft', []):
+                    stats.overall.remove(aircraft)
+        return stats
+
+    def copy(self) -> 'DatabaseStats':
+        clone = DatabaseStats()
+        clone.manufacturers = {name: s.copy() for name, s in self.manufacturers.items()}
+        clone.overall = self.overall.copy()
+        return clone
+
+    def to_state(self) -> dict:
+        """JSON-serializable counters, e.g. for storing in a binary snapshot."""
+        return {
+            'manufacturers': [[name, s.to_state()] for name, s in self.manufacturers.items()],
+            'overall': self.overall.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'DatabaseStats':
+        stats = cls()
+        stats.manufacturers = {name: ManufacturerStats.from_state(s) for name, s in state['manufacturers']}
+        stats.overall = ManufacturerStats.from_state(state['overall'])
+        return stats
+
+    def to_dict(self) -> dict:
+        overall = self.overall.to_dict()
+        overall['manufacturers'] = len(self.manufacturers)
+        return {
+            'overall': overall,
+            'manufacturers': {name: s.to_dict() for name, s in self.manufacturers.items()},
+        }
+
+
+def _record_changes(old_list, new_list):
+    """``(old, new)`` pairs for records added (old None), removed (new None) or edited.
+
+    Records are paired by designation, in list order when a designation
+    repeats; equal pairs are skipped.
+    """
+    pool = {}
+    for aircraft in old_list:
+        pool.setdefault(aircraft.get('designation'), []).append(aircraft)
+    for aircraft in new_list:
+        candidates = pool.get(aircraft.get('designation'))
+        if candidates:
+            old = candidates.pop(0)
+            if old != aircraft:
+                yield old, aircraft
+        else:
+            yield None, aircraft
+    for remaining in pool.values():
+        for aircraft in remaining:
+            yield aircraft, None
@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Characters of a deferred field kept in memory, enough for the snippet the
+# manufacturer page shows (description[:150]) without touching the disk
+PREVIEW_CHARS = 160
+
+_WHITESPACE = b' \t\r\n'
+_decoder = json.JSONDecoder()
+
+
+class _Scanner:
+    """Pull JSON values out of a binary file one at a time.
+
+    Only the part of the document currently being parsed is kept in memory.
+    Windows are decoded as latin-1 so character positions equal byte
+    offsets (JSON structure is pure ASCII and UTF-8 continuation bytes are
+    never ASCII); values that contain non-ASCII bytes are re-parsed as UTF-8.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.pos = 0
+        self.base = 0  # file offset of buf[0]
+        self.eof = False
+        self.window = 4096
+
+    def _fill(self):
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return
+        if self.pos:
+            self.base += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += data
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return chr(self.buf[self.pos])
+            if self.eof:
+                return ''
+            self._fill()
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at byte {self.base + self.pos}, found '{found or 'EOF'}'")
+        self.pos += 1
+
+    def value(self):
+        """Parse the next complete value; returns ``(value, offset, length)``."""
+        self.peek()
+        window = self.window
+        while True:
+            while len(self.buf) - self.pos < window and not self.eof:
+                self._fill()
+            chunk = self.buf[self.pos:self.pos + window]
+            complete = self.eof and self.pos + window >= len(self.buf)
+            try:
+                value, end = _decoder.raw_decode(chunk.decode('latin-1'))
+            except json.JSONDecodeError as e:
+                if complete:
+                    raise ValueError(f"Invalid JSON near byte {self.base + self.pos + e.pos}: {e.msg}")
+                window *= 2
+                continue
+            # A number cut off by the window end still decodes, so require the
+            # value to be followed by something unless the file has ended
+            if end == len(chunk) and not complete:
+                window *= 2
+                continue
+            span = chunk[:end]
+            if not span.isascii():
+                value = json.loads(span)
+            offset = self.base + self.pos
+            self.pos += end
+            self.window = max(4096, end * 2)
+            return value, offset, end
+
+    def members(self):
+        """Iterate the keys of an object; the caller consumes each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key, _, _ = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def items(self):
+        """Iterate the elements of an array; the caller consumes each value."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+class DeferredText:
+    """A text field left on disk, loaded on first use.
+
+    Holds the byte range of the aircraft record the field belongs to and a
+    short preview. ``str()`` reads and parses just that record. If the file
+    has changed since it was streamed, the preview is returned instead of
+    reading a record from the wrong version.
+    """
+
+    __slots__ = ('path', 'offset', 'length', 'field', 'preview', 'size', '_stamp')
+
+    def __init__(self, path, offset, length, field, text, stamp):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.field = field
+        self.preview = text[:PREVIEW_CHARS]
+        self.size = len(text)
+        self._stamp = stamp
+
+    def load(self) -> str:
+        try:
+            stat = os.stat(self.path)
+            if (stat.st_mtime, stat.st_size) != self._stamp:
+                raise OSError('database file changed since it was loaded')
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                record = json.loads(f.read(self.length))
+            return record[self.field]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Cannot load deferred '{self.field}' at byte {self.offset}: {e}")
+            return self.preview
+
+    def __str__(self):
+        if self.size <= len(self.preview):
+            return self.preview
+        return self.load()
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __getitem__(self, key):
+        # Short slices (list page snippets) are answered from the preview
+        if isinstance(key, slice) and key.step is None and (key.start or 0) >= 0 \
+                and key.stop is not None and 0 <= key.stop <= len(self.preview):
+            return self.preview[key]
+        return str(self)[key]
+
+    def __eq__(self, other):
+        if isinstance(other, DeferredText):
+            other = str(other)
+        return str(self) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"DeferredText({self.field!r}, offset={self.offset}, size={self.size})"
+
+
+def stream_database(path, lazy_fields=(),
+                    on_manufacturer: Optional[Callable[[str], None]] = None,
+                    on_aircraft: Optional[Callable[[str, dict], None]] = None,
+                    chunk_size=CHUNK_SIZE) -> dict:
+    """Parse the database file record by record and return the document.
+
+    ``manufacturers.*.aircraft[*]`` records are decoded one at a time and
+    handed to ``on_aircraft(manufacturer, record)`` as soon as they are
+    parsed, so indexes can be built while the file is being read. Long
+    string fields named in ``lazy_fields`` are then replaced by DeferredText
+    references to their place in the file. Everything else is decoded as usual.
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime, stat.st_size)
+    data = {}
+    with open(path, 'rb') as f:
+        scanner = _Scanner(f, chunk_size)
+        for key in scanner.members():
+            if key == 'manufacturers' and scanner.peek() == '{':
+                data[key] = _stream_manufacturers(scanner, path, stamp, lazy_fields,
+                                                  on_manufacturer, on_aircraft)
+            else:
+                data[key] = scanner.value()[0]
+        if scanner.peek():
+            raise ValueError(f"Extra data after the database document at byte {scanner.base + scanner.pos}")
+    return data
+
+
+def _stream_manufacturers(scanner, path, stamp, lazy_fields, on_manufacturer, on_aircraft):
+    manufacturers = {}
+    for name in scanner.members():
+        if scanner.peek() != '{':
+            manufacturers[name] = scanner.value()[0]
+            continue
+        entry = manufacturers[name] = {}
+        if on_manufacturer is not None:
+            on_manufacturer(name)
+        for key in scanner.members():
+            if key != 'aircraft' or scanner.peek() != '[':
+                entry[key] = scanner.value()[0]
+                continue
+            aircraft_list = entry[key] = []
+            for _ in scanner.items():
+                record, offset, length = scanner.value()
+                aircraft_list.append(record)
+                # Callbacks see the full text (e.g. for search) before it is deferred
+                if on_aircraft is not None:
+                    on_aircraft(name, record)
+                if isinstance(record, dict):
+                    for field in lazy_fields:
+                        text = record.get(field)
+                        if isinstance(text, str) and len(text) > PREVIEW_CHARS:
+                            record[field] = DeferredText(path, offset, length, field, text, stamp)
+    return manufacturers
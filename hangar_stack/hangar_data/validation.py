@@ -0,0 +1,287 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import jsonschema
+from jsonschema.exceptions import best_match
+
+logger = logging.getLogger(__name__)
+
+# Content hashes remembered per schema in the stamp file
+MAX_STAMPED = 16
+
+# The only aircraft array keywords that document_shell plus per-record
+# checks reproduce; any other makes record_schema_pointers return None
+ARRAY_KEYWORDS = {'type', 'items'}
+
+# Compiled validators by (schema sha256, subschema pointer)
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+class ValidationReport(NamedTuple):
+    content_hash: Optional[str]
+    schema_hash: str
+    records: int
+    checked: int
+    cached: bool
+    elapsed_ms: float
+
+
+def schema_hash(schema) -> str:
+    """sha256 of a schema given as raw bytes or as a parsed document."""
+    if not isinstance(schema, bytes):
+        schema = json.dumps(schema, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(schema).hexdigest()
+
+
+def compile_validator(schema: dict, digest: Optional[str] = None, pointer=()):
+    """Return a validator for ``schema`` (or the subschema at ``pointer``), compiled once per schema hash.
+
+    The schema itself is checked against its metaschema only the first
+    time it is compiled, which is most of what ``jsonschema.validate``
+    repeats on every call.
+    """
+    digest = digest or schema_hash(schema)
+    key = (digest, tuple(pointer))
+    with _compiled_lock:
+        validator = _compiled.get(key)
+        if validator is None:
+            cls = jsonschema.validators.validator_for(schema)
+            if not pointer:
+                cls.check_schema(schema)
+            subschema = schema
+            for part in pointer:
+                subschema = subschema[part]
+            validator = _compiled[key] = cls(subschema)
+        return validator
+
+
+def default_stamp_path(source_path) -> str:
+    """``data/aircraft_database.json`` -> ``data/aircraft_database.validated``."""
+    return os.path.splitext(str(source_path))[0] + '.validated'
+
+
+def record_schema_pointers(schema) -> Optional[List[tuple]]:
+    """Pointers to the aircraft item schema for each manufacturer name pattern.
+
+    Returns None when records cannot be validated on their own: the schema
+    does not have the manufacturers -> aircraft -> items shape, uses $ref
+    (which resolves against the root document), or constrains the aircraft
+    array itself with more than ``type`` and ``items`` (minItems,
+    uniqueItems, contains, ...), which an emptied or per-record check
+    would not see.
+    """
+    manufacturers = schema.get('properties', {}).get('manufacturers')
+    if not isinstance(manufacturers, dict) or 'properties' in manufacturers:
+        return None
+    entries = [(pattern, ('properties', 'manufacturers', 'patternProperties', pattern))
+               for pattern in manufacturers.get('patternProperties', {})]
+    if isinstance(manufacturers.get('additionalProperties'), dict):
+        entries.append((None, ('properties', 'manufacturers', 'additionalProperties')))
+    result = []
+    for pattern, pointer in entries:
+        entry = manufacturers
+        for part in pointer[2:]:
+            entry = entry[part]
+        array = entry.get('properties', {}).get('aircraft', {})
+        items = array.get('items')
+        if not isinstance(items, dict) or '"$ref"' in json.dumps(items) or set(array) - ARRAY_KEYWORDS:
+            return None
+        result.append((pattern, pointer + ('properties', 'aircraft', 'items')))
+    return result or None
+
+
+def record_validators(schema: dict, digest: str, pointers, manufacturer: str) -> List[tuple]:
+    """``(pointer, validator)`` pairs that apply to an aircraft of ``manufacturer``."""
+    matched = [pointer for pattern, pointer in pointers
+               if pattern is not None and re.search(pattern, manufacturer)]
+    if not matched:
+        matched = [pointer for pattern, pointer in pointers if pattern is None]
+    return [(pointer, compile_validator(schema, digest, pointer)) for pointer in matched]
+
+
+def document_shell(data: dict) -> dict:
+    """``data`` with every aircraft list emptied, for validating everything but the records.
+
+    Only sound for schemas that record_schema_pointers accepts.
+    """
+    shell = dict(data)
+    manufacturers = data.get('manufacturers')
+    if isinstance(manufacturers, dict):
+        shell['manufacturers'] = {
+            name: dict(entry, aircraft=[]) if isinstance(entry, dict) and isinstance(entry.get('aircraft'), list)
+            else entry
+            for name, entry in manufacturers.items()
+        }
+    return shell
+
+
+def locate(error, manufacturer, index, pointer):
+    """Make a record-level ValidationError point into the whole document."""
+    error.path.extendleft(reversed(('manufacturers', manufacturer, 'aircraft', index)))
+    error.relative_schema_path.extendleft(reversed(pointer))
+    return error
+
+
+def _record_digest(manufacturer, aircraft) -> str:
+    blob = json.dumps(aircraft, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(f"{manufacturer}\0{blob}".encode('utf-8')).hexdigest()
+
+
+class DatabaseValidator:
+    """Schema validation for the aircraft database that avoids repeat work.
+
+    - The schema is compiled once per schema hash (see compile_validator).
+    - A document whose content hash was already validated against this
+      schema is not looked at again; with ``stamp_path`` those hashes are
+      kept on disk so the next process can skip validation too.
+    - Otherwise the document is validated without its aircraft lists, and
+      only aircraft records that were not part of the last validated
+      document are checked against the record schema.
+
+    ``validate()`` raises the same ``jsonschema.ValidationError`` as a full
+    validation, with the path pointing into the whole document.
+    """
+
+    def __init__(self, schema_path, stamp_path=None):
+        self.schema_path = str(schema_path)
+        self.stamp_path = stamp_path
+        with open(self.schema_path, 'rb') as f:
+            raw = f.read()
+        self.schema = json.loads(raw)
+        self.schema_hash = schema_hash(raw)
+        self._validator = compile_validator(self.schema, self.schema_hash)
+        self._record_pointers = record_schema_pointers(self.schema)
+        self._record_validators: Dict[str, list] = {}
+        self._record_digests = set()
+        self._validated: List[str] = self._read_stamp()
+        self._lock = threading.Lock()
+        self.last_report: Optional[ValidationReport] = None
+
+    def is_validated(self, content_hash) -> bool:
+        return content_hash in self._validated
+
+    def mark_validated(self, content_hash, records=0) -> ValidationReport:
+        """Record that ``content_hash`` is known to be valid (e.g. a snapshot validated at build time).
+
+        Returns the report validate() would give for it, without needing the
+        document; ``records`` is only reported.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._remember(content_hash)
+            return self._report(content_hash, records, 0, True, start)
+
+    def validate(self, data: dict, content_hash: Optional[str] = None) -> ValidationReport:
+        """Validate ``data``; raises ``jsonschema.ValidationError`` on the first error."""
+        start = time.perf_counter()
+        with self._lock:
+            records = sum(len(entry.get('aircraft', []))
+                          for entry in data.get('manufacturers', {}).values()
+                          if isinstance(entry, dict) and isinstance(entry.get('aircraft'), list))
+            if content_hash is not None and content_hash in self._validated:
+                report = self._report(content_hash, records, 0, True, start)
+                logger.info(f"Database sha256 {content_hash[:12]} already validated against "
+                            f"schema {self.schema_hash[:12]}; skipped {records} aircraft")
+                return report
+
+            if self._record_pointers is None:
+                self._raise_first(self._validator, data)
+                checked = records
+            else:
+                checked = self._validate_incremental(data)
+            if content_hash is not None:
+                self._remember(content_hash)
+            report = self._report(content_hash, records, checked, False, start)
+        logger.info(f"Validated {checked} of {records} aircraft against schema "
+                    f"{self.schema_hash[:12]} in {report.elapsed_ms:.1f} ms")
+        return report
+
+    def _validate_incremental(self, data) -> int:
+        # Everything but the aircraft records, which are checked one by one
+        self._raise_first(self._validator, document_shell(data))
+        manufacturers = data.get('manufacturers')
+
+        digests = set()
+        checked = 0
+        for manufacturer, entry in (manufacturers or {}).items():
+            aircraft_list = entry.get('aircraft') if isinstance(entry, dict) else None
+            if not isinstance(aircraft_list, list):
+                continue
+            validators = self._validators_for(manufacturer)
+            for i, aircraft in enumerate(aircraft_list):
+                digest = _record_digest(manufacturer, aircraft)
+                digests.add(digest)
+                if digest in self._record_digests:
+                    continue
+                checked += 1
+                for pointer, validator in validators:
+                    error = best_match(validator.iter_errors(aircraft))
+                    if error is not None:
+                        raise locate(error, manufacturer, i, pointer)
+        # Only the records of the document that just passed are kept
+        self._record_digests = digests
+        return checked
+
+    def _validators_for(self, manufacturer):
+        validators = self._record_validators.get(manufacturer)
+        if validators is None:
+            validators = self._record_validators[manufacturer] = record_validators(
+                self.schema, self.schema_hash, self._record_pointers, manufacturer)
+        return validators
+
+    @staticmethod
+    def _raise_first(validator, instance):
+        error = best_match(validator.iter_errors(instance))
+        if error is not None:
+            raise error
+
+    def _report(self, content_hash, records, checked, cached, start):
+        self.last_report = ValidationReport(content_hash=content_hash,
+                                            schema_hash=self.schema_hash,
+                                            records=records,
+                                            checked=checked,
+                                            cached=cached,
+                                            elapsed_ms=(time.perf_counter() - start) * 1000)
+        return self.last_report
+
+    def _remember(self, content_hash):
+        if content_hash in self._validated:
+            return
+        self._validated = (self._validated + [content_hash])[-MAX_STAMPED:]
+        self._write_stamp()
+
+    def _read_stamp(self) -> List[str]:
+        if not self.stamp_path or not os.path.exists(self.stamp_path):
+            return []
+        try:
+            with open(self.stamp_path) as f:
+                stamp = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable validation stamp {self.stamp_path}: {e}")
+            return []
+        if not isinstance(stamp, dict) or stamp.get('schema') != self.schema_hash:
+            return []
+        return [h for h in stamp.get('content', []) if isinstance(h, str)][-MAX_STAMPED:]
+
+    def _write_stamp(self):
+        if not self.stamp_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.stamp_path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.validated-', dir=directory)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'schema': self.schema_hash, 'content': self._validated}, f)
+            os.replace(tmp_path, self.stamp_path)
+        except OSError as e:
+            logger.warning(f"Cannot write validation stamp {self.stamp_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
@@ -0,0 +1,166 @@
+import logging
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+INLINE = 'inline'
+THREAD = 'thread'
+PROCESS = 'process'
+EXECUTORS = (INLINE, THREAD, PROCESS)
+
+
+def run_handlers(handlers, events):
+    """Group ``events`` by event_type (keeping their order) and call each type's handler once.
+
+    Events without a handler are skipped, like process_message() does.
+    Returns the number of events handed to a handler. Handler exceptions
+    propagate so the batch is not committed.
+    """
+    by_type = {}
+    for event in events:
+        by_type.setdefault(event.get('event_type'), []).append(event)
+    handled = 0
+    for event_type, group in by_type.items():
+        handler = handlers.get(event_type)
+        if handler is not None:
+            handler(group)
+            handled += len(group)
+    return handled
+
+
+def lane_for(key, lanes):
+    """Stable lane number for a message key (bytes, str or int)"""
+    if isinstance(key, int):
+        return key % lanes
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return zlib.crc32(key) % lanes
+
+
+class KeyedExecutor:
+    """Runs work on ``workers`` single-worker lanes, one lane per key hash.
+
+    Everything submitted for the same key goes to the same lane, and a lane
+    runs its tasks one at a time in submission order, so per-key ordering
+    holds within and across batches while different keys run in parallel.
+    ``kind`` is ``thread`` or ``process`` (functions and arguments must then
+    be picklable), or ``inline`` to run in the caller.
+    """
+
+    def __init__(self, workers=1, kind=THREAD):
+        if kind not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{kind}', expected one of {', '.join(EXECUTORS)}")
+        self.kind = kind
+        self.workers = 1 if kind == INLINE else max(1, workers)
+        pool = ProcessPoolExecutor if kind == PROCESS else ThreadPoolExecutor
+        self._lanes = [] if kind == INLINE else [pool(max_workers=1) for _ in range(self.workers)]
+
+    def submit(self, key, fn, *args):
+        if self.kind == INLINE:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        return self._lanes[lane_for(key, self.workers)].submit(fn, *args)
+
+    def shutdown(self, wait=True):
+        for lane in self._lanes:
+            lane.shutdown(wait=wait)
+
+
+class InFlightBatch:
+    """The futures of one polled batch and the offsets to commit once they all finish"""
+
+    def __init__(self, futures, offsets, size):
+        self.futures = futures
+        self.offsets = offsets
+        self.size = size
+
+    def done(self):
+        return all(f.done() for f in self.futures)
+
+    def result(self):
+        """Wait for every lane of the batch; re-raises the first handler error"""
+        wait(self.futures)
+        return sum(f.result() for f in self.futures)
+
+
+class BatchPipeline:
+    """Dispatches polled batches to a KeyedExecutor and commits them in order.
+
+    At most ``max_in_flight`` batches are submitted but not yet committed:
+    submit() waits for the oldest before accepting another, which bounds the
+    memory held by queued records. Offsets are committed strictly in poll
+    order and only after every handler of the batch has returned, so a crash
+    or handler error redelivers the uncommitted batches (at-least-once).
+    """
+
+    def __init__(self, handlers, commit, executor, max_in_flight=2):
+        self.handlers = handlers
+        self.commit = commit
+        self.executor = executor
+        self.max_in_flight = max(1, max_in_flight)
+        self.logger = logging.getLogger(__name__)
+        self._in_flight = deque()
+        self.batches = 0
+        self.records = 0
+        self.handled = 0
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def submit(self, records):
+        """Dispatch a poll() result ({TopicPartition: [ConsumerRecord]}); returns records submitted"""
+        while len(self._in_flight) >= self.max_in_flight:
+            self._complete_oldest()
+        lanes = {}
+        offsets = {}
+        count = 0
+        for tp, messages in records.items():
+            if not messages:
+                continue
+            for message in messages:
+                key = message.key if message.key is not None else tp.partition
+                lanes.setdefault(lane_for(key, self.executor.workers), []).append(message.value)
+            offsets[tp] = messages[-1].offset + 1
+            count += len(messages)
+        if not count:
+            return 0
+        futures = [self.executor.submit(lane, run_handlers, self.handlers, events)
+                   for lane, events in lanes.items()]
+        self._in_flight.append(InFlightBatch(futures, offsets, count))
+        self.records += count
+        self.commit_finished()
+        return count
+
+    def commit_finished(self):
+        """Commit leading batches that have already finished, without waiting"""
+        while self._in_flight and self._in_flight[0].done():
+            self._complete_oldest()
+
+    def drain(self):
+        """Wait for and commit every batch still in flight"""
+        while self._in_flight:
+            self._complete_oldest()
+
+    def _complete_oldest(self):
+        batch = self._in_flight[0]
+        self.handled += batch.result()
+        self._in_flight.popleft()
+        self.commit(batch.offsets)
+        self.batches += 1
+
+    def discard(self):
+        """Forget in-flight batches without committing them (after a handler error)"""
+        self._in_flight.clear()
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'records': self.records,
+            'handled': self.handled,
+            'in_flight': len(self._in_flight),
+        }
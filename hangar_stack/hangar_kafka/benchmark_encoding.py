@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Event Encoding Benchmark for HangarStack
+
+Compares the JSON and binary event encodings (encoding.py) on a synthetic
+mix of tracking events built by the same EventTracker methods the web app
+uses: bytes per event, bytes per event inside a compressed Kafka record
+batch, and encode/decode throughput.
+
+Usage:
+  python -m hangar_stack.hangar_kafka.benchmark_encoding
+  python -m hangar_stack.hangar_kafka.benchmark_encoding --events 200000 --codec zstd
+"""
+
+import argparse
+import json
+import random
+import time
+from kafka.record.memory_records import MemoryRecordsBuilder
+from hangar_stack.hangar_kafka.benchmark_producer import CODEC_IDS, load_designations
+from hangar_stack.hangar_kafka.encoding import ENCODINGS, decode_event, event_serializer
+from hangar_stack.hangar_kafka.events import EventTracker
+from hangar_stack.hangar_kafka.kafka_producer import resolve_compression
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) HangarStackBench/1.0'
+QUERIES = ['stealth', 'fighter', 'boeing', 'bomber', 'mach 2', 'lockheed', 'tanker', 'trainer']
+
+
+class EventRecorder(EventTracker):
+    """Collects (key, event) pairs instead of sending them"""
+
+    def __init__(self):
+        self.events = []
+
+    def _send_message(self, topic, message, key=None):
+        self.events.append((key, message))
+
+
+def make_events(count, seed=42):
+    """Mixed tracking events, mostly aircraft views as on the live site"""
+    rng = random.Random(seed)
+    designations = load_designations()
+    recorder = EventRecorder()
+    for _ in range(count):
+        ip = f"10.0.{rng.randrange(256)}.{rng.randrange(256)}"
+        kind = rng.random()
+        if kind < 0.7:
+            recorder.send_aircraft_view(rng.choice(designations), ip, USER_AGENT)
+        elif kind < 0.85:
+            recorder.send_search_query(rng.choice(QUERIES), {'status': 'active'}, ip)
+        elif kind < 0.97:
+            recorder.send_user_activity('page_view', {'page': '/aircraft'}, ip)
+        else:
+            recorder.send_data_update('aircraft', rng.choice(designations), {'status': 'retired'})
+    return recorder.events
+
+
+def batch_bytes(values, codec, batch_size=256 * 1024):
+    """Bytes on the wire when ``values`` are packed into compressed record batches"""
+    total = 0
+    batch = None
+    for value in values:
+        if batch is None:
+            batch = MemoryRecordsBuilder(magic=2, compression_type=CODEC_IDS[codec], batch_size=batch_size)
+        if batch.append(0, None, value) is None:
+            batch.close()
+            total += batch.size_in_bytes()
+            batch = MemoryRecordsBuilder(magic=2, compression_type=CODEC_IDS[codec], batch_size=batch_size)
+            batch.append(0, None, value)
+    if batch is not None:
+        batch.close()
+        total += batch.size_in_bytes()
+    return total
+
+
+def run(encoding, events, codec):
+    serialize = event_serializer(encoding)
+    start = time.perf_counter()
+    values = [serialize(event) for _, event in events]
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = [decode_event(value) for value in values]
+    decode_s = time.perf_counter() - start
+    if decoded != [event for _, event in events]:
+        raise AssertionError(f"{encoding} encoding did not round-trip")
+
+    count = len(events)
+    return {
+        'encoding': encoding,
+        'events': count,
+        'bytes_per_event': sum(map(len, values)) / count,
+        'batch_bytes_per_event': batch_bytes(values, codec) / count,
+        'encode_per_sec': count / encode_s,
+        'decode_per_sec': count / decode_s,
+    }
+
+
+def print_report(results, codec):
+    print(f"\nEvent encoding benchmark ({results[0]['events']:,} mixed events, {codec or 'no'} compression)")
+    print("=" * 72)
+    print(f"{'encoding':<10}{'bytes/evt':>11}{'batched':>10}{'encode/s':>14}{'decode/s':>14}")
+    print("-" * 72)
+    for r in results:
+        print(f"{r['encoding']:<10}{r['bytes_per_event']:>11.1f}{r['batch_bytes_per_event']:>10.1f}"
+              f"{r['encode_per_sec']:>14,.0f}{r['decode_per_sec']:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HangarStack event encodings")
+    parser.add_argument('--events', type=int, default=100000, help="events per encoding")
+    parser.add_argument('--codec', default='gzip', choices=[c or 'none' for c in CODEC_IDS],
+                        help="record batch compression for the 'batched' column")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    codec = None if args.codec == 'none' else resolve_compression(args.codec)
+    events = make_events(args.events)
+    results = [run(encoding, events, codec) for encoding in ENCODINGS]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, codec)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Event Pipeline Load Benchmark for HangarStack
+
+Drives synthetic aircraft view and search traffic through
+HangarStackProducer at a target rate from several threads, with a
+HangarStackConsumer group consuming in batches alongside, and reports:
+
+- produce latency: time spent in send_aircraft_view()/send_search_query(),
+  i.e. what a web request pays for tracking
+- end-to-end latency: event timestamp to the consumer's batch handler
+- consumer lag (uncommitted records) sampled over time
+- with --find-max, the highest rate the pipeline sustains: the rate is
+  doubled each stage until producers fall behind, events are dropped or
+  the consumer lag keeps growing
+
+Designations come from the aircraft database and are drawn uniformly or
+from a Zipf distribution (a few popular aircraft get most views).
+
+By default it runs against the in-process MemoryBroker. Use --broker to
+load a local cluster at KAFKA_BOOTSTRAP_SERVERS instead; each run then
+consumes with a fresh group from the earliest offset, so older records on
+the topics show up as initial lag.
+
+Usage:
+  python -m hangar_stack.hangar_kafka.benchmark_pipeline
+  python -m hangar_stack.hangar_kafka.benchmark_pipeline --rate 5000 --keys zipf --producers 4 --consumers 2
+  python -m hangar_stack.hangar_kafka.benchmark_pipeline --find-max --duration 5
+  python -m hangar_stack.hangar_kafka.benchmark_pipeline --broker --rate 2000
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from kafka import KafkaConsumer
+from kafka.structs import TopicPartition
+from hangar_stack.hangar_kafka.benchmark_encoding import QUERIES
+from hangar_stack.hangar_kafka.benchmark_producer import load_designations, percentile
+from hangar_stack.hangar_kafka.kafka_config import KAFKA_CONFIG, TOPICS
+from hangar_stack.hangar_kafka.kafka_consumer import HangarStackConsumer
+from hangar_stack.hangar_kafka.kafka_producer import HangarStackProducer
+from hangar_stack.hangar_kafka.memory_broker import MemoryBroker
+from hangar_stack.hangar_kafka.view_counts import event_time
+
+BENCH_TOPICS = [TOPICS['aircraft_views'], TOPICS['search_queries']]
+
+
+class KeySampler:
+    """Draws designations uniformly or with Zipf weights 1 / rank**s"""
+
+    def __init__(self, designations, distribution='uniform', zipf_s=1.1, seed=42):
+        self.designations = list(designations)
+        self.rng = random.Random(seed)
+        self.cum_weights = None
+        if distribution == 'zipf':
+            self.rng.shuffle(self.designations)
+            self.cum_weights = list(itertools.accumulate(1.0 / rank ** zipf_s
+                                                         for rank in range(1, len(self.designations) + 1)))
+        elif distribution != 'uniform':
+            raise ValueError(f"Unknown key distribution '{distribution}', expected uniform or zipf")
+
+    def sample(self, count):
+        return self.rng.choices(self.designations, cum_weights=self.cum_weights, k=count)
+
+
+class LagProbe:
+    """Uncommitted records of a consumer group, read with a client of its own"""
+
+    def __init__(self, transport, group_id, topics):
+        if transport is not None:
+            self.client = transport.consumer(group_id=group_id, enable_auto_commit=False)
+        else:
+            self.client = KafkaConsumer(bootstrap_servers=KAFKA_CONFIG['bootstrap_servers'],
+                                        group_id=group_id, enable_auto_commit=False)
+        self.partitions = [TopicPartition(topic, p) for topic in topics
+                           for p in sorted(self.client.partitions_for_topic(topic) or ())]
+        self.start = self.client.beginning_offsets(self.partitions)
+
+    def end_total(self):
+        return sum(self.client.end_offsets(self.partitions).values())
+
+    def lag(self):
+        end = self.client.end_offsets(self.partitions)
+        return sum(end[tp] - (self.client.committed(tp) or self.start[tp]) for tp in self.partitions)
+
+    def close(self):
+        self.client.close()
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.values = []
+        self._lock = threading.Lock()
+
+    def extend(self, values):
+        with self._lock:
+            self.values.extend(values)
+
+    def summary(self):
+        values = sorted(self.values)
+        return {f"p{pct}_ms": percentile(values, pct) * 1000 for pct in (50, 95, 99)}
+
+
+def produce(producer, sampler, rate, duration, search_ratio, marker, latencies, seed):
+    """Send at ``rate`` events/sec for ``duration`` seconds (open loop: late sends are not skipped)"""
+    rng = random.Random(seed)
+    interval = 1.0 / rate
+    total = int(rate * duration)
+    keys = sampler.sample(total)
+    samples = []
+    started = time.perf_counter()
+    for n in range(total):
+        due = started + n * interval
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        before = time.perf_counter()
+        # The marker tags this run's events: as user agent of views, as IP of searches
+        if rng.random() < search_ratio:
+            producer.send_search_query(rng.choice(QUERIES), {}, marker)
+        else:
+            producer.send_aircraft_view(keys[n], '10.0.0.1', marker)
+        samples.append(time.perf_counter() - before)
+    latencies.extend(samples)
+    return total, time.perf_counter() - started
+
+
+def run_stage(rate, duration, producers=1, consumers=1, distribution='uniform', zipf_s=1.1,
+              search_ratio=0.1, partitions=6, tracking_mode=None, broker=False, sample_interval=0.5,
+              drain_timeout=30.0, seed=42):
+    """One load run at ``rate`` events/sec; returns a result dict"""
+    transport = None if broker else MemoryBroker(partitions=partitions)
+    group_id = f"hangarstack-bench-{uuid.uuid4().hex[:8]}"
+    marker = f"HangarStackBench/{group_id}"
+    sampler = KeySampler(load_designations(), distribution, zipf_s, seed)
+    producer = HangarStackProducer(tracking_mode=tracking_mode, transport=transport)
+    for topic in BENCH_TOPICS:
+        if transport is not None:
+            transport.create_topic(topic)
+    probe = LagProbe(transport, group_id, BENCH_TOPICS)
+    baseline = probe.end_total()
+
+    send_latencies = LatencyRecorder()
+    e2e_latencies = LatencyRecorder()
+
+    def measured(handle):
+        def handle_batch(events):
+            now = time.time()
+            # Only this run's events count (a real cluster may hold older ones)
+            e2e_latencies.extend([now - event_time(e, now) for e in events
+                                  if marker in (e.get('user_agent'), e.get('user_ip'))])
+            if handle is not None:
+                handle(events)
+        return handle_batch
+
+    group = []
+    threads = []
+    for _ in range(consumers):
+        consumer = HangarStackConsumer(BENCH_TOPICS, group_id=group_id, enable_auto_commit=False,
+                                       transport=transport)
+        defaults = consumer.batch_handlers()
+        handlers = {event_type: measured(defaults.get(event_type)) for event_type in ('aircraft_view', 'search_query')}
+        thread = threading.Thread(target=consumer.consume_batches, name='bench-consumer',
+                                  kwargs={'handlers': handlers, 'timeout_ms': 100}, daemon=True)
+        group.append(consumer)
+        threads.append(thread)
+        thread.start()
+
+    lag_samples = []
+    sampling = threading.Event()
+    started = time.perf_counter()
+
+    def sample_lag():
+        while not sampling.wait(sample_interval):
+            lag_samples.append((time.perf_counter() - started, probe.lag()))
+
+    sampler_thread = threading.Thread(target=sample_lag, name='bench-lag', daemon=True)
+    sampler_thread.start()
+
+    results = []
+    producer_threads = [threading.Thread(
+        target=lambda i=i: results.append(produce(producer, KeySampler(sampler.designations, distribution, zipf_s,
+                                                                       seed + i),
+                                                  rate / producers, duration, search_ratio, marker,
+                                                  send_latencies, seed + i)),
+        name='bench-producer') for i in range(producers)]
+    for thread in producer_threads:
+        thread.start()
+    for thread in producer_threads:
+        thread.join()
+    produce_seconds = time.perf_counter() - started
+    lag_at_end = probe.lag()
+    producer.close()
+
+    attempted = sum(total for total, _ in results)
+    delivered = probe.end_total() - baseline
+    deadline = time.monotonic() + drain_timeout
+    while len(e2e_latencies.values) < delivered and time.monotonic() < deadline:
+        time.sleep(0.05)
+    for consumer in group:
+        consumer.stop()
+    for thread in threads:
+        thread.join(10)
+    sampling.set()
+    sampler_thread.join()
+    elapsed = time.perf_counter() - started
+    probe.close()
+
+    return {
+        'target_rate': rate,
+        'producers': producers,
+        'consumers': consumers,
+        'keys': distribution,
+        'attempted': attempted,
+        'delivered': delivered,
+        'consumed': len(e2e_latencies.values),
+        'dropped': attempted - delivered,
+        'produce_rate': attempted / produce_seconds,
+        'consume_rate': len(e2e_latencies.values) / elapsed,
+        'send': send_latencies.summary(),
+        'e2e': e2e_latencies.summary(),
+        'lag_at_end': lag_at_end,
+        'max_lag': max((lag for _, lag in lag_samples), default=0),
+        'lag_samples': [(round(t, 2), lag) for t, lag in lag_samples],
+        'drain_seconds': round(elapsed - produce_seconds, 2),
+    }
+
+
+def sustainable(result):
+    """Producers kept the pace, nothing was lost and the consumers kept up (lag within ~1s of traffic)"""
+    return (result['produce_rate'] >= 0.95 * result['target_rate']
+            and result['dropped'] == 0
+            and result['consumed'] == result['delivered']
+            and result['lag_at_end'] <= max(result['target_rate'], 1) * 1.0)
+
+
+def find_max(rate, duration, max_stages=10, **options):
+    """Double the rate until a stage is not sustainable; returns (stages, best sustained rate)"""
+    stages = []
+    best = None
+    for _ in range(max_stages):
+        result = run_stage(rate, duration, **options)
+        result['sustained'] = sustainable(result)
+        stages.append(result)
+        if not result['sustained']:
+            break
+        best = rate
+        rate *= 2
+    return stages, best
+
+
+def print_report(results, best=None):
+    print("\nEvent pipeline benchmark")
+    print("=" * 118)
+    print(f"{'target/s':>10}{'produced/s':>12}{'consumed/s':>12}{'dropped':>9}"
+          f"{'send p50':>10}{'p99 ms':>8}{'e2e p50':>10}{'p95':>8}{'p99 ms':>8}{'max lag':>9}{'end lag':>9}  ok")
+    print("-" * 118)
+    for r in results:
+        ok = '' if 'sustained' not in r else ('yes' if r['sustained'] else 'no')
+        print(f"{r['target_rate']:>10,.0f}{r['produce_rate']:>12,.0f}{r['consume_rate']:>12,.0f}{r['dropped']:>9}"
+              f"{r['send']['p50_ms']:>10.3f}{r['send']['p99_ms']:>8.3f}"
+              f"{r['e2e']['p50_ms']:>10.1f}{r['e2e']['p95_ms']:>8.1f}{r['e2e']['p99_ms']:>8.1f}"
+              f"{r['max_lag']:>9}{r['lag_at_end']:>9}  {ok}")
+    last = results[-1]
+    if last['lag_samples']:
+        print("\nConsumer lag over time (last run): " +
+              ", ".join(f"{t:.1f}s={lag}" for t, lag in last['lag_samples']))
+    if best is not None or any('sustained' in r for r in results):
+        print(f"\nMax sustainable throughput: {best:,.0f} events/s" if best else
+              "\nNo stage was sustainable; lower --rate")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the HangarStack event pipeline")
+    parser.add_argument('--rate', type=float, default=2000.0, help="target events/sec (first stage with --find-max)")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds of traffic per run")
+    parser.add_argument('--producers', type=int, default=2, help="threads sending through one producer")
+    parser.add_argument('--consumers', type=int, default=1, help="consumers in the group")
+    parser.add_argument('--keys', choices=['uniform', 'zipf'], default='uniform',
+                        help="designation distribution of aircraft views")
+    parser.add_argument('--zipf-s', type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument('--search-ratio', type=float, default=0.1, help="share of search query events")
+    parser.add_argument('--partitions', type=int, default=6, help="partitions per topic (stand-in only)")
+    parser.add_argument('--tracking-mode', choices=['async', 'sync'], default=None,
+                        help="producer tracking mode (default: KAFKA_TRACKING_MODE)")
+    parser.add_argument('--find-max', action='store_true', help="double the rate until it is not sustainable")
+    parser.add_argument('--broker', action='store_true',
+                        help="load KAFKA_BOOTSTRAP_SERVERS instead of the in-process stand-in")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    options = dict(producers=args.producers, consumers=args.consumers, distribution=args.keys, zipf_s=args.zipf_s,
+                   search_ratio=args.search_ratio, partitions=args.partitions, tracking_mode=args.tracking_mode,
+                   broker=args.broker)
+    best = None
+    if args.find_max:
+        results, best = find_max(args.rate, args.duration, **options)
+    else:
+        results = [run_stage(args.rate, args.duration, **options)]
+
+    if args.json:
+        print(json.dumps({'runs': results, 'max_sustainable_rate': best}, indent=2))
+    else:
+        print_report(results, best)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Producer Profile Benchmark for HangarStack
+
+Sends synthetic aircraft view events with each producer profile from
+kafka_config.PRODUCER_PROFILES and reports events/sec, bytes/event and
+p50/p99 produce latency.
+
+By default it runs against an in-process broker stand-in: events are packed
+into real Kafka record batches with the profile's batch size, linger and
+compression codec (the same record builder KafkaProducer uses), and each
+batch is acknowledged after a simulated network round trip that depends on
+the acks setting. Use --broker to measure a real cluster at
+KAFKA_BOOTSTRAP_SERVERS instead.
+
+Usage:
+  python -m hangar_stack.hangar_kafka.benchmark_producer
+  python -m hangar_stack.hangar_kafka.benchmark_producer --events 200000 --rate 20000
+  python -m hangar_stack.hangar_kafka.benchmark_producer --broker --profiles low_latency durable
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from kafka import KafkaProducer
+from kafka.record.memory_records import MemoryRecordsBuilder
+from hangar_stack.hangar_kafka.kafka_config import KAFKA_CONFIG, PRODUCER_PROFILES, TOPICS
+from hangar_stack.hangar_kafka.kafka_producer import producer_profile_settings
+
+DB_PATH = Path(__file__).parent.parent / 'data' / 'aircraft_database.json'
+
+# Kafka protocol compression codec ids
+CODEC_IDS = {None: 0, 'gzip': 1, 'snappy': 2, 'lz4': 3, 'zstd': 4}
+
+# Round trips per batch before the producer sees the ack
+ACK_ROUND_TRIPS = {0: 0, 1: 1, -1: 2, 'all': 2}
+
+def load_designations():
+    with open(DB_PATH) as f:
+        db = json.load(f)
+    return [a['designation'] for m in db['manufacturers'].values() for a in m['aircraft']]
+
+def make_events(count, seed=42):
+    """Synthetic aircraft view events shaped like HangarStackProducer.send_aircraft_view"""
+    rng = random.Random(seed)
+    designations = load_designations()
+    events = []
+    for _ in range(count):
+        designation = rng.choice(designations)
+        events.append((designation, {
+            'event_type': 'aircraft_view',
+            'aircraft_designation': designation,
+            'user_ip': f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+            'user_agent': 'Mozilla/5.0 (X11; Linux x86_64) HangarStackBench/1.0',
+            'timestamp': datetime.utcnow().isoformat()
+        }))
+    return events
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def effective_settings(profile):
+    """Profile settings layered over kafka-python's defaults"""
+    settings = {key: KafkaProducer.DEFAULT_CONFIG[key]
+                for key in ('linger_ms', 'batch_size', 'compression_type', 'acks')}
+    settings.update(producer_profile_settings(profile))
+    return settings
+
+def run_standin(profile, events, rate, rtt_ms):
+    """Replay the producer's batching in-process.
+
+    Events arrive at ``rate`` per second (virtual clock). A batch closes
+    when it is full or when linger_ms has passed since its first record; it
+    is then compressed (measured for real) and acknowledged after the
+    simulated round trips for its acks setting.
+    """
+    settings = effective_settings(profile)
+    codec = CODEC_IDS[settings['compression_type']]
+    batch_size = settings['batch_size']
+    linger = settings['linger_ms'] / 1000.0
+    ack_delay = ACK_ROUND_TRIPS.get(settings['acks'], 1) * rtt_ms / 1000.0
+
+    latencies = []
+    wire_bytes = 0
+    busy = 0.0
+    sender_free_at = 0.0
+
+    batch = None
+    batch_arrivals = []
+    batch_open = 0.0
+
+    def close_batch(close_at):
+        nonlocal wire_bytes, busy, sender_free_at
+        start = time.perf_counter()
+        batch.close()
+        size = batch.size_in_bytes()
+        cost = time.perf_counter() - start
+        busy += cost
+        wire_bytes += size
+        # One sender thread: batches are compressed and sent one at a time
+        sent_at = max(close_at, sender_free_at) + cost
+        sender_free_at = sent_at
+        acked_at = sent_at + ack_delay
+        latencies.extend(acked_at - arrival for arrival in batch_arrivals)
+
+    for i, (key, event) in enumerate(events):
+        arrival = i / float(rate)
+        if batch is not None and arrival - batch_open > linger:
+            close_batch(batch_open + linger)
+            batch = None
+
+        start = time.perf_counter()
+        value = json.dumps(event).encode('utf-8')
+        if batch is None:
+            batch = MemoryRecordsBuilder(magic=2, compression_type=codec, batch_size=batch_size)
+            batch_arrivals = []
+            batch_open = arrival
+        metadata = batch.append(int(arrival * 1000), key.encode('utf-8'), value)
+        if metadata is None:
+            # Batch is full: ship it and start a new one with this record
+            busy += time.perf_counter() - start
+            close_batch(arrival)
+            start = time.perf_counter()
+            batch = MemoryRecordsBuilder(magic=2, compression_type=codec, batch_size=batch_size)
+            batch_arrivals = []
+            batch_open = arrival
+            batch.append(int(arrival * 1000), key.encode('utf-8'), value)
+        batch_arrivals.append(arrival)
+        busy += time.perf_counter() - start
+
+    if batch is not None:
+        close_batch(batch_open + linger)
+
+    return summarize(profile, settings, len(events), busy, wire_bytes, latencies)
+
+def run_broker(profile, events):
+    """Send events to the real cluster and time each acknowledgement"""
+    settings = producer_profile_settings(profile)
+    producer = KafkaProducer(
+        bootstrap_servers=KAFKA_CONFIG['bootstrap_servers'],
+        client_id=f"hangarstack-bench-{profile}",
+        value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+        key_serializer=lambda k: k.encode('utf-8') if k else None,
+        **settings
+    )
+    latencies = []
+    wire_bytes = 0
+    topic = TOPICS['aircraft_views']
+
+    def on_ack(sent_at):
+        def callback(metadata):
+            latencies.append(time.perf_counter() - sent_at)
+        return callback
+
+    start = time.perf_counter()
+    for key, event in events:
+        sent_at = time.perf_counter()
+        producer.send(topic, value=event, key=key).add_callback(on_ack(sent_at))
+        # Payload bytes before compression; the broker path has no batch sizes to read
+        wire_bytes += len(json.dumps(event))
+    producer.flush()
+    elapsed = time.perf_counter() - start
+    producer.close()
+
+    merged = effective_settings(profile)
+    return summarize(profile, merged, len(events), elapsed, wire_bytes, latencies)
+
+def summarize(profile, settings, count, elapsed, wire_bytes, latencies):
+    latencies.sort()
+    return {
+        'profile': profile,
+        'linger_ms': settings['linger_ms'],
+        'batch_size': settings['batch_size'],
+        'compression': settings['compression_type'] or 'none',
+        'acks': settings['acks'],
+        'events': count,
+        'events_per_sec': count / elapsed if elapsed else float('inf'),
+        'bytes_per_event': wire_bytes / count if count else 0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+def print_report(results, mode):
+    print(f"\nProducer profile benchmark ({mode})")
+    print("=" * 100)
+    print(f"{'profile':<16}{'linger':>7}{'batch':>9}{'codec':>7}{'acks':>5}"
+          f"{'events/s':>14}{'bytes/evt':>11}{'p50 ms':>10}{'p99 ms':>10}")
+    print("-" * 100)
+    for r in results:
+        print(f"{r['profile']:<16}{r['linger_ms']:>7}{r['batch_size']:>9}{r['compression']:>7}{str(r['acks']):>5}"
+              f"{r['events_per_sec']:>14,.0f}{r['bytes_per_event']:>11.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HangarStack producer profiles")
+    parser.add_argument('--profiles', nargs='+', default=list(PRODUCER_PROFILES),
+                        choices=list(PRODUCER_PROFILES), help="profiles to run (default: all)")
+    parser.add_argument('--events', type=int, default=50000, help="events per profile")
+    parser.add_argument('--rate', type=float, default=5000.0,
+                        help="stand-in arrival rate in events/sec")
+    parser.add_argument('--rtt-ms', type=float, default=1.0,
+                        help="stand-in broker round trip in ms")
+    parser.add_argument('--broker', action='store_true',
+                        help="benchmark against KAFKA_BOOTSTRAP_SERVERS instead of the stand-in")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    results = []
+    for profile in args.profiles:
+        if args.broker:
+            results.append(run_broker(profile, events))
+        else:
+            results.append(run_standin(profile, events, args.rate, args.rtt_ms))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        mode = 'broker' if args.broker else f"stand-in, {args.rate:,.0f} events/s, {args.rtt_ms} ms RTT"
+        print_report(results, mode)
+
+if __name__ == "__main__":
+    main()
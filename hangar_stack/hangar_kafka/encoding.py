@@ -0,0 +1,160 @@
+import json
+import struct
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, NamedTuple, Tuple
+
+# Compact binary event encoding (little endian):
+#
+#   header   magic byte, schema version, event type code, timestamp as
+#            microseconds since the Unix epoch (UTC, int64)
+#   lengths  u16 byte length per field of the event type's schema, in
+#            schema order
+#   fields   UTF-8 values back to back; 'json' fields hold compact JSON
+#
+# Event types are dictionary coded per schema version. Events that do not
+# fit their schema exactly (unknown type, extra or missing keys, a 'str'
+# field that is not a string, a field over 64 KiB, a timestamp isoformat()
+# would not reproduce) use GENERIC_TYPE: the header (timestamp 0) followed
+# by the whole event as compact JSON, so every event decodes back to an
+# equal dict. JSON text never starts with MAGIC, which lets decode_event()
+# accept both encodings.
+MAGIC = 0xA7
+FORMAT_VERSION = 1
+GENERIC_TYPE = 0
+
+_HEADER = struct.Struct('<BBBq')
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+# version -> type code -> (event_type, ((field, kind), ...)); kind is
+# 'str' or 'json' (any JSON value). Only ever append new codes or
+# versions: consumers must keep reading old records
+SCHEMAS = {
+    1: {
+        1: ('aircraft_view', (('aircraft_designation', 'str'), ('user_ip', 'str'), ('user_agent', 'str'))),
+        2: ('user_activity', (('activity_type', 'str'), ('details', 'json'), ('user_ip', 'str'))),
+        3: ('data_update', (('update_type', 'str'), ('entity_id', 'json'), ('changes', 'json'))),
+        4: ('search_query', (('query', 'str'), ('filters', 'json'), ('user_ip', 'str'))),
+    },
+}
+
+ENCODINGS = ('json', 'binary')
+
+
+def _compact(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _text(value):
+    # AttributeError for anything but a string
+    return value.encode('utf-8')
+
+
+class _RecordType(NamedTuple):
+    version: int
+    code: int
+    event_type: str
+    names: Tuple[str, ...]
+    is_json: Tuple[bool, ...]
+    encoders: Tuple[Callable, ...]
+    layout: struct.Struct
+
+
+_RECORD_TYPES = {
+    (version, code): _RecordType(version, code, event_type, tuple(name for name, _ in fields),
+                                 tuple(kind == 'json' for _, kind in fields),
+                                 tuple(_compact if kind == 'json' else _text for _, kind in fields),
+                                 struct.Struct(_HEADER.format + 'H' * len(fields)))
+    for version, types in SCHEMAS.items() for code, (event_type, fields) in types.items()
+}
+_ENCODE_TYPES = {record_type.event_type: record_type for (version, _), record_type in _RECORD_TYPES.items()
+                 if version == FORMAT_VERSION}
+
+
+@lru_cache(maxsize=4096)
+def _epoch_second(text):
+    """Epoch seconds of 'YYYY-MM-DDTHH:MM:SS', or None if isoformat() would not reproduce it"""
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None or parsed.isoformat() != text:
+        return None
+    return (parsed - _EPOCH) // _SECOND
+
+
+@lru_cache(maxsize=4096)
+def _second_text(seconds):
+    return (_EPOCH + seconds * _SECOND).isoformat()
+
+
+def _micros(timestamp):
+    """Epoch microseconds of a naive isoformat() timestamp, or None if it would not round-trip"""
+    if not isinstance(timestamp, str):
+        return None
+    # Events arrive roughly in time order, so the seconds part is nearly always cached
+    seconds = _epoch_second(timestamp[:19])
+    fraction = timestamp[19:]
+    if seconds is None:
+        return None
+    if not fraction:
+        return seconds * 1000000
+    digits = fraction[1:]
+    if len(fraction) != 7 or fraction[0] != '.' or not (digits.isascii() and digits.isdigit()) or digits == '000000':
+        return None
+    return seconds * 1000000 + int(digits)
+
+
+def _timestamp(micros):
+    seconds, fraction = divmod(micros, 1000000)
+    return _second_text(seconds) + f".{fraction:06d}" if fraction else _second_text(seconds)
+
+
+def encode_event(event):
+    """Binary record for a tracking event dict"""
+    record_type = _ENCODE_TYPES.get(event.get('event_type'))
+    if record_type is not None and len(event) == len(record_type.names) + 2:
+        timestamp = _micros(event.get('timestamp'))
+        if timestamp is not None:
+            try:
+                values = [encode(event[name]) for name, encode in zip(record_type.names, record_type.encoders)]
+                return b''.join([record_type.layout.pack(MAGIC, FORMAT_VERSION, record_type.code, timestamp,
+                                                         *map(len, values))] + values)
+            except (KeyError, AttributeError, struct.error):
+                pass
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, GENERIC_TYPE, 0) + _compact(event)
+
+
+def decode_event(raw):
+    """Event dict from either a binary record or JSON text (bytes or str)"""
+    if raw is None:
+        return None
+    if isinstance(raw, str) or not raw or raw[0] != MAGIC:
+        return json.loads(raw)
+    raw = bytes(raw)
+    version, code = raw[1], raw[2]
+    if code == GENERIC_TYPE and version in SCHEMAS:
+        return json.loads(raw[_HEADER.size:])
+    record_type = _RECORD_TYPES.get((version, code))
+    if record_type is None:
+        raise ValueError(f"Unknown event encoding version {version} type {code}; "
+                         "was it written by a newer producer?")
+    header = record_type.layout.unpack_from(raw)
+    event = {'event_type': record_type.event_type}
+    offset = record_type.layout.size
+    for name, is_json, length in zip(record_type.names, record_type.is_json, header[4:]):
+        value = raw[offset:offset + length].decode('utf-8')
+        offset += length
+        event[name] = json.loads(value) if is_json else value
+    event['timestamp'] = _timestamp(header[3])
+    return event
+
+
+def event_serializer(encoding):
+    """Kafka value_serializer for 'json' or 'binary' event encoding"""
+    if encoding == 'json':
+        return lambda v: json.dumps(v).encode('utf-8')
+    if encoding == 'binary':
+        return encode_event
+    raise ValueError(f"Unknown event encoding '{encoding}', expected one of {', '.join(ENCODINGS)}")
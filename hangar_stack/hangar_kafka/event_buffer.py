@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from collections import deque
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEW = 'drop_new'
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEW, BLOCK)
+
+
+class EventBuffer:
+    """Bounded in-process queue drained by a background sender thread.
+
+    Request handlers call put() and return immediately; the sender thread
+    hands each event to ``send`` (e.g. KafkaProducer.send without a flush).
+    When the buffer is full the overflow policy decides what happens:
+
+    - ``drop_oldest``: evict the oldest queued event to make room
+    - ``drop_new``: reject the incoming event
+    - ``block``: wait up to ``block_timeout`` seconds for room, then reject
+
+    Counters are updated under the buffer's lock: the delivery callbacks
+    run on the producer's I/O thread, concurrently with the sender.
+    ``on_drop``, if given, is called with every queued event that is evicted
+    or abandoned on close, so callers tracking queued events can settle them.
+    """
+
+    def __init__(self, send, max_size=10000, overflow_policy=DROP_OLDEST,
+                 block_timeout=0.05, name='hangarstack-event-sender', on_drop=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}', "
+                             f"expected one of {', '.join(OVERFLOW_POLICIES)}")
+        self.send = send
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.on_drop = on_drop
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+        self.enqueued = 0
+        self.dispatched = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped_oldest = 0
+        self.dropped_new = 0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, event):
+        """Queue an event without waiting on the broker. Returns False if dropped."""
+        accepted, evicted = self._enqueue(event)
+        if evicted is not None and self.on_drop is not None:
+            self.on_drop(evicted)
+        return accepted
+
+    def _enqueue(self, event):
+        """put() under the lock; returns (accepted, event evicted to make room or None)"""
+        evicted = None
+        with self._lock:
+            if self._closed:
+                self.dropped_new += 1
+                return False, None
+            if len(self._queue) >= self.max_size:
+                if self.overflow_policy == DROP_OLDEST:
+                    evicted = self._queue.popleft()
+                    self.dropped_oldest += 1
+                elif self.overflow_policy == DROP_NEW:
+                    self.dropped_new += 1
+                    return False, None
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.max_size and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped_new += 1
+                            return False, None
+                        self._not_full.wait(remaining)
+                    if self._closed:
+                        self.dropped_new += 1
+                        return False, None
+            self._queue.append(event)
+            self.enqueued += 1
+            self._not_empty.notify()
+            return True, evicted
+
+    def record_sent(self, *_):
+        """Delivery callback: the broker acknowledged an event."""
+        with self._lock:
+            self.sent += 1
+
+    def record_failed(self, *_):
+        """Delivery callback: the event was dispatched but not delivered."""
+        with self._lock:
+            self.failed += 1
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+                if not self._queue and self._closed:
+                    return
+                event = self._queue.popleft()
+                self._not_full.notify()
+            try:
+                self.send(event)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                self.logger.error(f"Failed to dispatch buffered event: {e}")
+            else:
+                with self._lock:
+                    self.dispatched += 1
+
+    def close(self, timeout=5.0):
+        """Stop accepting events and give the sender ``timeout`` seconds to drain."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        self._thread.join(timeout)
+        with self._lock:
+            abandoned = list(self._queue)
+            self._queue.clear()
+            self.dropped_oldest += len(abandoned)
+        if abandoned:
+            self.logger.warning(f"Dropped {len(abandoned)} buffered events on shutdown")
+            if self.on_drop is not None:
+                for event in abandoned:
+                    self.on_drop(event)
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    @property
+    def dropped(self):
+        return self.dropped_oldest + self.dropped_new
+
+    def stats(self):
+        with self._lock:
+            return {
+                'depth': self.depth,
+                'max_size': self.max_size,
+                'overflow_policy': self.overflow_policy,
+                'enqueued': self.enqueued,
+                'dispatched': self.dispatched,
+                'sent': self.sent,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'dropped_oldest': self.dropped_oldest,
+                'dropped_new': self.dropped_new,
+            }
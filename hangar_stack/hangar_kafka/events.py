@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from hangar_stack.hangar_kafka.kafka_config import TOPICS
+
+
+class EventTracker(ABC):
+    """Builds tracking events and hands them to ``_send_message(topic, event, key)``.
+
+    Shared by HangarStackProducer and the spool-only fallback (SpoolTracker),
+    and importable without kafka-python.
+    """
+
+    def send_aircraft_view(self, aircraft_designation, user_ip, user_agent):
+        """Track aircraft page views"""
+        event = {
+            'event_type': 'aircraft_view',
+            'aircraft_designation': aircraft_designation,
+            'user_ip': user_ip,
+            'user_agent': user_agent,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        self._send_message(TOPICS['aircraft_views'], event, aircraft_designation)
+
+    def send_user_activity(self, activity_type, details, user_ip):
+        """Track user activities"""
+        event = {
+            'event_type': 'user_activity',
+            'activity_type': activity_type,
+            'details': details,
+            'user_ip': user_ip,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        self._send_message(TOPICS['user_activity'], event, activity_type)
+
+    def send_data_update(self, update_type, entity_id, changes):
+        """Track data updates"""
+        event = {
+            'event_type': 'data_update',
+            'update_type': update_type,
+            'entity_id': entity_id,
+            'changes': changes,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        self._send_message(TOPICS['data_updates'], event, update_type)
+
+    def send_search_query(self, query, filters, user_ip):
+        """Track search queries"""
+        event = {
+            'event_type': 'search_query',
+            'query': query,
+            'filters': filters,
+            'user_ip': user_ip,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        self._send_message(TOPICS['search_queries'], event, query)
+
+    @abstractmethod
+    def _send_message(self, topic, message, key=None):
+        """Deliver ``message`` to ``topic``; ``key`` keeps a key's events in order"""
@@ -14,6 +14,10 @@ KAFKA_CONFIG = {
     'ssl_cafile': os.getenv('KAFKA_SSL_CA_FILE', None),
     'ssl_check_hostname': True,
     'ssl_verify_cert': True,
+    # 'kafka' talks to bootstrap_servers; 'memory' uses an in-process
+    # stand-in broker (memory_broker.py) with this many partitions per topic
+    'transport': os.getenv('KAFKA_TRANSPORT', 'kafka'),
+    'memory_partitions': int(os.getenv('KAFKA_MEMORY_PARTITIONS', '3')),
 }
 
 # Confluent Cloud specific settings
@@ -28,6 +32,124 @@ if KAFKA_CONFIG['security_protocol'] == 'SASL_SSL':
         'auto_commit_interval_ms': 5000,
     })
 
+# Event tracking: 'async' queues events in a bounded in-process buffer
+# shipped by a background thread, 'sync' sends and flushes each event in the
+# caller. 'mode' is the default for HangarStackProducer() (scripts and
+# tests); the web app always asks for async
+TRACKING_CONFIG = {
+    'mode': os.getenv('KAFKA_TRACKING_MODE', 'sync'),
+    'buffer_size': int(os.getenv('KAFKA_TRACKING_BUFFER_SIZE', '10000')),
+    # drop_oldest, drop_new or block
+    'overflow_policy': os.getenv('KAFKA_TRACKING_OVERFLOW', 'drop_oldest'),
+    'block_timeout_ms': int(os.getenv('KAFKA_TRACKING_BLOCK_TIMEOUT_MS', '50')),
+    # Event value encoding: 'json' or 'binary' (compact, schema versioned;
+    # consumers read both)
+    'encoding': os.getenv('KAFKA_EVENT_ENCODING', 'json'),
+    # The web app connects in the background, retrying with backoff up to
+    # retry_max_s, and recreates the producer after this many failed sends
+    # in a row (checked every health_interval_s)
+    'retry_max_s': float(os.getenv('KAFKA_PRODUCER_RETRY_MAX_S', '60')),
+    'health_interval_s': float(os.getenv('KAFKA_PRODUCER_HEALTH_INTERVAL_S', '5')),
+    'max_consecutive_failures': int(os.getenv('KAFKA_PRODUCER_MAX_FAILURES', '10')),
+    # Disk spool for events Kafka cannot take right now (empty: disabled).
+    # Segment files are fsynced every fsync_batch events or fsync_interval
+    # and the oldest are dropped beyond max_mb; replay is rate limited, and
+    # speeds up towards replay_max_rate while the backlog keeps growing
+    'spool_dir': os.getenv('KAFKA_SPOOL_DIR', ''),
+    'spool_max_mb': int(os.getenv('KAFKA_SPOOL_MAX_MB', '256')),
+    'spool_segment_mb': int(os.getenv('KAFKA_SPOOL_SEGMENT_MB', '8')),
+    'spool_fsync_batch': int(os.getenv('KAFKA_SPOOL_FSYNC_BATCH', '100')),
+    'spool_fsync_interval_ms': int(os.getenv('KAFKA_SPOOL_FSYNC_INTERVAL_MS', '1000')),
+    'spool_replay_rate': float(os.getenv('KAFKA_SPOOL_REPLAY_RATE', '500')),
+    'spool_replay_max_rate': float(os.getenv('KAFKA_SPOOL_REPLAY_MAX_RATE', '5000')),
+}
+
+# Batch mode of HangarStackConsumer (consume_batches): records per poll,
+# handler lanes (0 runs handlers in the polling thread), 'thread' or
+# 'process' lanes, and how many polled batches may await their commit.
+# topic_queue_size bounds each topic's queue in the multi-topic runner
+CONSUMER_CONFIG = {
+    'batch_size': int(os.getenv('KAFKA_CONSUMER_BATCH_SIZE', '500')),
+    'workers': int(os.getenv('KAFKA_CONSUMER_WORKERS', '0')),
+    'executor': os.getenv('KAFKA_CONSUMER_EXECUTOR', 'thread'),
+    'max_in_flight': int(os.getenv('KAFKA_CONSUMER_MAX_IN_FLIGHT', '2')),
+    'poll_timeout_ms': int(os.getenv('KAFKA_CONSUMER_POLL_TIMEOUT_MS', '1000')),
+    'topic_queue_size': int(os.getenv('KAFKA_CONSUMER_TOPIC_QUEUE_SIZE', '1000')),
+}
+
+# Windowed view counts kept by the consumer: sketch size (memory is
+# 4 * width * depth bytes per window slot), heavy hitters kept per slot,
+# seconds between sliding-window emissions, and an optional JSON-lines
+# file for the results (they are logged otherwise)
+VIEW_COUNT_CONFIG = {
+    'sketch_width': int(os.getenv('KAFKA_VIEW_COUNTS_WIDTH', '2048')),
+    'sketch_depth': int(os.getenv('KAFKA_VIEW_COUNTS_DEPTH', '4')),
+    'top_k': int(os.getenv('KAFKA_VIEW_COUNTS_TOP_K', '20')),
+    'emit_interval_s': float(os.getenv('KAFKA_VIEW_COUNTS_EMIT_INTERVAL_S', '60')),
+    'output_file': os.getenv('KAFKA_VIEW_COUNTS_FILE', ''),
+}
+
+# Where the consumer stores aggregates (view totals, search and activity
+# counts, latest window results): 'sqlite' (a local file), 'redis',
+# 'memory' (in-process, for testing) or 'none'. Writes are buffered and
+# flushed in bulk every flush_interval_s or at max_pending keys
+SINK_CONFIG = {
+    'kind': os.getenv('KAFKA_SINK', 'none'),
+    'sqlite_path': os.getenv('KAFKA_SINK_SQLITE_PATH', os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), 'data', 'consumer_aggregates.sqlite')),
+    'redis_url': os.getenv('KAFKA_SINK_REDIS_URL', 'redis://localhost:6379/0'),
+    'max_pending': int(os.getenv('KAFKA_SINK_MAX_PENDING', '5000')),
+    'flush_interval_s': float(os.getenv('KAFKA_SINK_FLUSH_INTERVAL_S', '1.0')),
+}
+
+# Producer tuning profiles, selected with KAFKA_PRODUCER_PROFILE.
+# compression_type lists codecs in order of preference; the first one whose
+# library is installed is used (gzip is always available). Settings that the
+# installed kafka-python does not support (e.g. buffer_memory on 2.1+) are
+# skipped with a warning.
+PRODUCER_PROFILES = {
+    # kafka-python defaults
+    'default': {},
+    # Ship every event as soon as possible, leader ack only
+    'low_latency': {
+        'linger_ms': 0,
+        'batch_size': 16384,
+        'compression_type': None,
+        'acks': 1,
+        'buffer_memory': 32 * 1024 * 1024,
+        'max_in_flight_requests_per_connection': 5,
+    },
+    # Trade a few ms of latency for large, compressed batches
+    'high_throughput': {
+        'linger_ms': 20,
+        'batch_size': 256 * 1024,
+        'compression_type': ['zstd', 'lz4', 'gzip'],
+        'acks': 1,
+        'buffer_memory': 64 * 1024 * 1024,
+        'max_in_flight_requests_per_connection': 5,
+    },
+    # Wait for all in-sync replicas and keep ordering on retries
+    'durable': {
+        'linger_ms': 5,
+        'batch_size': 64 * 1024,
+        'compression_type': ['lz4', 'gzip'],
+        'acks': 'all',
+        'retries': 2147483647,
+        'buffer_memory': 32 * 1024 * 1024,
+        'max_in_flight_requests_per_connection': 1,
+    },
+}
+
+PRODUCER_PROFILE = os.getenv('KAFKA_PRODUCER_PROFILE', 'default')
+
+def get_producer_profile(name=None):
+    """Return the settings of a named producer profile"""
+    name = name or PRODUCER_PROFILE
+    if name not in PRODUCER_PROFILES:
+        raise ValueError(f"Unknown producer profile '{name}', "
+                         f"expected one of {', '.join(PRODUCER_PROFILES)}")
+    return dict(PRODUCER_PROFILES[name])
+
 # Topic names
 TOPICS = {
     'aircraft_views': 'hangarstack.aircraft.views',
@@ -1,18 +1,33 @@
-import json
 import logging
+import threading
 from datetime import datetime
 from kafka import KafkaConsumer
-from hangar_stack.hangar_kafka.kafka_config import KAFKA_CONFIG, TOPICS, is_confluent_cloud, get_connection_info
+from kafka.errors import CommitFailedError
+from kafka.structs import OffsetAndMetadata
+from hangar_stack.hangar_kafka.kafka_config import (
+    KAFKA_CONFIG, TOPICS, CONSUMER_CONFIG, VIEW_COUNT_CONFIG, SINK_CONFIG, is_confluent_cloud, get_connection_info,
+)
+from hangar_stack.hangar_kafka.encoding import decode_event
+from hangar_stack.hangar_kafka.memory_broker import get_transport
+from hangar_stack.hangar_kafka.batch_dispatch import BatchPipeline, KeyedExecutor, INLINE, PROCESS
+from hangar_stack.hangar_kafka.view_counts import JsonLinesSink, ViewAggregator, log_sink
+from hangar_stack.hangar_kafka.sinks import BufferedWriter, create_sink, window_result_sink
 
 class HangarStackConsumer:
-    def __init__(self, topic, group_id='hangarstack_group'):
-        # Configure consumer based on environment
+    def __init__(self, topic, group_id='hangarstack_group', enable_auto_commit=True, view_sink=None,
+                 writer=None, transport=None):
+        # ``topic`` is one topic name or a list of them, consumed together in
+        # one group over one connection. Batch mode (consume_batches) needs
+        # enable_auto_commit=False: it commits each batch itself once its
+        # handlers have finished. Configure consumer based on environment
+        self.enable_auto_commit = enable_auto_commit
         consumer_config = {
             'bootstrap_servers': KAFKA_CONFIG['bootstrap_servers'],
             'group_id': group_id,
             'auto_offset_reset': 'earliest',
-            'enable_auto_commit': True,
-            'value_deserializer': lambda x: json.loads(x.decode('utf-8'))
+            'enable_auto_commit': enable_auto_commit,
+            # JSON and binary event records are told apart by their first byte
+            'value_deserializer': decode_event,
         }
         
         # Add Confluent Cloud specific configuration
@@ -31,14 +46,42 @@ class HangarStackConsumer:
             if KAFKA_CONFIG['ssl_cafile']:
                 consumer_config['ssl_cafile'] = KAFKA_CONFIG['ssl_cafile']
         
-        self.consumer = KafkaConsumer(topic, **consumer_config)
+        self.topics = [topic] if isinstance(topic, str) else list(topic)
+        # ``transport`` is a broker stand-in such as MemoryBroker; by default
+        # KAFKA_TRANSPORT decides between it and the real cluster
+        transport = transport if transport is not None else get_transport()
+        if transport is not None:
+            self.consumer = transport.consumer(*self.topics, **consumer_config)
+        else:
+            self.consumer = KafkaConsumer(*self.topics, **consumer_config)
         self.logger = logging.getLogger(__name__)
+        self.pipeline = None
+
+        # Dispatch table: (topic, event_type) -> handler(event); a topic of
+        # None matches events of that type on any topic. See register()
+        self.routes = {
+            (None, 'aircraft_view'): self.handle_aircraft_view,
+            (None, 'user_activity'): self.handle_user_activity,
+            (None, 'data_update'): self.handle_data_update,
+            (None, 'search_query'): self.handle_search_query,
+        }
+        self._stopping = threading.Event()
+        # Window results of view counting go to view_sink (a callable taking
+        # a list of result dicts); the aggregator is created on the first view
+        self.view_sink = view_sink
+        self._view_counts = None
+        self._view_counts_lock = threading.Lock()
+        # Aggregates (view totals, search/activity/update counts) go through
+        # a BufferedWriter to the sink chosen by SINK_CONFIG, if any
+        self.writer = writer if writer is not None else self._create_writer()
+        # Offsets of batches whose aggregates failed to flush, see commit_offsets()
+        self._held_offsets = {}
         
         # Log connection info
         conn_info = get_connection_info()
         self.logger.info(f"Consumer initialized for {conn_info['type']}")
         self.logger.info(f"Bootstrap servers: {conn_info['bootstrap_servers']}")
-        self.logger.info(f"Topic: {topic}, Group ID: {group_id}")
+        self.logger.info(f"Topic: {', '.join(self.topics)}, Group ID: {group_id}")
 
     def consume_messages(self):
         """Consume messages from Kafka topic"""
@@ -48,47 +91,177 @@ class HangarStackConsumer:
         except KeyboardInterrupt:
             self.logger.info("Stopping consumer...")
         finally:
-            self.consumer.close()
+            self.close()
+
+    def consume_batches(self, handlers=None, max_records=None, workers=None, executor=None,
+                        max_in_flight=None, timeout_ms=None):
+        """Consume in batches of up to ``max_records`` until stop() or Ctrl-C.
+
+        Each poll() result is split into lanes by message key (records
+        without a key use their partition) and every lane hands its events,
+        grouped by event_type, to ``handlers[event_type](events)``. With
+        ``workers`` > 0 the lanes run on that many threads or processes
+        (``executor``), keeping each key's events in order. Offsets are
+        committed per batch, in poll order, once all of its handlers have
+        returned; polling pauses while ``max_in_flight`` batches are still
+        uncommitted. A handler exception stops the consumer without
+        committing, so those records are delivered again.
+
+        ``handlers`` defaults to batch_handlers(); process lanes need
+        picklable module-level functions instead. Defaults for the other
+        arguments come from CONSUMER_CONFIG.
+        """
+        if self.enable_auto_commit:
+            raise ValueError("consume_batches() commits offsets itself; "
+                             "create the consumer with enable_auto_commit=False")
+        max_records = max_records or CONSUMER_CONFIG['batch_size']
+        workers = CONSUMER_CONFIG['workers'] if workers is None else workers
+        executor = executor or CONSUMER_CONFIG['executor']
+        max_in_flight = max_in_flight or CONSUMER_CONFIG['max_in_flight']
+        timeout_ms = timeout_ms or CONSUMER_CONFIG['poll_timeout_ms']
+        if handlers is None:
+            if executor == PROCESS and workers > 0:
+                raise ValueError("Process lanes need picklable module-level handlers; pass handlers=")
+            handlers = self.batch_handlers()
+
+        lanes = KeyedExecutor(workers, executor if workers > 0 else INLINE)
+        self.pipeline = BatchPipeline(handlers, self.commit_offsets, lanes, max_in_flight)
+        self.logger.info(f"Consuming in batches of {max_records} on {lanes.workers} {lanes.kind} lane(s), "
+                         f"up to {self.pipeline.max_in_flight} uncommitted")
+        try:
+            while not self._stopping.is_set():
+                records = self.consumer.poll(timeout_ms=timeout_ms, max_records=max_records)
+                if records:
+                    self.pipeline.submit(records)
+                else:
+                    self.pipeline.commit_finished()
+                    if self._view_counts is not None:
+                        self._view_counts.maybe_emit()
+            self.pipeline.drain()
+        except KeyboardInterrupt:
+            self.logger.info("Stopping consumer...")
+            self.pipeline.drain()
+        except Exception:
+            self.pipeline.discard()
+            raise
+        finally:
+            lanes.shutdown()
+            self.close()
+        return self.pipeline.stats()
+
+    def batch_handlers(self):
+        """Default batch handlers: the registered topic-independent handlers applied to each event"""
+        def each(handle):
+            def handle_batch(events):
+                for event in events:
+                    try:
+                        handle(event)
+                    except Exception as e:
+                        self.logger.error(f"Error processing message: {e}")
+            return handle_batch
+        return {event_type: each(handle) for (topic, event_type), handle in self.routes.items() if topic is None}
+
+    def register(self, event_type, handler, topic=None):
+        """Route events of ``event_type`` (on ``topic``, or on any topic) to ``handler(event)``"""
+        self.routes[(topic, event_type)] = handler
+
+    def handler_for(self, topic, event_type):
+        """The handler registered for ``event_type`` on ``topic``, else for any topic, else None"""
+        return self.routes.get((topic, event_type)) or self.routes.get((None, event_type))
+
+    def commit_offsets(self, offsets):
+        """Commit {TopicPartition: next offset to read}, after flushing the aggregates of those records.
+
+        If the aggregates cannot be written the offsets are held back and
+        committed with the next batch whose flush succeeds, so a crash while
+        the sink is down redelivers the records instead of losing their counts.
+        """
+        offsets = {**self._held_offsets, **offsets}
+        if self.writer is not None:
+            try:
+                self.writer.flush(raise_errors=True)
+            except Exception as e:
+                self._held_offsets = offsets
+                self.logger.error(f"Not committing offsets of {len(offsets)} partition(s), "
+                                  f"their aggregates were not written: {e}; retrying with the next batch")
+                return
+        self._held_offsets = {}
+        try:
+            self.consumer.commit({tp: OffsetAndMetadata(offset, '', -1) for tp, offset in offsets.items()})
+        except CommitFailedError as e:
+            # The partitions were reassigned meanwhile; their new owner
+            # resumes from the last committed offset
+            self.logger.warning(f"Could not commit offsets: {e}")
+
+    def stop(self):
+        """Ask consume_batches() to finish in-flight batches and return"""
+        self._stopping.set()
 
     def process_message(self, message):
         """Process individual message"""
         try:
             event = message.value
-            event_type = event.get('event_type')
-            
-            if event_type == 'aircraft_view':
-                self.handle_aircraft_view(event)
-            elif event_type == 'user_activity':
-                self.handle_user_activity(event)
-            elif event_type == 'data_update':
-                self.handle_data_update(event)
-            elif event_type == 'search_query':
-                self.handle_search_query(event)
+            handler = self.handler_for(message.topic, event.get('event_type'))
+            if handler is not None:
+                handler(event)
             
         except Exception as e:
             self.logger.error(f"Error processing message: {e}")
 
+    @property
+    def view_counts(self):
+        """ViewAggregator with the 1m/1h/24h view counts of this consumer"""
+        if self._view_counts is None:
+            with self._view_counts_lock:
+                if self._view_counts is None:
+                    sink = self.view_sink
+                    output = VIEW_COUNT_CONFIG['output_file']
+                    if sink is None and output:
+                        sink = JsonLinesSink(output)
+                    elif sink is None and self.writer is not None:
+                        sink = window_result_sink(self.writer)
+                    elif sink is None:
+                        sink = log_sink
+                    self._view_counts = ViewAggregator(sink,
+                                                       width=VIEW_COUNT_CONFIG['sketch_width'],
+                                                       depth=VIEW_COUNT_CONFIG['sketch_depth'],
+                                                       k=VIEW_COUNT_CONFIG['top_k'],
+                                                       emit_interval=VIEW_COUNT_CONFIG['emit_interval_s'])
+        return self._view_counts
+
+    @staticmethod
+    def _create_writer():
+        sink = create_sink(SINK_CONFIG['kind'], SINK_CONFIG['sqlite_path'], SINK_CONFIG['redis_url'])
+        if sink is None:
+            return None
+        writer = BufferedWriter(sink, max_pending=SINK_CONFIG['max_pending'],
+                                flush_interval=SINK_CONFIG['flush_interval_s'])
+        writer.start()
+        return writer
+
     def handle_aircraft_view(self, event):
         """Handle aircraft view events"""
-        # Update view counters in cache/database
+        # Update the windowed view counters (bounded memory however many
+        # distinct designations arrive)
         aircraft_designation = event['aircraft_designation']
         self.logger.info(f"Aircraft viewed: {aircraft_designation}")
-        
-        # Here you could update Redis cache, database, or send to analytics
-        # Example: update_view_count(aircraft_designation)
+        self.view_counts.record_event(event)
+        if self.writer is not None:
+            self.writer.incr('aircraft_views', aircraft_designation)
 
     def handle_user_activity(self, event):
         """Handle user activity events"""
         activity_type = event['activity_type']
         self.logger.info(f"User activity: {activity_type}")
-        
-        # Here you could track user sessions, behavior patterns, etc.
-        # Example: update_user_analytics(event)
+        if self.writer is not None:
+            self.writer.incr('user_activity', activity_type)
 
     def handle_data_update(self, event):
         """Handle data update events"""
         update_type = event['update_type']
         self.logger.info(f"Data updated: {update_type}")
+        if self.writer is not None:
+            self.writer.incr('data_updates', update_type)
         
         # Here you could invalidate caches, notify other services, etc.
         # Example: invalidate_cache(event['entity_id'])
@@ -97,9 +270,11 @@ class HangarStackConsumer:
         """Handle search query events"""
         query = event['query']
         self.logger.info(f"Search query: {query}")
-        
-        # Here you could update search analytics, improve search results, etc.
-        # Example: update_search_analytics(query, event['filters'])
+        if self.writer is not None:
+            self.writer.incr('search_queries', query.strip().lower())
 
     def close(self):
-        self.consumer.close() 
\ No newline at end of file
+        self.consumer.close()
+        if self.writer is not None:
+            self.writer.close()
+            self.logger.info(f"Aggregate sink: {self.writer.stats()}") 
\ No newline at end of file
@@ -1,17 +1,64 @@
-import json
 import logging
-from datetime import datetime
+import threading
+from functools import partial
 from kafka import KafkaProducer
+from kafka import codec
 from kafka.errors import KafkaError
-from hangar_stack.hangar_kafka.kafka_config import KAFKA_CONFIG, TOPICS, is_confluent_cloud, get_connection_info
+from hangar_stack.hangar_kafka.kafka_config import (
+    KAFKA_CONFIG, TOPICS, TRACKING_CONFIG, PRODUCER_PROFILE,
+    get_producer_profile, is_confluent_cloud, get_connection_info,
+)
+from hangar_stack.hangar_kafka.encoding import event_serializer
+from hangar_stack.hangar_kafka.event_buffer import EventBuffer
+from hangar_stack.hangar_kafka.events import EventTracker
+from hangar_stack.hangar_kafka.spool import SpoolReplayer
+from hangar_stack.hangar_kafka.memory_broker import get_transport
 
-class HangarStackProducer:
-    def __init__(self):
-        # Configure producer based on environment
+logger = logging.getLogger(__name__)
+
+COMPRESSION_CODECS = {
+    'gzip': codec.has_gzip,
+    'snappy': codec.has_snappy,
+    'lz4': codec.has_lz4,
+    'zstd': codec.has_zstd,
+}
+
+def resolve_compression(preference):
+    """Return the first codec in ``preference`` whose library is installed"""
+    if preference is None:
+        return None
+    if isinstance(preference, str):
+        preference = [preference]
+    for name in preference:
+        available = COMPRESSION_CODECS.get(name)
+        if available is not None and available():
+            return name
+    logger.warning(f"None of the compression codecs {preference} are available, sending uncompressed")
+    return None
+
+def producer_profile_settings(name=None):
+    """KafkaProducer keyword arguments for a named profile"""
+    settings = {}
+    for key, value in get_producer_profile(name).items():
+        if key == 'compression_type':
+            value = resolve_compression(value)
+            if value is None:
+                continue
+        if key not in KafkaProducer.DEFAULT_CONFIG:
+            logger.info(f"Producer setting '{key}' is not supported by this kafka-python version, skipping")
+            continue
+        settings[key] = value
+    return settings
+
+class HangarStackProducer(EventTracker):
+    def __init__(self, tracking_mode=None, profile=None, spool=None, encoding=None, transport=None):
+        # Configure producer based on environment. Event values are JSON or,
+        # with encoding='binary', compact binary records (see encoding.py)
+        self.encoding = encoding or TRACKING_CONFIG['encoding']
         producer_config = {
             'bootstrap_servers': KAFKA_CONFIG['bootstrap_servers'],
             'client_id': KAFKA_CONFIG['client_id'],
-            'value_serializer': lambda v: json.dumps(v).encode('utf-8'),
+            'value_serializer': event_serializer(self.encoding),
             'key_serializer': lambda k: k.encode('utf-8') if k else None,
         }
         
@@ -26,74 +73,202 @@ class HangarStackProducer:
             
             if KAFKA_CONFIG['ssl_cafile']:
                 producer_config['ssl_cafile'] = KAFKA_CONFIG['ssl_cafile']
+
+        # Batching, linger, compression and acks from the selected profile
+        self.profile = profile or PRODUCER_PROFILE
+        producer_config.update(producer_profile_settings(self.profile))
         
-        self.producer = KafkaProducer(**producer_config)
+        # ``transport`` is a broker stand-in such as MemoryBroker; by default
+        # KAFKA_TRANSPORT decides between it and the real cluster
+        transport = transport if transport is not None else get_transport()
+        if transport is not None:
+            self.producer = transport.producer(**producer_config)
+        else:
+            self.producer = KafkaProducer(**producer_config)
         self.logger = logging.getLogger(__name__)
+        # Sends that failed since the last one that succeeded; see healthy()
+        self.consecutive_failures = 0
+
+        # In async mode events go through a bounded buffer so callers never
+        # wait on the broker; in sync mode every send is flushed immediately
+        self.tracking_mode = tracking_mode or TRACKING_CONFIG['mode']
+        self.buffer = None
+        if self.tracking_mode == 'async':
+            self.buffer = EventBuffer(
+                self._dispatch,
+                max_size=TRACKING_CONFIG['buffer_size'],
+                overflow_policy=TRACKING_CONFIG['overflow_policy'],
+                block_timeout=TRACKING_CONFIG['block_timeout_ms'] / 1000.0,
+                on_drop=self._on_buffered_drop,
+            )
+
+        # With a spool, events that cannot go to the broker right now (it is
+        # unreachable, the buffer is full, or a send failed) are written to
+        # disk and replayed in order once sends succeed again. Only keys that
+        # still have spooled events keep queueing behind them
+        self.spool = spool
+
+        # Async sends with a spool: keys with events in the buffer or awaiting
+        # the broker, {key: {'inflight': n, 'failed': [...], 'held': [...]}};
+        # see _send_in_order()
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+        self.replayer = None
+        if spool is not None:
+            self.replayer = SpoolReplayer(spool, self._replay, rate=TRACKING_CONFIG['spool_replay_rate'],
+                                          max_rate=TRACKING_CONFIG['spool_replay_max_rate'])
         
         # Log connection info
         conn_info = get_connection_info()
-        self.logger.info(f"Producer initialized for {conn_info['type']}")
+        self.logger.info(f"Producer initialized for {conn_info['type']} (profile: {self.profile}, encoding: {self.encoding})")
         self.logger.info(f"Bootstrap servers: {conn_info['bootstrap_servers']}")
 
-    def send_aircraft_view(self, aircraft_designation, user_ip, user_agent):
-        """Track aircraft page views"""
-        event = {
-            'event_type': 'aircraft_view',
-            'aircraft_designation': aircraft_designation,
-            'user_ip': user_ip,
-            'user_agent': user_agent,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        self._send_message(TOPICS['aircraft_views'], event, aircraft_designation)
-
-    def send_user_activity(self, activity_type, details, user_ip):
-        """Track user activities"""
-        event = {
-            'event_type': 'user_activity',
-            'activity_type': activity_type,
-            'details': details,
-            'user_ip': user_ip,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        self._send_message(TOPICS['user_activity'], event, activity_type)
-
-    def send_data_update(self, update_type, entity_id, changes):
-        """Track data updates"""
-        event = {
-            'event_type': 'data_update',
-            'update_type': update_type,
-            'entity_id': entity_id,
-            'changes': changes,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        self._send_message(TOPICS['data_updates'], event, update_type)
-
-    def send_search_query(self, query, filters, user_ip):
-        """Track search queries"""
-        event = {
-            'event_type': 'search_query',
-            'query': query,
-            'filters': filters,
-            'user_ip': user_ip,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        self._send_message(TOPICS['search_queries'], event, query)
-
     def _send_message(self, topic, message, key=None):
         """Send message to Kafka topic"""
+        if self.buffer is not None and self.spool is not None:
+            self._send_in_order((topic, message, key))
+            return
+        if self.spool is not None and (not self.healthy() or self.spool.has_pending(key)):
+            # Keep per-key order: nothing overtakes its key's events still in the spool
+            self.spool.append(topic, key, message)
+            return
+        if self.buffer is not None:
+            if not self.buffer.put((topic, message, key)):
+                self.logger.debug(f"Tracking buffer full, dropped event for {topic}")
+            return
         try:
             future = self.producer.send(topic, value=message, key=key)
             future.add_callback(self._on_send_success)
-            future.add_errback(self._on_send_error)
+            future.add_errback(partial(self._on_send_error, (topic, message, key)))
             self.producer.flush()
         except Exception as e:
             self.logger.error(f"Failed to send message to {topic}: {e}")
+            self._spool_failed((topic, message, key))
+
+    def _send_in_order(self, item):
+        """Async send with a spool, keeping each key's events in order.
+
+        A failed send only reaches the spool from the delivery callback, so a
+        key has one group of events in the buffer or awaiting the broker at a
+        time; events arriving meanwhile are held back. Once the whole group is
+        settled the held events go out as the next group, or, if any of the
+        group failed, its failed events and then the held ones are spooled.
+        """
+        topic, message, key = item
+        with self._keys_lock:
+            state = self._keys.get(key)
+            if state is not None:
+                state['held'].append(item)
+                return
+            if (not self.healthy() or self.spool.has_pending(key)
+                    or self.buffer.depth >= self.buffer.max_size):
+                # Keep per-key order: nothing overtakes its key's events still in the spool
+                self.spool.append(topic, key, message)
+                return
+            self._keys[key] = {'inflight': 1, 'failed': [], 'held': []}
+        self._buffer_group([item])
+
+    def _buffer_group(self, items):
+        for item in items:
+            if not self.buffer.put(item):
+                self._settle(item, delivered=False)
+
+    def _settle(self, item, delivered):
+        """Record the outcome of a buffered event and release or spool what its key held back"""
+        topic, message, key = item
+        with self._keys_lock:
+            state = self._keys.get(key)
+            if state is None:
+                if not delivered:
+                    self.spool.append(topic, key, message)
+                return
+            if not delivered:
+                state['failed'].append(item)
+            state['inflight'] -= 1
+            if state['inflight']:
+                return
+            if state['failed']:
+                del self._keys[key]
+                for held_topic, held_message, held_key in state['failed'] + state['held']:
+                    self.spool.append(held_topic, held_key, held_message)
+                return
+            release = state['held']
+            if not release:
+                del self._keys[key]
+                return
+            state['inflight'], state['held'] = len(release), []
+        self._buffer_group(release)
+
+    def _dispatch(self, item):
+        """Hand a buffered event to the producer's own batching (no flush)"""
+        topic, message, key = item
+        try:
+            future = self.producer.send(topic, value=message, key=key)
+        except Exception:
+            if self.spool is not None:
+                self._settle(item, delivered=False)
+            raise
+        future.add_callback(partial(self._on_buffered_send_success, item))
+        future.add_errback(partial(self._on_buffered_send_error, item))
+
+    def _replay(self, records):
+        """Send spooled events and wait for the broker; True if all were acknowledged"""
+        futures = [self.producer.send(r['t'], value=r['v'], key=r['k']) for r in records]
+        self.producer.flush(timeout=10)
+        if all(f.succeeded() for f in futures):
+            self.consecutive_failures = 0
+            return True
+        return False
+
+    def _spool_failed(self, item):
+        if self.spool is not None:
+            topic, message, key = item
+            self.spool.append(topic, key, message)
+
+    def _on_buffered_send_success(self, item, record_metadata):
+        self.consecutive_failures = 0
+        self.buffer.record_sent(record_metadata)
+        if self.spool is not None:
+            self._settle(item, delivered=True)
+
+    def _on_buffered_send_error(self, item, excp):
+        self.consecutive_failures += 1
+        self.buffer.record_failed()
+        self.logger.error(f"Failed to send message: {excp}")
+        if self.spool is not None:
+            self._settle(item, delivered=False)
+
+    def _on_buffered_drop(self, item):
+        # Evicted from the buffer or abandoned on close: spool it in its key's order
+        if self.spool is not None:
+            self._settle(item, delivered=False)
 
     def _on_send_success(self, record_metadata):
+        self.consecutive_failures = 0
         self.logger.info(f"Message sent to {record_metadata.topic} partition {record_metadata.partition}")
 
-    def _on_send_error(self, excp):
+    def _on_send_error(self, item, excp):
+        self.consecutive_failures += 1
         self.logger.error(f"Failed to send message: {excp}")
+        self._spool_failed(item)
+
+    def healthy(self, max_failures=None):
+        """False once ``max_failures`` sends in a row have failed (the broker connection is likely lost)"""
+        if max_failures is None:
+            max_failures = TRACKING_CONFIG['max_consecutive_failures']
+        return self.consecutive_failures < max_failures
+
+    def tracking_stats(self):
+        """Counters for enqueued/sent/dropped events (async mode) and the spool, if any"""
+        stats = {} if self.buffer is None else self.buffer.stats()
+        stats['mode'] = self.tracking_mode
+        if self.spool is not None:
+            stats['spool'] = self.spool.stats()
+        return stats
 
     def close(self):
+        if self.replayer is not None:
+            self.replayer.close()
+        if self.buffer is not None:
+            self.buffer.close()
         self.producer.close() 
\ No newline at end of file
@@ -0,0 +1,501 @@
+import itertools
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+from kafka.errors import CommitFailedError, IllegalStateError, KafkaTimeoutError, MessageSizeTooLargeError
+from kafka.partitioner.default import murmur2
+from kafka.structs import TopicPartition
+from hangar_stack.hangar_kafka.kafka_config import KAFKA_CONFIG
+
+# What poll() returns and send() futures resolve to; the attributes the
+# HangarStack code reads match kafka-python's ConsumerRecord/RecordMetadata
+MemoryRecord = namedtuple('MemoryRecord', 'topic partition offset timestamp timestamp_type key value headers')
+RecordMetadata = namedtuple('RecordMetadata', 'topic partition topic_partition offset timestamp')
+
+
+class MemoryBroker:
+    """In-process stand-in for a Kafka cluster, for hermetic tests and benchmarks.
+
+    Topics are created on first use with ``partitions`` partitions, each an
+    append-only log of serialized records addressed by offset. Keyed
+    records go to murmur2(key) % partitions like kafka-python's default
+    partitioner, keyless ones round-robin. Consumer groups split the
+    partitions of their topics between members and rebalance when one joins
+    or leaves; committed offsets are kept per group and a commit from a
+    member that has not yet seen the latest rebalance fails with
+    CommitFailedError, as on a real broker. With ``retention`` set, each
+    partition keeps about that many records and older offsets are deleted.
+    Setting ``available`` to False fails every send (broker outage).
+
+    producer() and consumer() take the same keyword arguments as
+    KafkaProducer and KafkaConsumer; the ones that only matter for the
+    network (bootstrap servers, SASL, batching...) are ignored.
+    """
+
+    def __init__(self, partitions=3, retention=None):
+        self.partitions = partitions
+        self.retention = retention
+        self.available = True
+        self._topics = {}
+        self._groups = {}
+        self._round_robin = {}
+        # Pollers wait on the condition; appends only notify when one is waiting
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._waiting = 0
+        self._member_ids = itertools.count(1)
+
+    def producer(self, **config):
+        return MemoryProducer(self, **config)
+
+    def consumer(self, *topics, **config):
+        return MemoryConsumer(self, *topics, **config)
+
+    def create_topic(self, topic, partitions=None):
+        with self._lock:
+            if topic not in self._topics:
+                self._topics[topic] = [_Log() for _ in range(partitions or self.partitions)]
+            return len(self._topics[topic])
+
+    def _logs(self, topic):
+        logs = self._topics.get(topic)
+        if logs is None:
+            self.create_topic(topic)
+            logs = self._topics[topic]
+        return logs
+
+    def topics(self):
+        return set(self._topics)
+
+    def partitions_for(self, topic):
+        return set(range(len(self._logs(topic))))
+
+    def end_offsets(self, topic):
+        """{TopicPartition: offset the next record will get}"""
+        with self._lock:
+            return {TopicPartition(topic, p): log.end for p, log in enumerate(self._logs(topic))}
+
+    def committed(self, group_id):
+        """{TopicPartition: committed offset} of a consumer group"""
+        with self._lock:
+            group = self._groups.get(group_id)
+            return dict(group.offsets) if group else {}
+
+    def lag(self, group_id, topics=None):
+        """{TopicPartition: records not yet committed by the group}"""
+        with self._lock:
+            group = self._groups.get(group_id)
+            topics = topics or (group.topics() if group else [])
+            offsets = group.offsets if group else {}
+            return {TopicPartition(topic, p): log.end - max(offsets.get(TopicPartition(topic, p), log.start), log.start)
+                    for topic in topics for p, log in enumerate(self._logs(topic))}
+
+    def records(self, topic, partition=None):
+        """Stored (offset, key, value) of a topic's partitions, serialized, oldest first"""
+        with self._lock:
+            logs = self._logs(topic)
+            chosen = range(len(logs)) if partition is None else [partition]
+            return [(log.start + i, key, value) for p in chosen for log in [logs[p]]
+                    for i, (_, key, value, _) in enumerate(log.records)]
+
+    def _append(self, topic, partition, timestamp, key, value, headers):
+        # The hot path of every send, hence inlined lookups
+        with self._lock:
+            logs = self._topics.get(topic) or self._logs(topic)
+            if partition is None:
+                if key is None:
+                    partition = self._round_robin[topic] = (self._round_robin.get(topic, -1) + 1) % len(logs)
+                else:
+                    partition = _key_hash(key) % len(logs)
+            log = logs[partition]
+            offset = log.end
+            log.records.append((timestamp, key, value, headers))
+            log.end = offset + 1
+            if self.retention is not None and len(log.records) > self.retention * 1.25:
+                log.trim(self.retention)
+            if self._waiting:
+                self._cond.notify_all()
+            return partition, offset
+
+    # Consumer groups
+
+    def _join(self, member):
+        with self._lock:
+            if member.group_id is None:
+                return
+            group = self._groups.setdefault(member.group_id, _Group())
+            group.members[member.member_id] = member
+            self._rebalance(group)
+
+    def _leave(self, member):
+        with self._lock:
+            group = self._groups.get(member.group_id)
+            if group is not None and group.members.pop(member.member_id, None) is not None:
+                self._rebalance(group)
+
+    def _rebalance(self, group):
+        """Deal each topic's partitions out round-robin to the members subscribed to it"""
+        # Like kafka-python, auto-committing members commit what they have
+        # consumed before giving up their partitions
+        for member in group.members.values():
+            if member.enable_auto_commit and member.generation == group.generation:
+                group.offsets.update({tp: position for tp, position in member._positions.items()
+                                      if position is not None})
+        group.generation += 1
+        group.assignment = {member_id: set() for member_id in group.members}
+        for topic in sorted(group.topics()):
+            members = sorted(m for m, member in group.members.items() if topic in member.topics)
+            for p in range(len(self._logs(topic))):
+                group.assignment[members[p % len(members)]].add(TopicPartition(topic, p))
+        self._cond.notify_all()
+
+    def _commit(self, member, offsets):
+        with self._lock:
+            group = self._groups.get(member.group_id)
+            if group is None or member.generation != group.generation:
+                raise CommitFailedError("The group has rebalanced since this consumer last polled; "
+                                        "its partitions may have been reassigned")
+            unassigned = set(offsets) - group.assignment.get(member.member_id, set())
+            if unassigned:
+                raise CommitFailedError(f"Partitions {sorted(unassigned)} are not assigned to this consumer")
+            group.offsets.update(offsets)
+
+
+@lru_cache(maxsize=65536)
+def _key_hash(key):
+    return murmur2(key) & 0x7fffffff
+
+
+class _Log:
+    __slots__ = ('records', 'start', 'end')
+
+    def __init__(self):
+        self.records = []
+        self.start = 0
+        self.end = 0
+
+    def trim(self, keep):
+        drop = len(self.records) - keep
+        del self.records[:drop]
+        self.start += drop
+
+
+class _Group:
+    def __init__(self):
+        self.members = {}
+        self.assignment = {}
+        self.offsets = {}
+        self.generation = 0
+
+    def topics(self):
+        return {topic for member in self.members.values() for topic in member.topics}
+
+
+class MemoryFuture:
+    """Already-resolved stand-in for kafka-python's FutureRecordMetadata"""
+
+    __slots__ = ('_sent', 'exception')
+
+    def __init__(self, sent=None, exception=None):
+        # (topic, partition, offset, timestamp); RecordMetadata is only built when asked for
+        self._sent = sent
+        self.exception = exception
+
+    @property
+    def value(self):
+        if self._sent is None:
+            return None
+        topic, partition, offset, timestamp = self._sent
+        return RecordMetadata(topic, partition, TopicPartition(topic, partition), offset, timestamp)
+
+    def succeeded(self):
+        return self.exception is None
+
+    def failed(self):
+        return self.exception is not None
+
+    def add_callback(self, fn, *args, **kwargs):
+        if self.exception is None:
+            fn(*args, self.value, **kwargs)
+        return self
+
+    def add_errback(self, fn, *args, **kwargs):
+        if self.exception is not None:
+            fn(*args, self.exception, **kwargs)
+        return self
+
+    def get(self, timeout=None):
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+
+class MemoryProducer:
+    """KafkaProducer look-alike that appends straight to a MemoryBroker.
+
+    Sends are acknowledged synchronously, so callbacks run inside send()
+    and flush() has nothing to wait for.
+    """
+
+    def __init__(self, broker, value_serializer=None, key_serializer=None, max_request_size=1048576, **config):
+        self.broker = broker
+        self.value_serializer = value_serializer
+        self.key_serializer = key_serializer
+        self.max_request_size = max_request_size
+        self.config = config
+        self.sent = 0
+        self._closed = False
+
+    def send(self, topic, value=None, key=None, headers=None, partition=None, timestamp_ms=None):
+        if self._closed:
+            raise IllegalStateError("Cannot send after the producer is closed")
+        if self.key_serializer is not None and key is not None:
+            key = self.key_serializer(key)
+        if self.value_serializer is not None and value is not None:
+            value = self.value_serializer(value)
+        if not self.broker.available:
+            return MemoryFuture(exception=KafkaTimeoutError("Broker unavailable"))
+        if value is not None and len(value) > self.max_request_size:
+            return MemoryFuture(exception=MessageSizeTooLargeError(
+                f"The message is {len(value)} bytes, over max_request_size {self.max_request_size}"))
+        timestamp = int(time.time() * 1000) if timestamp_ms is None else timestamp_ms
+        partition, offset = self.broker._append(topic, partition, timestamp, key, value, headers or [])
+        self.sent += 1
+        return MemoryFuture((topic, partition, offset, timestamp))
+
+    def flush(self, timeout=None):
+        pass
+
+    def partitions_for(self, topic):
+        return self.broker.partitions_for(topic)
+
+    def close(self, timeout=None):
+        self._closed = True
+
+
+class MemoryConsumer:
+    """KafkaConsumer look-alike reading from a MemoryBroker.
+
+    Supports subscription by topic (joining ``group_id``, or reading every
+    partition without one), poll() with ``max_records``, commit() of
+    explicit or current offsets, auto-commit on each poll and on close,
+    pause()/resume(), seek(), position()/committed()/end_offsets() and
+    iteration with ``consumer_timeout_ms``.
+    """
+
+    def __init__(self, broker, *topics, group_id=None, auto_offset_reset='latest', enable_auto_commit=True,
+                 value_deserializer=None, key_deserializer=None, max_poll_records=500,
+                 consumer_timeout_ms=float('inf'), **config):
+        self.broker = broker
+        self.group_id = group_id
+        self.auto_offset_reset = auto_offset_reset
+        self.enable_auto_commit = enable_auto_commit
+        self.value_deserializer = value_deserializer
+        self.key_deserializer = key_deserializer
+        self.max_poll_records = max_poll_records
+        self.consumer_timeout_ms = consumer_timeout_ms
+        self.config = config
+        self.member_id = next(broker._member_ids)
+        self.topics = set()
+        self.generation = None
+        self._positions = {}
+        self._paused = set()
+        self._next_partition = 0
+        self._closed = False
+        if topics:
+            self.subscribe(topics)
+
+    def subscribe(self, topics):
+        for topic in topics:
+            self.broker.create_topic(topic)
+        self.topics = set(topics)
+        self.broker._join(self)
+
+    def subscription(self):
+        return set(self.topics)
+
+    def _refresh_assignment(self):
+        """Pick up this member's partitions after a rebalance (broker lock held)"""
+        if self.group_id is None:
+            assigned = {TopicPartition(topic, p) for topic in self.topics
+                        for p in range(len(self.broker._logs(topic)))}
+        else:
+            group = self.broker._groups[self.group_id]
+            if self.generation == group.generation:
+                return
+            self.generation = group.generation
+            assigned = group.assignment.get(self.member_id, set())
+        offsets = self.broker._groups[self.group_id].offsets if self.group_id is not None else {}
+        self._positions = {tp: self._positions[tp] if tp in self._positions else offsets.get(tp)
+                           for tp in assigned}
+        self._paused &= assigned
+
+    def _reset_position(self, tp, log):
+        return log.start if self.auto_offset_reset == 'earliest' else log.end
+
+    def poll(self, timeout_ms=0, max_records=None, update_offsets=True):
+        """{TopicPartition: [MemoryRecord]} of up to ``max_records``, waiting up to ``timeout_ms`` for any"""
+        if self._closed:
+            raise IllegalStateError("Consumer is closed")
+        if self.enable_auto_commit and self.group_id is not None:
+            self._commit_positions(quiet=True)
+        max_records = max_records or self.max_poll_records
+        deadline = time.monotonic() + timeout_ms / 1000.0
+        cond = self.broker._cond
+        with cond:
+            while True:
+                self._refresh_assignment()
+                fetched = self._fetch(max_records)
+                remaining = deadline - time.monotonic()
+                if fetched or remaining <= 0 or self._closed:
+                    break
+                self.broker._waiting += 1
+                try:
+                    cond.wait(remaining)
+                finally:
+                    self.broker._waiting -= 1
+        return {tp: [self._record(tp, offset, stored) for offset, stored in batch] for tp, batch in fetched}
+
+    def _fetch(self, max_records):
+        """Take records from the assigned partitions in turn (broker lock held)"""
+        partitions = sorted(tp for tp in self._positions if tp not in self._paused)
+        fetched = []
+        if not partitions:
+            return fetched
+        start = self._next_partition % len(partitions)
+        self._next_partition += 1
+        for tp in partitions[start:] + partitions[:start]:
+            if max_records <= 0:
+                break
+            log = self.broker._topics[tp.topic][tp.partition]
+            position = self._positions[tp]
+            if position is None or position < log.start or position > log.end:
+                position = self._reset_position(tp, log)
+            taken = log.records[position - log.start:position - log.start + max_records]
+            if taken:
+                fetched.append((tp, list(enumerate(taken, position))))
+                max_records -= len(taken)
+            self._positions[tp] = position + len(taken)
+        return fetched
+
+    def _record(self, tp, offset, stored):
+        timestamp, key, value, headers = stored
+        if self.key_deserializer is not None and key is not None:
+            key = self.key_deserializer(key)
+        if self.value_deserializer is not None and value is not None:
+            value = self.value_deserializer(value)
+        return MemoryRecord(tp.topic, tp.partition, offset, timestamp, 0, key, value, headers)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not hasattr(self, '_iterator'):
+            self._iterator = self._records()
+        return next(self._iterator)
+
+    def _records(self):
+        idle_since = time.monotonic()
+        while not self._closed:
+            records = self.poll(timeout_ms=min(1000, self.consumer_timeout_ms))
+            if records:
+                idle_since = time.monotonic()
+            elif (time.monotonic() - idle_since) * 1000 >= self.consumer_timeout_ms:
+                return
+            for batch in records.values():
+                yield from batch
+
+    def commit(self, offsets=None):
+        """Commit {TopicPartition: OffsetAndMetadata or int}, or every current position"""
+        if self.group_id is None:
+            raise IllegalStateError("Committing offsets requires a group_id")
+        if offsets is None:
+            self._commit_positions()
+            return
+        self.broker._commit(self, {tp: getattr(meta, 'offset', meta) for tp, meta in offsets.items()})
+
+    def _commit_positions(self, quiet=False):
+        with self.broker._lock:
+            offsets = {tp: position for tp, position in self._positions.items() if position is not None}
+        try:
+            self.broker._commit(self, offsets)
+        except CommitFailedError:
+            if not quiet:
+                raise
+
+    def committed(self, partition):
+        return self.broker.committed(self.group_id).get(partition)
+
+    def position(self, partition):
+        with self.broker._lock:
+            self._refresh_assignment()
+            position = self._positions[partition]
+            if position is None:
+                position = self._reset_position(partition, self.broker._topics[partition.topic][partition.partition])
+            return position
+
+    def seek(self, partition, offset):
+        with self.broker._lock:
+            self._refresh_assignment()
+            if partition not in self._positions:
+                raise IllegalStateError(f"{partition} is not assigned to this consumer")
+            self._positions[partition] = offset
+
+    def assignment(self):
+        with self.broker._lock:
+            self._refresh_assignment()
+            return set(self._positions)
+
+    def pause(self, *partitions):
+        self._paused.update(partitions)
+
+    def resume(self, *partitions):
+        self._paused.difference_update(partitions)
+
+    def paused(self):
+        return set(self._paused)
+
+    def partitions_for_topic(self, topic):
+        return self.broker.partitions_for(topic)
+
+    def end_offsets(self, partitions):
+        with self.broker._lock:
+            return {tp: self.broker._logs(tp.topic)[tp.partition].end for tp in partitions}
+
+    def beginning_offsets(self, partitions):
+        with self.broker._lock:
+            return {tp: self.broker._logs(tp.topic)[tp.partition].start for tp in partitions}
+
+    def close(self, autocommit=True):
+        if self._closed:
+            return
+        if autocommit and self.enable_auto_commit and self.group_id is not None:
+            self._commit_positions(quiet=True)
+        self._closed = True
+        self.broker._leave(self)
+        with self.broker._lock:
+            self.broker._cond.notify_all()
+
+
+_default_broker = None
+_default_lock = threading.Lock()
+
+
+def default_broker():
+    """The process-wide MemoryBroker used when KAFKA_TRANSPORT=memory"""
+    global _default_broker
+    with _default_lock:
+        if _default_broker is None:
+            _default_broker = MemoryBroker(partitions=KAFKA_CONFIG['memory_partitions'])
+        return _default_broker
+
+
+def get_transport(name=None):
+    """Broker for a transport name: None for 'kafka' (kafka-python), the shared MemoryBroker for 'memory'"""
+    name = name or KAFKA_CONFIG['transport']
+    if name == 'kafka':
+        return None
+    if name == 'memory':
+        return default_broker()
+    raise ValueError(f"Unknown Kafka transport '{name}', expected kafka or memory")
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+
+IDLE = 'idle'
+CONNECTING = 'connecting'
+READY = 'ready'
+RETRYING = 'retrying'
+UNAVAILABLE = 'unavailable'
+CLOSED = 'closed'
+
+
+class ManagedProducer:
+    """Creates a producer in the background and keeps it usable.
+
+    Nothing connects at construction. The first get() (or an explicit
+    start(), e.g. from a post-fork hook) starts a background thread that
+    calls ``factory()``; get() returns None until that succeeds, so request
+    handlers never wait on the broker. Failed attempts are retried with
+    exponential backoff. Once ready, the producer's ``healthy()`` (if it has
+    one) is polled every ``health_interval`` seconds and a producer that
+    reports lost connectivity is closed and created again.
+
+    The instance remembers the process that started it: after a fork, the
+    inherited producer (whose sockets and sender thread belong to the
+    parent) is dropped without being closed and the child starts its own.
+    An ImportError from ``factory`` means Kafka support is not installed;
+    the state becomes ``unavailable`` and no retries are made.
+    """
+
+    def __init__(self, factory, retry_initial=1.0, retry_max=60.0, health_interval=5.0,
+                 name='hangarstack-kafka-connect'):
+        self.factory = factory
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self.health_interval = health_interval
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._thread = None
+        self._producer = None
+        self.state = IDLE
+        self.last_error = None
+        self.connects = 0
+        self.failures = 0
+        self.reconnects = 0
+        self.started_at = None
+        self.ready_after_ms = None
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    @property
+    def ready(self) -> bool:
+        self._check_fork()
+        return self.state == READY
+
+    def start(self):
+        """Begin connecting in the background (no-op if already started, closed or unavailable)."""
+        self._check_fork()
+        with self._lock:
+            if self._thread is not None or self.state in (UNAVAILABLE, CLOSED):
+                return
+            self.state = CONNECTING
+            self.started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._run, args=(self._closing,), name=self.name, daemon=True)
+            self._thread.start()
+
+    def get(self):
+        """The producer if it is ready, otherwise None; starts connecting on first use. Never blocks."""
+        self._check_fork()
+        producer = self._producer
+        if producer is not None:
+            return producer
+        if self._thread is None:
+            self.start()
+        return None
+
+    def _run(self, closing):
+        # ``closing`` belongs to this thread's generation: _reset() replaces
+        # self._closing, and a superseded thread must not touch the new state
+        delay = self.retry_initial
+        while not closing.is_set() and closing is self._closing:
+            if self._producer is None:
+                try:
+                    producer = self.factory()
+                except ImportError as e:
+                    self.state = UNAVAILABLE
+                    self.last_error = str(e)
+                    self.logger.warning(f"Kafka dependencies not installed. Running without Kafka integration. Details: {e}")
+                    return
+                except Exception as e:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    self.state = RETRYING
+                    self.logger.warning(f"Kafka producer unavailable ({e}); retrying in {delay:.0f}s")
+                    closing.wait(delay)
+                    delay = min(delay * 2, self.retry_max)
+                    continue
+                with self._lock:
+                    if closing.is_set() or closing is not self._closing:
+                        self._close_quietly(producer)
+                        return
+                    self._producer = producer
+                    self.state = READY
+                    self.connects += 1
+                delay = self.retry_initial
+                if self.ready_after_ms is None:
+                    self.ready_after_ms = (time.monotonic() - self.started_at) * 1000
+                self.logger.info("Kafka producer initialized successfully")
+
+            if closing.wait(self.health_interval) or closing is not self._closing:
+                break
+            producer = self._producer
+            if producer is not None and not self._healthy(producer):
+                self.logger.warning("Kafka producer lost its connection, recreating it")
+                with self._lock:
+                    if self._producer is producer:
+                        self._producer = None
+                        self.state = RETRYING
+                        self.reconnects += 1
+                self._close_quietly(producer)
+
+    @staticmethod
+    def _healthy(producer) -> bool:
+        check = getattr(producer, 'healthy', None)
+        if check is None:
+            return True
+        try:
+            return bool(check())
+        except Exception:
+            return False
+
+    def _close_quietly(self, producer):
+        try:
+            producer.close()
+        except Exception as e:
+            self.logger.error(f"Error closing Kafka producer: {e}")
+
+    def close(self):
+        """Close the producer if one was created and stop the background thread.
+
+        Does not wait for a connection attempt in progress (creating a
+        KafkaProducer can block for as long as the broker is unreachable);
+        the thread closes whatever it creates once it sees the flag.
+        """
+        self._check_fork()
+        with self._lock:
+            self.state = CLOSED
+            producer, self._producer = self._producer, None
+            self._closing.set()
+        if producer is not None:
+            self._close_quietly(producer)
+            self.logger.info("Kafka producer closed")
+
+    def stats(self) -> dict:
+        self._check_fork()
+        return {
+            'state': self.state,
+            'connects': self.connects,
+            'failures': self.failures,
+            'reconnects': self.reconnects,
+            'ready_after_ms': None if self.ready_after_ms is None else round(self.ready_after_ms, 1),
+            'last_error': self.last_error,
+        }
@@ -4,12 +4,23 @@ Kafka Consumer Runner for HangarStack
 
 This script runs the Kafka consumer to process events from various topics.
 Useful for development and testing Kafka integration.
+
+Several topics (or "all") share one consumer in one process: each topic
+gets its own worker queue, so a slow handler only holds back its topic.
+
+Usage:
+  python -m hangar_stack.hangar_kafka.run_kafka_consumer aircraft_views
+  python -m hangar_stack.hangar_kafka.run_kafka_consumer aircraft_views search_queries
+  python -m hangar_stack.hangar_kafka.run_kafka_consumer all
+  python -m hangar_stack.hangar_kafka.run_kafka_consumer aircraft_views --batch --workers 4
 """
 
+import argparse
 import sys
 import logging
 from hangar_stack.hangar_kafka.kafka_consumer import HangarStackConsumer
 from hangar_stack.hangar_kafka.kafka_config import TOPICS
+from hangar_stack.hangar_kafka.topic_runner import MultiTopicRunner
 
 # Configure logging
 logging.basicConfig(
@@ -19,28 +30,55 @@ logging.basicConfig(
 
 def main():
     """Main function to run Kafka consumer"""
-    if len(sys.argv) < 2:
-        print("Usage: python run_kafka_consumer.py <topic_name>")
+    parser = argparse.ArgumentParser(description="Run the HangarStack Kafka consumer")
+    parser.add_argument('topic_names', nargs='*', metavar='topic_name',
+                        help="'all' or any of: " + ", ".join(TOPICS))
+    parser.add_argument('--batch', action='store_true',
+                        help="poll in batches and commit each one after it is processed")
+    parser.add_argument('--batch-size', type=int, help="records per poll (default: KAFKA_CONSUMER_BATCH_SIZE)")
+    parser.add_argument('--workers', type=int, help="handler lanes, 0 = inline (default: KAFKA_CONSUMER_WORKERS)")
+    parser.add_argument('--max-in-flight', type=int,
+                        help="uncommitted batches before polling pauses (default: KAFKA_CONSUMER_MAX_IN_FLIGHT)")
+    parser.add_argument('--queue-size', type=int,
+                        help="per-topic queue with several topics (default: KAFKA_CONSUMER_TOPIC_QUEUE_SIZE)")
+    args = parser.parse_args()
+
+    if not args.topic_names:
+        parser.print_usage()
         print("Available topics:")
         for topic_name, topic in TOPICS.items():
             print(f"  {topic_name}: {topic}")
         sys.exit(1)
     
-    topic_name = sys.argv[1]
+    topic_names = list(TOPICS) if 'all' in args.topic_names else args.topic_names
     
-    if topic_name not in TOPICS:
-        print(f"Error: Unknown topic '{topic_name}'")
-        print("Available topics:")
-        for topic_name, topic in TOPICS.items():
-            print(f"  {topic_name}: {topic}")
-        sys.exit(1)
+    for topic_name in topic_names:
+        if topic_name not in TOPICS:
+            print(f"Error: Unknown topic '{topic_name}'")
+            print("Available topics:")
+            for topic_name, topic in TOPICS.items():
+                print(f"  {topic_name}: {topic}")
+            sys.exit(1)
     
-    topic = TOPICS[topic_name]
-    print(f"Starting consumer for topic: {topic}")
+    topics = [TOPICS[topic_name] for topic_name in topic_names]
+    topic = topics[0] if len(topics) == 1 else topics
+    print(f"Starting consumer for topic: {', '.join(topics)}")
     
     try:
-        consumer = HangarStackConsumer(topic)
-        consumer.consume_messages()
+        if args.batch:
+            # Thread lanes: the default handlers are the consumer's own methods
+            consumer = HangarStackConsumer(topic, enable_auto_commit=False)
+            stats = consumer.consume_batches(max_records=args.batch_size, workers=args.workers,
+                                             executor='thread', max_in_flight=args.max_in_flight)
+            print(f"Processed {stats['records']} records in {stats['batches']} batches")
+        elif len(topics) > 1:
+            runner = MultiTopicRunner(topics, queue_size=args.queue_size)
+            stats = runner.run(max_records=args.batch_size)
+            for name, worker in stats.items():
+                print(f"  {name}: {worker['processed']} processed")
+        else:
+            consumer = HangarStackConsumer(topic)
+            consumer.consume_messages()
     except KeyboardInterrupt:
         print("\nShutting down consumer...")
     except Exception as e:
@@ -0,0 +1,273 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteSink:
+    """Aggregates in a local SQLite file, one transaction per flush.
+
+    ``counters`` holds running totals (name, field) -> value, updated with
+    an upsert that adds to the stored value; ``latest`` holds the last
+    value written for (name, field), e.g. a window result as JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS counters ('
+                                    'name TEXT NOT NULL, field TEXT NOT NULL, value INTEGER NOT NULL, '
+                                    'updated TEXT NOT NULL, PRIMARY KEY (name, field))')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS latest ('
+                                    'name TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, '
+                                    'updated TEXT NOT NULL, PRIMARY KEY (name, field))')
+
+    def write(self, increments, values):
+        now = datetime.utcnow().isoformat()
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO counters (name, field, value, updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (name, field) DO UPDATE SET value = value + excluded.value, updated = excluded.updated',
+                [(name, field, amount, now) for (name, field), amount in increments.items()])
+            self.connection.executemany(
+                'INSERT INTO latest (name, field, value, updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (name, field) DO UPDATE SET value = excluded.value, updated = excluded.updated',
+                [(name, field, value, now) for (name, field), value in values.items()])
+
+    def counters(self, name):
+        return dict(self.connection.execute('SELECT field, value FROM counters WHERE name = ?', (name,)))
+
+    def latest(self, name):
+        return dict(self.connection.execute('SELECT field, value FROM latest WHERE name = ?', (name,)))
+
+    def close(self):
+        self.connection.close()
+
+
+class RedisSink:
+    """Aggregates in Redis hashes, one pipelined round trip per flush.
+
+    Counters become ``HINCRBY name field amount`` and latest values
+    ``HSET name field value``. ``client`` is a redis-py client or anything
+    with the same pipeline() interface, such as MemoryRedis.
+    """
+
+    def __init__(self, client, prefix='hangarstack:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, prefix='hangarstack:'):
+        import redis
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def write(self, increments, values):
+        pipe = self.client.pipeline(transaction=False)
+        for (name, field), amount in increments.items():
+            pipe.hincrby(self.prefix + name, field, amount)
+        for (name, field), value in values.items():
+            pipe.hset(self.prefix + name, field, value)
+        pipe.execute()
+
+    def counters(self, name):
+        return {_text(k): int(v) for k, v in self.client.hgetall(self.prefix + name).items()}
+
+    def latest(self, name):
+        return {_text(k): _text(v) for k, v in self.client.hgetall(self.prefix + name).items()}
+
+    def close(self):
+        close = getattr(self.client, 'close', None)
+        if close is not None:
+            close()
+
+
+def _text(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+class MemoryRedis:
+    """In-process stand-in for the Redis commands RedisSink uses (no server needed)"""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def pipeline(self, transaction=True):
+        return _MemoryPipeline(self)
+
+    def incrby(self, key, amount=1):
+        with self._lock:
+            self.data[key] = int(self.data.get(key, 0)) + amount
+            return self.data[key]
+
+    def hincrby(self, name, field, amount=1):
+        with self._lock:
+            fields = self.data.setdefault(name, {})
+            fields[field] = int(fields.get(field, 0)) + amount
+            return fields[field]
+
+    def hset(self, name, field, value):
+        with self._lock:
+            self.data.setdefault(name, {})[field] = value
+            return 1
+
+    def hget(self, name, field):
+        return self.data.get(name, {}).get(field)
+
+    def hgetall(self, name):
+        return dict(self.data.get(name, {}))
+
+
+class _MemoryPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, command):
+        def queue(*args):
+            self.commands.append((command, args))
+            return self
+        return queue
+
+    def execute(self):
+        self.client.round_trips += 1
+        results = [getattr(self.client, command)(*args) for command, args in self.commands]
+        self.commands = []
+        return results
+
+
+def create_sink(kind, path=None, redis_url=None):
+    """Sink from configuration: 'sqlite' (at ``path``), 'redis' (at ``redis_url``), 'memory' or 'none'"""
+    if kind in (None, '', 'none'):
+        return None
+    if kind == 'sqlite':
+        return SqliteSink(path)
+    if kind == 'redis':
+        return RedisSink.from_url(redis_url)
+    if kind == 'memory':
+        return RedisSink(MemoryRedis())
+    raise ValueError(f"Unknown sink '{kind}', expected one of sqlite, redis, memory, none")
+
+
+class BufferedWriter:
+    """Accumulates aggregates in memory and writes them to a sink in bulk.
+
+    incr() adds to a pending counter and put() replaces a pending value, so
+    a burst of events for the same key becomes one row. Pending data is
+    flushed when ``max_pending`` distinct keys are waiting or
+    ``flush_interval`` seconds have passed since the last flush (checked
+    on every call, and by a background thread once start() is called).
+    A failed flush keeps its data for the next attempt; flush(raise_errors=True)
+    also re-raises the sink's error, for callers that must not go on as if
+    the rows were stored (such as committing Kafka offsets). Thread-safe.
+    """
+
+    def __init__(self, sink, max_pending=5000, flush_interval=1.0, clock=time.monotonic):
+        self.sink = sink
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._increments = {}
+        self._values = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._next_flush = clock() + flush_interval
+        self._closing = threading.Event()
+        self._thread = None
+
+        self.flushes = 0
+        self.failures = 0
+        self.rows = 0
+        self.flush_seconds = 0.0
+        self.last_flush_ms = None
+
+    @property
+    def pending(self):
+        return len(self._increments) + len(self._values)
+
+    def incr(self, name, field, amount=1):
+        key = (name, field)
+        with self._lock:
+            self._increments[key] = self._increments.get(key, 0) + amount
+        self.maybe_flush()
+
+    def put(self, name, field, value):
+        with self._lock:
+            self._values[(name, field)] = value
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if self.pending >= self.max_pending or self.clock() >= self._next_flush:
+            self.flush()
+
+    def flush(self, raise_errors=False):
+        """Write everything pending in one sink call; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                increments, self._increments = self._increments, {}
+                values, self._values = self._values, {}
+                self._next_flush = self.clock() + self.flush_interval
+            rows = len(increments) + len(values)
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.sink.write(increments, values)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Flushing {rows} aggregate rows failed, keeping them for the next flush: {e}")
+                with self._lock:
+                    for key, amount in increments.items():
+                        self._increments[key] = self._increments.get(key, 0) + amount
+                    for key, value in values.items():
+                        self._values.setdefault(key, value)
+                if raise_errors:
+                    raise
+                return 0
+            elapsed = time.perf_counter() - started
+            self.flushes += 1
+            self.rows += rows
+            self.flush_seconds += elapsed
+            self.last_flush_ms = elapsed * 1000
+            logger.debug(f"Flushed {rows} aggregate rows in {self.last_flush_ms:.1f} ms")
+            return rows
+
+    def start(self):
+        """Flush on the time threshold from a background thread too, even when no events arrive"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='hangarstack-sink-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closing.wait(self.flush_interval):
+            self.maybe_flush()
+
+    def close(self):
+        self._closing.set()
+        self.flush()
+        self.sink.close()
+
+    def stats(self):
+        return {
+            'pending': self.pending,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'rows': self.rows,
+            'last_flush_ms': None if self.last_flush_ms is None else round(self.last_flush_ms, 2),
+            'rows_per_s': round(self.rows / self.flush_seconds) if self.flush_seconds else None,
+        }
+
+
+def window_result_sink(writer):
+    """ViewAggregator sink that stores each window's latest result through ``writer``"""
+    def write(results):
+        for result in results:
+            writer.put('view_windows', f"{result['kind']}:{result['window']}", json.dumps(result))
+    return write
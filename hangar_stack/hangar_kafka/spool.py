@@ -0,0 +1,481 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from hangar_stack.hangar_kafka.events import EventTracker
+
+logger = logging.getLogger(__name__)
+
+# fcntl is POSIX only; slot locks fall back to msvcrt byte locks on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+SEGMENT_SUFFIX = '.spool'
+CURSOR_FILE = 'cursor.json'
+LOCK_FILE = 'lock'
+
+
+class EventSpool:
+    """Append-only on-disk queue of tracking events for when Kafka is unreachable.
+
+    Events are JSON lines in numbered segment files under a slot directory
+    ``root/<n>``. Each process locks its own slot on first use (flock, or
+    msvcrt on Windows), so forked workers never share files, and a
+    restarted worker takes over a slot left by one that died. Opening a slot
+    also moves the events of any other unlocked slot into it, so nothing is
+    stranded when fewer workers are started. Appends are fsynced in
+    batches: after ``fsync_batch`` events or ``fsync_interval`` seconds,
+    whichever comes first. When the spool grows past ``max_bytes`` the
+    oldest segment is dropped. Readers take events in append order and
+    commit() the position once they have been delivered; fully read
+    segments are deleted.
+
+    The number of undelivered events per key is kept in memory (rebuilt from
+    the segments when a slot is opened), so has_pending() tells a producer
+    whether a key's next event may bypass the spool without overtaking it.
+    """
+
+    def __init__(self, root, segment_bytes=8 * 1024 * 1024, max_bytes=256 * 1024 * 1024,
+                 fsync_batch=100, fsync_interval=1.0):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self._lock = threading.RLock()
+        self._pid = None
+        self.directory = None
+
+    def _ensure_open(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._open()
+
+    def _open(self):
+        os.makedirs(self.root, exist_ok=True)
+        slot = 0
+        while True:
+            directory = os.path.join(self.root, str(slot))
+            os.makedirs(directory, exist_ok=True)
+            lock = _try_lock(os.path.join(directory, LOCK_FILE))
+            if lock is not None:
+                break
+            slot += 1
+        self._pid = os.getpid()
+        self._lock_file = lock
+        self.directory = directory
+        self._writer = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.appended = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.corrupt = 0
+        self.adopted = 0
+
+        segments = self._segments()
+        if segments:
+            self._truncate_partial(segments[-1])
+        cursor = self._read_cursor()
+        if cursor is None or cursor[0] not in segments:
+            cursor = (segments[0], 0) if segments else (None, 0)
+        self._cursor = cursor
+        self._keys = self._keys_from(cursor)
+        self.depth = sum(self._keys.values())
+        self.depth_bytes = self._bytes_from(cursor)
+        self._adopt_orphans()
+        if self.depth:
+            logger.info(f"Spool {directory} holds {self.depth} undelivered events")
+
+    def _adopt_orphans(self):
+        """Take over undelivered events from unlocked slots, e.g. after restarting with fewer workers"""
+        for name in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, name)
+            if not name.isdigit() or directory == self.directory or not os.path.isdir(directory):
+                continue
+            if not any(n.endswith(SEGMENT_SUFFIX) for n in os.listdir(directory)):
+                continue
+            lock = _try_lock(os.path.join(directory, LOCK_FILE))
+            if lock is None:
+                continue
+            try:
+                count = self._adopt(directory)
+            finally:
+                lock.close()
+            if count:
+                logger.info(f"Spool {self.directory} took over {count} undelivered events from {directory}")
+
+    def _adopt(self, directory):
+        """Copy the undelivered events of the slot at ``directory`` into this one, then empty it"""
+        segments = self._segments(directory)
+        try:
+            with open(os.path.join(directory, CURSOR_FILE)) as f:
+                cursor = json.load(f)
+            cursor = cursor['segment'], cursor['offset']
+        except (OSError, ValueError, KeyError):
+            cursor = None
+        if cursor is None or cursor[0] not in segments:
+            cursor = (segments[0], 0)
+        paths = [os.path.join(directory, f"{s:012d}{SEGMENT_SUFFIX}") for s in segments]
+        count = 0
+        for segment, path in zip(segments, paths):
+            if segment < cursor[0]:
+                continue
+            with open(path, 'rb') as f:
+                if segment == cursor[0]:
+                    f.seek(cursor[1])
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        self.corrupt += 1
+                        break
+                    self._current_writer(len(line)).write(line)
+                    self._keys[_key_of(line)] += 1
+                    self.depth += 1
+                    self.depth_bytes += len(line)
+                    self._unsynced += 1
+                    count += 1
+        # Copies are on disk before the originals go; a crash in between replays them twice
+        self.sync()
+        for path in paths:
+            os.remove(path)
+        try:
+            os.remove(os.path.join(directory, CURSOR_FILE))
+        except FileNotFoundError:
+            pass
+        self.adopted += count
+        return count
+
+    def _segments(self, directory=None):
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(directory or self.directory)
+                      if name.endswith(SEGMENT_SUFFIX))
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"{segment:012d}{SEGMENT_SUFFIX}")
+
+    def _truncate_partial(self, segment):
+        """Cut a line torn by a crash mid-write off the newest segment"""
+        path = self._path(segment)
+        with open(path, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end != len(data):
+                f.truncate(end)
+                self.corrupt += 1
+
+    def _read_cursor(self):
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                cursor = json.load(f)
+            return cursor['segment'], cursor['offset']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_cursor(self):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.cursor-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'segment': self._cursor[0], 'offset': self._cursor[1]}, f)
+        os.replace(tmp, os.path.join(self.directory, CURSOR_FILE))
+
+    def _keys_from(self, cursor):
+        """Undelivered events per key from ``cursor`` on (unreadable lines count under None)"""
+        segment, offset = cursor
+        keys = Counter()
+        for s in self._segments():
+            if segment is not None and s < segment:
+                continue
+            with open(self._path(s), 'rb') as f:
+                if s == segment:
+                    f.seek(offset)
+                for line in f:
+                    keys[_key_of(line)] += 1
+        return keys
+
+    def _bytes_from(self, cursor):
+        segment, offset = cursor
+        total = 0
+        for s in self._segments():
+            if segment is not None and s < segment:
+                continue
+            total += os.path.getsize(self._path(s)) - (offset if s == segment else 0)
+        return total
+
+    def append(self, topic, key, event):
+        """Store one event; returns False only if it could not be written"""
+        line = (json.dumps({'t': topic, 'k': key, 'v': event}, separators=(',', ':')) + '\n').encode('utf-8')
+        try:
+            self._ensure_open()
+            with self._lock:
+                writer = self._current_writer(len(line))
+                writer.write(line)
+                self.appended += 1
+                self.depth += 1
+                self._keys[key] += 1
+                self.depth_bytes += len(line)
+                self._unsynced += 1
+                if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+                    self.sync()
+            return True
+        except OSError as e:
+            logger.error(f"Could not spool event for {topic}: {e}")
+            return False
+
+    def _current_writer(self, incoming):
+        if self._writer is not None and self._writer.tell() + incoming <= self.segment_bytes:
+            return self._writer
+        segments = self._segments()
+        if self._writer is not None:
+            self.sync()
+            self._writer.close()
+        segment = segments[-1] + 1 if segments else 1
+        if self._writer is None and segments and os.path.getsize(self._path(segments[-1])) + incoming <= self.segment_bytes:
+            segment = segments[-1]
+        self._writer = open(self._path(segment), 'ab', buffering=0)
+        if self._cursor[0] is None:
+            self._cursor = (segment, 0)
+        self._enforce_cap()
+        return self._writer
+
+    def _enforce_cap(self):
+        segments = self._segments()
+        while self.depth_bytes > self.max_bytes and len(segments) > 1:
+            oldest = segments.pop(0)
+            start = self._cursor[1] if oldest == self._cursor[0] else 0
+            path = self._path(oldest)
+            size = os.path.getsize(path) - start
+            lost = 0
+            with open(path, 'rb') as f:
+                f.seek(start)
+                for line in f:
+                    self._forget(_key_of(line))
+                    lost += 1
+            os.remove(path)
+            self.dropped += lost
+            self.depth -= lost
+            self.depth_bytes -= size
+            self._cursor = (segments[0], 0)
+            self._write_cursor()
+            logger.warning(f"Spool over {self.max_bytes} bytes, dropped {lost} oldest events")
+
+    def sync(self):
+        """fsync appended events to disk"""
+        with self._lock:
+            if self._writer is not None and self._unsynced:
+                os.fsync(self._writer.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def _forget(self, key, count=1):
+        remaining = self._keys[key] - count
+        if remaining > 0:
+            self._keys[key] = remaining
+        else:
+            del self._keys[key]
+
+    def has_pending(self, key):
+        """True while events for ``key`` wait in this process's slot"""
+        try:
+            self._ensure_open()
+        except OSError:
+            return False
+        return key in self._keys
+
+    def read(self, max_records=100):
+        """Up to ``max_records`` undelivered events (dicts with t, k, v) and the position after them"""
+        self._ensure_open()
+        with self._lock:
+            segment, offset = self._cursor
+            records = []
+            consumed = Counter()
+            while segment is not None and len(records) < max_records:
+                path = self._path(segment)
+                if not os.path.exists(path):
+                    break
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    while len(records) < max_records:
+                        line = f.readline()
+                        if not line.endswith(b'\n'):
+                            break
+                        offset += len(line)
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            self.corrupt += 1
+                            consumed[None] += 1
+                            continue
+                        records.append(record)
+                        consumed[record.get('k')] += 1
+                if len(records) >= max_records:
+                    break
+                later = [s for s in self._segments() if s > segment]
+                if not later:
+                    break
+                segment, offset = later[0], 0
+            return records, (segment, offset, sum(consumed.values()), consumed)
+
+    def commit(self, position):
+        """Mark everything read up to ``position`` as delivered and delete finished segments"""
+        segment, offset, consumed, keys = position
+        with self._lock:
+            old_segment, old_offset = self._cursor
+            if old_segment is not None and segment < old_segment:
+                # The size cap dropped these segments while they were replayed
+                return
+            for s in self._segments():
+                if s < segment:
+                    self.depth_bytes -= os.path.getsize(self._path(s)) - (old_offset if s == old_segment else 0)
+                    os.remove(self._path(s))
+            self.depth_bytes -= offset - (old_offset if segment == old_segment else 0)
+            self._cursor = (segment, offset)
+            self.depth -= consumed
+            self.replayed += consumed
+            for key, count in keys.items():
+                self._forget(key, count)
+            if not self.depth:
+                self._keys.clear()
+            self._write_cursor()
+
+    def stats(self):
+        if self._pid != os.getpid():
+            return {'depth': 0, 'depth_bytes': 0}
+        return {
+            'directory': self.directory,
+            'depth': self.depth,
+            'depth_bytes': self.depth_bytes,
+            'pending_keys': len(self._keys),
+            'appended': self.appended,
+            'replayed': self.replayed,
+            'dropped': self.dropped,
+            'corrupt': self.corrupt,
+            'adopted': self.adopted,
+        }
+
+    @property
+    def pending(self):
+        """Undelivered events in this process's slot (opens the slot on first use)"""
+        try:
+            self._ensure_open()
+        except OSError:
+            return 0
+        return self.depth
+
+    def close(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            if self._writer is not None:
+                self.sync()
+                self._writer.close()
+                self._writer = None
+            self._lock_file.close()
+            self._pid = None
+
+
+class SpoolReplayer:
+    """Background thread draining a spool through ``send_batch`` at up to ``rate`` events/sec.
+
+    ``send_batch(records)`` must return True only once every record was
+    acknowledged; the spool position advances only then, so a failure
+    resends the batch later (at-least-once). Batches go strictly in spool
+    order, which keeps each key's events in order.
+
+    While new events reach the spool faster than they are replayed (live
+    traffic on keys that still have a backlog), the rate doubles after
+    each batch, up to ``max_rate``; it falls back to ``rate`` once the
+    spool is empty.
+    """
+
+    def __init__(self, spool, send_batch, rate=500.0, max_rate=None, batch_size=100, idle_interval=1.0,
+                 retry_interval=5.0, name='hangarstack-spool-replay'):
+        self.spool = spool
+        self.send_batch = send_batch
+        self.base_rate = rate
+        self.max_rate = max(rate, max_rate or rate)
+        self.rate = rate
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.retry_interval = retry_interval
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        previous = None
+        while not self._closing.is_set():
+            depth = self.spool.pending
+            if not depth:
+                self.rate = self.base_rate
+                previous = None
+                self._closing.wait(self.idle_interval)
+                continue
+            if previous is not None and depth >= previous:
+                # The last batch and its pause did not shrink the backlog
+                self.rate = min(self.rate * 2, self.max_rate)
+            previous = depth
+            started = time.monotonic()
+            records, position = self.spool.read(self.batch_size)
+            if not position[2]:
+                self._closing.wait(self.idle_interval)
+                continue
+            try:
+                delivered = self.send_batch(records) if records else True
+            except Exception as e:
+                logger.warning(f"Replaying spooled events failed: {e}")
+                delivered = False
+            if not delivered:
+                previous = None
+                self._closing.wait(self.retry_interval)
+                continue
+            self.spool.commit(position)
+            # Bounded rate: a batch of n events takes at least n / rate seconds
+            self._closing.wait(max(0.0, len(records) / self.rate - (time.monotonic() - started)))
+
+    def close(self, timeout=5.0):
+        self._closing.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+
+def _try_lock(path):
+    """The open lock file at ``path``, held exclusively, or None if another process holds it"""
+    lock = open(path, 'a')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        return lock
+    except OSError:
+        lock.close()
+        return None
+
+
+def _key_of(line):
+    try:
+        return json.loads(line).get('k')
+    except ValueError:
+        return None
+
+
+class SpoolTracker(EventTracker):
+    """Tracks events straight into the spool while no Kafka producer is available"""
+
+    def __init__(self, spool):
+        self.spool = spool
+
+    def _send_message(self, topic, message, key=None):
+        self.spool.append(topic, key, message)
+
+    def tracking_stats(self):
+        return {'mode': 'spool', 'spool': self.spool.stats()}
@@ -0,0 +1,162 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from hangar_stack.hangar_kafka.kafka_config import CONSUMER_CONFIG
+from hangar_stack.hangar_kafka.kafka_consumer import HangarStackConsumer
+
+_STOP = object()
+
+
+class TopicWorker:
+    """A bounded queue and thread that handle one topic's messages in order.
+
+    Records that do not fit in the queue wait in ``backlog``; while it is
+    not empty the runner pauses the topic's partitions, so a slow handler
+    holds back only its own topic.
+    """
+
+    def __init__(self, topic, handle, queue_size):
+        self.topic = topic
+        self.handle = handle
+        self.queue = queue.Queue(queue_size)
+        self.backlog = deque()
+        self.paused = False
+        self.processed = 0
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._done = {}
+        self._thread = threading.Thread(target=self._run, name=f"hangarstack-topic-{topic}", daemon=True)
+        self._thread.start()
+
+    def offer(self, tp, messages):
+        self.backlog.extend((tp, m) for m in messages)
+        self.fill()
+
+    def fill(self):
+        """Move backlog into the queue while there is room; True once the backlog is empty"""
+        while self.backlog:
+            try:
+                self.queue.put_nowait(self.backlog[0])
+            except queue.Full:
+                return False
+            self.backlog.popleft()
+        return True
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            tp, message = item
+            # process_message logs handler errors itself; the offset still
+            # counts as done so one bad event cannot wedge the topic
+            self.handle(message)
+            with self._lock:
+                self._done[tp] = message.offset + 1
+                self.processed += 1
+
+    def take_done(self):
+        """{TopicPartition: next offset} handled since the last call"""
+        with self._lock:
+            done, self._done = self._done, {}
+        return done
+
+    def stop(self, timeout=None):
+        """Finish what is already queued (the backlog is left for redelivery) and stop"""
+        self.backlog.clear()
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'backlog': len(self.backlog),
+            'paused': self.paused,
+            'processed': self.processed,
+        }
+
+
+class MultiTopicRunner:
+    """One consumer for several topics, with a worker thread and queue per topic.
+
+    Messages are routed through the consumer's dispatch table
+    (HangarStackConsumer.register / handler_for) by topic and event_type.
+    Each topic is handled on its own thread in offset order; a topic whose
+    queue is full is paused at the broker until its worker catches up,
+    while the other topics keep flowing. Offsets are committed every
+    ``commit_interval`` seconds up to the last message each worker has
+    finished, so a crash redelivers at most that much (at-least-once).
+    """
+
+    def __init__(self, topics, group_id='hangarstack_group', queue_size=None, commit_interval=1.0,
+                 consumer=None, **consumer_options):
+        self.topics = list(topics)
+        self.consumer = consumer or HangarStackConsumer(self.topics, group_id=group_id,
+                                                        enable_auto_commit=False, **consumer_options)
+        self.queue_size = queue_size or CONSUMER_CONFIG['topic_queue_size']
+        self.commit_interval = commit_interval
+        self.logger = logging.getLogger(__name__)
+        self.workers = {topic: TopicWorker(topic, self.consumer.process_message, self.queue_size)
+                        for topic in self.topics}
+        self._stopping = threading.Event()
+        self._next_commit = time.monotonic() + commit_interval
+
+    def register(self, event_type, handler, topic=None):
+        self.consumer.register(event_type, handler, topic)
+
+    def run(self, max_records=None, timeout_ms=None):
+        """Poll and dispatch until stop() or Ctrl-C; returns stats()"""
+        max_records = max_records or CONSUMER_CONFIG['batch_size']
+        timeout_ms = timeout_ms or CONSUMER_CONFIG['poll_timeout_ms']
+        kafka = self.consumer.consumer
+        self.logger.info(f"Consuming {len(self.topics)} topic(s) with one worker queue of {self.queue_size} each")
+        try:
+            while not self._stopping.is_set():
+                self._apply_backpressure(kafka)
+                records = kafka.poll(timeout_ms=timeout_ms, max_records=max_records)
+                for tp, messages in records.items():
+                    self.workers[tp.topic].offer(tp, messages)
+                if time.monotonic() >= self._next_commit:
+                    self.commit()
+        except KeyboardInterrupt:
+            self.logger.info("Stopping consumer...")
+        finally:
+            for worker in self.workers.values():
+                worker.stop()
+            self.commit()
+            self.consumer.close()
+        return self.stats()
+
+    def _apply_backpressure(self, kafka):
+        for topic, worker in self.workers.items():
+            if worker.fill():
+                if worker.paused:
+                    kafka.resume(*self._partitions(kafka, topic))
+                    worker.paused = False
+            else:
+                # Re-pausing every round also covers partitions gained in a rebalance
+                kafka.pause(*self._partitions(kafka, topic))
+                if not worker.paused:
+                    self.logger.info(f"Topic {topic} is behind, pausing it")
+                    worker.paused = True
+
+    @staticmethod
+    def _partitions(kafka, topic):
+        return [tp for tp in kafka.assignment() if tp.topic == topic]
+
+    def commit(self):
+        self._next_commit = time.monotonic() + self.commit_interval
+        done = {}
+        for worker in self.workers.values():
+            done.update(worker.take_done())
+        if done:
+            self.consumer.commit_offsets(done)
+
+    def stop(self):
+        self._stopping.set()
+
+    def stats(self):
+        return {topic: worker.stats() for topic, worker in self.workers.items()}
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (name, window seconds, slots): sliding counts cover the last full window
+# at slot granularity, and a tumbling result is emitted for every aligned
+# window that closes
+DEFAULT_WINDOWS = (
+    ('1m', 60, 12),
+    ('1h', 3600, 60),
+    ('24h', 86400, 24),
+)
+
+
+def sketch_columns(key, width, depth):
+    """Flat table offset of ``key`` in each of ``depth`` rows (double hashing over one 128-bit digest)"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:], 'little') | 1
+    return tuple(row * width + (h1 + row * h2) % width for row in range(depth))
+
+
+class CountMinSketch:
+    """Fixed-size approximate counter: never undercounts, overcounts by at most ~total*e/width.
+
+    Memory is ``depth * width`` int32 counters regardless of how many
+    distinct keys are added. Counters live in a flat array so single
+    updates stay cheap; numpy is only used to merge sketches.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = array('i', bytes(4 * width * depth))
+
+    def indexes(self, key):
+        return sketch_columns(key, self.width, self.depth)
+
+    def add(self, key, count=1, columns=None):
+        """Count ``key`` and return its new estimate"""
+        table = self.table
+        estimate = None
+        for i in (self.indexes(key) if columns is None else columns):
+            value = table[i] + count
+            table[i] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def estimate(self, key, columns=None):
+        table = self.table
+        return min(table[i] for i in (self.indexes(key) if columns is None else columns))
+
+    def clear(self):
+        self.table = array('i', bytes(4 * self.width * self.depth))
+
+    @staticmethod
+    def merge(sketches):
+        """Element-wise sum of sketches of the same shape, as a numpy array"""
+        return np.sum([np.frombuffer(s.table, dtype=np.int32) for s in sketches], axis=0, dtype=np.int64)
+
+
+class TopK:
+    """The ``k`` keys with the highest sketch estimates seen so far (heavy hitters)"""
+
+    def __init__(self, k=20):
+        self.k = k
+        self.counts = {}
+        self._min_key = None
+
+    def offer(self, key, estimate):
+        counts = self.counts
+        if key in counts:
+            counts[key] = estimate
+            if key == self._min_key:
+                self._min_key = None
+            return
+        if len(counts) < self.k:
+            counts[key] = estimate
+            self._min_key = None
+            return
+        min_key = self._current_min()
+        if estimate > counts[min_key]:
+            del counts[min_key]
+            counts[key] = estimate
+            self._min_key = None
+
+    def _current_min(self):
+        if self._min_key is None:
+            self._min_key = min(self.counts, key=self.counts.get)
+        return self._min_key
+
+    def clear(self):
+        self.counts.clear()
+        self._min_key = None
+
+
+class _Slot:
+    __slots__ = ('index', 'sketch', 'top', 'total')
+
+    def __init__(self, width, depth, k):
+        self.index = None
+        self.sketch = CountMinSketch(width, depth)
+        self.top = TopK(k)
+        self.total = 0
+
+    def reset(self, index):
+        self.index = index
+        self.sketch.clear()
+        self.top.clear()
+        self.total = 0
+
+
+class WindowedCounter:
+    """Sliding counts over the last ``window`` seconds, kept in ``slots`` ring buckets.
+
+    Each bucket has its own sketch and top-K, so memory is fixed. When an
+    event opens a new aligned window the counts of the window just closed
+    are returned from add() as its tumbling result. Events older than the
+    ring are counted in ``late`` and ignored.
+    """
+
+    def __init__(self, name, window, slots, width=2048, depth=4, k=20):
+        if window % slots:
+            raise ValueError(f"Window {window}s is not a multiple of {slots} slots")
+        self.name = name
+        self.window = window
+        self.slots = slots
+        self.slot_length = window // slots
+        self.k = k
+        self._ring = [_Slot(width, depth, k) for _ in range(slots)]
+        self._current = None
+        self.late = 0
+
+    def add(self, key, ts, columns=None):
+        """Count ``key`` at unix time ``ts``; returns the tumbling result of a window that just closed, or None"""
+        index = int(ts // self.slot_length)
+        closed = None
+        if self._current is None:
+            self._current = index
+        elif index > self._current:
+            if index // self.slots > self._current // self.slots:
+                closed = self._tumbling(self._current // self.slots)
+            self._current = index
+        elif index <= self._current - self.slots:
+            self.late += 1
+            return None
+
+        slot = self._ring[index % self.slots]
+        if slot.index != index:
+            slot.reset(index)
+        slot.top.offer(key, slot.sketch.add(key, columns=columns))
+        slot.total += 1
+        return closed
+
+    def _live(self, first_index):
+        return [s for s in self._ring if s.index is not None and first_index <= s.index <= self._current]
+
+    def _summary(self, slots, n):
+        if not slots:
+            return 0, []
+        merged = CountMinSketch.merge([s.sketch for s in slots]).tolist()
+        sketch = slots[0].sketch
+        candidates = set()
+        for s in slots:
+            candidates.update(s.top.counts)
+        estimates = [(key, min(merged[i] for i in sketch.indexes(key))) for key in candidates]
+        estimates.sort(key=lambda item: (-item[1], item[0]))
+        return sum(s.total for s in slots), estimates[:n]
+
+    def _tumbling(self, window_number):
+        first = window_number * self.slots
+        total, top = self._summary(self._live(first), self.k)
+        start = first * self.slot_length
+        return {'kind': 'tumbling', 'window': self.name, 'start': start, 'end': start + self.window,
+                'total': total, 'top': top}
+
+    def sliding(self, now=None, n=None):
+        """Counts for the ``window`` seconds ending at the newest slot (or at ``now``)"""
+        if self._current is None:
+            return {'kind': 'sliding', 'window': self.name, 'end': now, 'total': 0, 'top': []}
+        newest = self._current if now is None else max(self._current, int(now // self.slot_length))
+        total, top = self._summary(self._live(newest - self.slots + 1), n or self.k)
+        end = (newest + 1) * self.slot_length
+        return {'kind': 'sliding', 'window': self.name, 'end': end, 'total': total, 'top': top}
+
+    def estimate(self, key, now=None):
+        """Approximate views of ``key`` in the sliding window"""
+        if self._current is None:
+            return 0
+        newest = self._current if now is None else max(self._current, int(now // self.slot_length))
+        slots = self._live(newest - self.slots + 1)
+        if not slots:
+            return 0
+        return min(sum(s.sketch.table[i] for s in slots) for i in slots[0].sketch.indexes(key))
+
+
+def log_sink(results):
+    """Default sink: log each window result"""
+    for result in results:
+        top = ', '.join(f"{key}={count}" for key, count in result['top'][:5])
+        logger.info(f"{result['kind']} {result['window']} views: {result['total']} (top: {top})")
+
+
+class JsonLinesSink:
+    """Append each window result as one JSON line to ``path``"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, results):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+
+
+def event_time(event, default):
+    """Unix time of an event's ISO 'timestamp' (UTC, as the producer writes it), or ``default``"""
+    value = event.get('timestamp')
+    if not value:
+        return default
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class ViewAggregator:
+    """Per-designation view counts over tumbling and sliding windows with bounded memory.
+
+    Tumbling results go to ``sink`` as soon as a window closes; sliding
+    results for every window are sent every ``emit_interval`` seconds (of
+    the ``clock``) by maybe_emit(), which record() calls for you. ``sink``
+    receives a list of result dicts. Thread-safe.
+    """
+
+    def __init__(self, sink=log_sink, windows=DEFAULT_WINDOWS, width=2048, depth=4, k=20,
+                 emit_interval=60.0, clock=time.time):
+        self.sink = sink
+        self.counters = [WindowedCounter(name, window, slots, width, depth, k)
+                         for name, window, slots in windows]
+        self.width = width
+        self.depth = depth
+        self.emit_interval = emit_interval
+        self.clock = clock
+        self.views = 0
+        self._lock = threading.Lock()
+        self._next_emit = clock() + emit_interval
+
+    def record(self, designation, ts=None):
+        """Count one view of ``designation`` at unix time ``ts`` (default: now)"""
+        now = self.clock()
+        ts = now if ts is None else ts
+        closed = []
+        with self._lock:
+            self.views += 1
+            columns = sketch_columns(designation, self.width, self.depth)
+            for counter in self.counters:
+                result = counter.add(designation, ts, columns)
+                if result is not None:
+                    closed.append(result)
+        if closed:
+            self._emit(closed)
+        self.maybe_emit(now)
+
+    def record_event(self, event):
+        self.record(event['aircraft_designation'], event_time(event, self.clock()))
+
+    def maybe_emit(self, now=None):
+        """Send sliding results if ``emit_interval`` has passed since the last time"""
+        now = self.clock() if now is None else now
+        if now < self._next_emit:
+            return
+        with self._lock:
+            if now < self._next_emit:
+                return
+            self._next_emit = now + self.emit_interval
+            results = [counter.sliding(now) for counter in self.counters]
+        self._emit(results)
+
+    def sliding(self, n=None):
+        with self._lock:
+            return [counter.sliding(self.clock(), n) for counter in self.counters]
+
+    def estimate(self, designation, window):
+        with self._lock:
+            for counter in self.counters:
+                if counter.name == window:
+                    return counter.estimate(designation, self.clock())
+        raise KeyError(window)
+
+    def _emit(self, results):
+        try:
+            self.sink(results)
+        except Exception as e:
+            logger.error(f"View count sink failed: {e}")
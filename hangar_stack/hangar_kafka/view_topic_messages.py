@@ -11,12 +11,13 @@ import time
 from datetime import datetime
 from hangar_stack.hangar_kafka.kafka_consumer import HangarStackConsumer
 from hangar_stack.hangar_kafka.kafka_config import TOPICS
+from hangar_stack.hangar_kafka.encoding import decode_event
 
 def format_message(message):
     """Format a Kafka message for display"""
     try:
-        # Try to parse as JSON
-        data = json.loads(message.value) if isinstance(message.value, str) else message.value
+        # Parse JSON or binary event records
+        data = decode_event(message.value) if isinstance(message.value, (bytes, str)) else message.value
         
         # Format based on event type
         event_type = data.get('event_type', 'unknown')
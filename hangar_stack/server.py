@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Preforking production server for HangarStack
+
+The master process imports the app, loads the database once
+(app.before_fork) and freezes the garbage collector, then forks the
+workers. Workers share those pages copy-on-write, and a binary snapshot's
+columns and encoded records through its memory mapping (each worker decodes
+the records its pages need). Each worker recreates its
+fork-unsafe resources (app.after_fork), then serves the shared listening
+socket with werkzeug's threaded WSGI server. The master restarts workers
+that die and stops them all on SIGTERM or SIGINT.
+
+Usage:
+  python -m hangar_stack serve [--host 127.0.0.1] [--port 8000] [--workers N]
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits sooner than this after starting is not restarted
+# straight away, so a broken deployment does not fork in a tight loop
+MIN_WORKER_LIFETIME = 1.0
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def prepare_master(app_module):
+    """Load shared state in the master and keep the collector off those pages."""
+    start = time.perf_counter()
+    app_module.before_fork()
+    # Objects that exist now are moved to a permanent generation, so the
+    # collector never writes to (and un-shares) their pages in a worker
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Master {os.getpid()} loaded the database in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def bind_socket(host, port, backlog=1024) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    def __init__(self, app_module, sock, workers):
+        self.app_module = app_module
+        self.sock = sock
+        self.workers = workers
+        self.children = {}
+        self.stopping = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            if not self.stopping:
+                self._spawn()
+        self.sock.close()
+        logger.info("All workers stopped")
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        code = 0
+        try:
+            self._serve()
+        except BaseException as e:
+            if not isinstance(e, SystemExit):
+                logger.exception(f"Worker {os.getpid()} failed: {e}")
+                code = 1
+        finally:
+            # Skip the master's atexit handlers; the worker cleans up itself
+            os._exit(code)
+
+    def _serve(self):
+        from werkzeug.serving import make_server
+
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        # Ctrl-C reaches the whole process group; the master handles it
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self.app_module.after_fork()
+        host, port = self.sock.getsockname()[:2]
+        server = make_server(host, port, self.app_module.app, threaded=True, fd=self.sock.fileno())
+        logger.info(f"Worker {os.getpid()} serving on http://{host}:{port}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.app_module.cleanup()
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info(f"Stopping {len(self.children)} workers")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def serve(host='127.0.0.1', port=8000, workers=None):
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("The preforking server needs os.fork(); run app.py directly on this platform")
+    workers = workers or default_workers()
+    sock = bind_socket(host, port)
+    from hangar_stack import app as app_module
+    prepare_master(app_module)
+    logger.info(f"Starting {workers} workers on http://{host}:{sock.getsockname()[1]}")
+    PreforkServer(app_module, sock, workers).run()
@@ -4,7 +4,7 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
-import jsonschema
+from jsonschema.exceptions import ValidationError
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -12,30 +12,81 @@ from rich.tree import Tree
 from rich.prompt import Prompt
 from rich.progress import track
 import pandas as pd
+from hangar_stack.hangar_data.database_cache import file_hash
+from hangar_stack.hangar_data.indexes import AircraftIndex
+from hangar_stack.hangar_data.search import SearchIndex
+from hangar_stack.hangar_data.snapshot import default_snapshot_path, open_matching
+from hangar_stack.hangar_data.stats import DatabaseStats
+from hangar_stack.hangar_data.streaming import stream_database
+from hangar_stack.hangar_data.validation import DatabaseValidator, default_stamp_path
 
 class AircraftViewer:
-    def __init__(self, database_path: Path, schema_path: Path):
+    def __init__(self, database_path: Path, schema_path: Path, snapshot_path: Optional[Path] = None):
         self.console = Console()
         self.database_path = database_path
         self.schema_path = schema_path
-        self.data = self._load_database()
+        self.snapshot_path = snapshot_path or default_snapshot_path(database_path)
         self.schema = self._load_schema()
-        self._validate_database()
+        self.content_hash = None
+        # A snapshot compiled from this exact JSON was validated at build time
+        self.data = self._load_snapshot()
+        if self.data is None:
+            self.data = self._load_database()
+            self._validate_database()
+
+    def _load_snapshot(self) -> Optional[dict]:
+        """Load the database from a binary snapshot matching the JSON file and schema."""
+        try:
+            self.content_hash = file_hash(self.database_path)
+            reader = open_matching(self.snapshot_path, self.content_hash,
+                                   schema_hash=self.validator.schema_hash)
+        except OSError:
+            # An unreadable database is reported by _load_database
+            return None
+        if reader is None:
+            return None
+        data = reader.to_data()
+        self.index = AircraftIndex(data)
+        self.stats = reader.stats()
+        self.search_index = SearchIndex(data)
+        return data
 
     def _load_database(self) -> dict:
         """Load the aircraft database from JSON file."""
+        # Records are parsed one at a time and indexed as they arrive; every
+        # field stays in memory because the whole document is validated
+        self.index = AircraftIndex()
+        self.stats = DatabaseStats()
+        self.search_index = SearchIndex()
+
+        def on_manufacturer(manufacturer):
+            self.index.add_manufacturer(manufacturer)
+            self.stats.add_manufacturer(manufacturer)
+
+        def on_aircraft(manufacturer, aircraft):
+            self.index.add(manufacturer, aircraft)
+            self.stats.add_aircraft(manufacturer, aircraft)
+            self.search_index.add(manufacturer, aircraft)
+
         try:
-            with open(self.database_path) as f:
-                return json.load(f)
+            data = stream_database(self.database_path,
+                                   on_manufacturer=on_manufacturer,
+                                   on_aircraft=on_aircraft)
+            self.index.finish()
+            self.search_index.finish()
+            return data
         except Exception as e:
             self.console.print(f"[red]Error loading database: {e}[/red]")
             sys.exit(1)
 
     def _load_schema(self) -> dict:
-        """Load the JSON schema for validation."""
+        """Load and compile the JSON schema for validation."""
         try:
-            with open(self.schema_path) as f:
-                return json.load(f)
+            # Content hashes that passed are stamped next to the database, so
+            # relaunching on an unchanged file skips validation
+            self.validator = DatabaseValidator(self.schema_path,
+                                               stamp_path=default_stamp_path(self.database_path))
+            return self.validator.schema
         except Exception as e:
             self.console.print(f"[red]Error loading schema: {e}[/red]")
             sys.exit(1)
@@ -43,10 +94,14 @@ class AircraftViewer:
     def _validate_database(self):
         """Validate the database against the schema."""
         try:
-            jsonschema.validate(instance=self.data, schema=self.schema)
-        except jsonschema.exceptions.ValidationError as e:
+            report = self.validator.validate(self.data, self.content_hash)
+        except ValidationError as e:
             self.console.print(f"[red]Database validation error: {e}[/red]")
             sys.exit(1)
+        if report.cached:
+            self.console.print(f"[dim]Database already validated ({report.records} aircraft)[/dim]")
+        else:
+            self.console.print(f"[dim]Validated {report.checked} aircraft in {report.elapsed_ms:.1f} ms[/dim]")
 
     def list_manufacturers(self):
         """Display a list of all manufacturers in the database."""
@@ -57,16 +112,13 @@ class AircraftViewer:
         table.add_column("Last Updated", justify="right", style="yellow")
         
         for manufacturer in self.data["manufacturers"]:
-            aircraft_list = self.data["manufacturers"][manufacturer]["aircraft"]
-            total_count = len(aircraft_list)
-            active_count = sum(1 for a in aircraft_list if a.get("status") == "Active")
-            last_verified = max(a["last_verified"] for a in aircraft_list)
+            stats = self.stats.for_manufacturer(manufacturer)
             
             table.add_row(
                 manufacturer,
-                str(total_count),
-                str(active_count),
-                last_verified
+                str(stats.total),
+                str(stats.active),
+                stats.latest_verified or "N/A"
             )
         
         self.console.print(table)
@@ -109,8 +161,7 @@ class AircraftViewer:
             self.console.print(f"[red]Manufacturer '{manufacturer}' not found[/red]")
             return
 
-        aircraft_list = self.data["manufacturers"][manufacturer]["aircraft"]
-        aircraft = next((a for a in aircraft_list if a["designation"] == designation), None)
+        aircraft = self.index.get(manufacturer, designation)
         
         if not aircraft:
             self.console.print(f"[red]Aircraft '{designation}' not found[/red]")
@@ -203,66 +254,12 @@ class AircraftViewer:
 
     def search_aircraft(self, query: str):
         """Search for aircraft by designation, name, or specifications."""
-        matches = []
         query = query.lower()
-        query_words = query.split()
-        
-        for manufacturer, data in self.data["manufacturers"].items():
-            for aircraft in data["aircraft"]:
-                score = 0
-                designation = aircraft["designation"].lower()
-                name = aircraft["name"].lower()
-                
-                # Exact matches get highest score
-                if query == designation or query == name:
-                    score = 100
-                # Starts with gets high score
-                elif designation.startswith(query) or name.startswith(query):
-                    score = 75
-                # Contains gets medium score
-                elif query in designation or query in name:
-                    score = 50
-                
-                # Word matching
-                for word in query_words:
-                    # Match against designation and name
-                    if word in designation or word in name:
-                        score += 15
-                    
-                    # Match against specifications
-                    specs = aircraft["specifications"]
-                    
-                    # Speed matching
-                    if "mach" in word and specs["performance"]["max_speed"]["mach"] > 1.0:
-                        score += 10
-                    elif "supersonic" in word and specs["performance"]["max_speed"]["mach"] > 1.0:
-                        score += 10
-                    elif "subsonic" in word and specs["performance"]["max_speed"]["mach"] < 1.0:
-                        score += 10
-                    
-                    # Size matching
-                    if ("large" in word or "heavy" in word) and specs["weights"]["max_takeoff"]["pounds"] > 100000:
-                        score += 10
-                    elif ("small" in word or "light" in word) and specs["weights"]["max_takeoff"]["pounds"] < 50000:
-                        score += 10
-                    
-                    # Status matching
-                    if word == aircraft.get("status", "").lower():
-                        score += 20
-                    
-                    # Year matching
-                    if word.isdigit() and str(aircraft.get("introduction_year", "")) == word:
-                        score += 25
-                
-                if score > 0:
-                    matches.append({
-                        "manufacturer": manufacturer,
-                        "aircraft": aircraft,
-                        "score": score
-                    })
-        
-        # Sort by score
-        matches.sort(key=lambda x: (-x["score"], x["aircraft"]["designation"]))
+        # Scored from posting lists; see SearchIndex for the scoring rules
+        matches = [
+            {"manufacturer": r.manufacturer, "aircraft": r.aircraft, "score": r.score}
+            for r in self.search_index.search(query)
+        ]
         
         if not matches:
             self.console.print(f"[red]No matches found for '{query}'[/red]")
@@ -359,24 +356,19 @@ class AircraftViewer:
 
     def show_database_stats(self):
         """Display database statistics."""
-        total_aircraft = sum(len(m["aircraft"]) for m in self.data["manufacturers"].values())
-        total_variants = sum(
-            sum(len(a.get("variants", [])) for a in m["aircraft"])
-            for m in self.data["manufacturers"].values()
-        )
-        active_aircraft = sum(
-            sum(1 for a in m["aircraft"] if a.get("status") == "Active")
-            for m in self.data["manufacturers"].values()
-        )
+        overall = self.stats.overall
         
         stats = Table(title="Database Statistics")
         stats.add_column("Metric", style="cyan")
         stats.add_column("Value", justify="right", style="green")
         
         stats.add_row("Total Manufacturers", str(len(self.data["manufacturers"])))
-        stats.add_row("Total Aircraft", str(total_aircraft))
-        stats.add_row("Total Variants", str(total_variants))
-        stats.add_row("Active Aircraft", str(active_aircraft))
+        stats.add_row("Total Aircraft", str(overall.total))
+        stats.add_row("Total Variants", str(overall.variants))
+        stats.add_row("Active Aircraft", str(overall.active))
+        stats.add_row("In Development", str(overall.development))
+        stats.add_row("Introduced", f"{overall.first_year}-{overall.last_year}")
+        stats.add_row("Latest Verification", overall.latest_verified or "N/A")
         stats.add_row("Database Version", self.data["database_version"])
         stats.add_row("Last Updated", self.data["last_updated"])
         
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the HangarStack tests.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+@pytest.fixture
+def db_path():
+    """Path of the bundled aircraft database"""
+    return os.path.join(DATA_DIR, 'aircraft_database.json')
+
+@pytest.fixture
+def db(db_path):
+    """The bundled aircraft database, parsed afresh for each test (tests may modify it)"""
+    with open(db_path) as f:
+        return json.load(f)
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+@pytest.fixture
+def wait_for():
+    """``wait_for(condition, timeout=5)`` polls ``condition()`` until it holds or time runs out; returns its last value"""
+    return _wait_for
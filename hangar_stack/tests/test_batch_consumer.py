@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for batched, parallel consumer processing with manual commits.
+"""
+
+import threading
+import time
+from collections import namedtuple
+import pytest
+from kafka.structs import TopicPartition
+from hangar_stack.hangar_kafka import kafka_consumer
+from hangar_stack.hangar_kafka.kafka_consumer import HangarStackConsumer
+
+Record = namedtuple('Record', 'key value offset')
+TP0 = TopicPartition('hangarstack.aircraft.views', 0)
+TP1 = TopicPartition('hangarstack.aircraft.views', 1)
+
+class FakeKafkaConsumer:
+    """Serves pre-built poll() results, then stops the owning consumer"""
+
+    def __init__(self, topic, **config):
+        self.config = config
+        self.polls = []
+        self.commits = []
+        self.owner = None
+        self.closed = False
+
+    def poll(self, timeout_ms=0, max_records=None):
+        if self.polls:
+            return self.polls.pop(0)
+        self.owner.stop()
+        return {}
+
+    def commit(self, offsets):
+        self.commits.append({tp: meta.offset for tp, meta in offsets.items()})
+
+    def close(self):
+        self.closed = True
+
+def _consumer(monkeypatch, polls):
+    monkeypatch.setattr(kafka_consumer, 'KafkaConsumer', FakeKafkaConsumer)
+    consumer = HangarStackConsumer('hangarstack.aircraft.views', enable_auto_commit=False)
+    consumer.consumer.owner = consumer
+    consumer.consumer.polls = list(polls)
+    return consumer
+
+def _views(start, count, keys):
+    return [Record(keys[i % len(keys)].encode(),
+                   {'event_type': 'aircraft_view', 'aircraft_designation': keys[i % len(keys)], 'seq': start + i},
+                   start + i)
+            for i in range(count)]
+
+def count_views(events):
+    return len(events)
+
+def test_batches_are_grouped_by_type_and_committed_after_processing(monkeypatch):
+    batch = {TP0: _views(0, 3, ['F-22A']) +
+                  [Record(None, {'event_type': 'search_query', 'query': 'stealth'}, 3),
+                   Record(None, {'event_type': 'unknown'}, 4)],
+             TP1: _views(10, 2, ['B-2'])}
+    consumer = _consumer(monkeypatch, [batch, {TP0: _views(5, 1, ['F-22A'])}])
+    assert consumer.consumer.config['enable_auto_commit'] is False
+    seen = []
+    handlers = {'aircraft_view': lambda events: seen.append(('views', len(events))),
+                'search_query': lambda events: seen.append(('search', len(events)))}
+
+    stats = consumer.consume_batches(handlers=handlers, max_records=100)
+
+    assert stats == {'batches': 2, 'records': 8, 'handled': 7, 'in_flight': 0}
+    assert consumer.consumer.commits == [{TP0: 5, TP1: 12}, {TP0: 6}]
+    assert ('search', 1) in seen and consumer.consumer.closed
+
+def test_parallel_lanes_keep_per_key_order_and_bound_in_flight(monkeypatch):
+    keys = ['F-22A', 'B-2', 'F-35A', 'C-130J', 'P-8A']
+    polls = [{TP0: _views(n * 20, 20, keys)} for n in range(6)]
+    consumer = _consumer(monkeypatch, polls)
+    lock = threading.Lock()
+    order = {}
+    peak = []
+
+    def handle(events):
+        time.sleep(0.002)
+        peak.append(consumer.pipeline.in_flight)
+        with lock:
+            for event in events:
+                order.setdefault(event['aircraft_designation'], []).append(event['seq'])
+
+    stats = consumer.consume_batches(handlers={'aircraft_view': handle}, workers=4,
+                                     executor='thread', max_in_flight=2)
+
+    assert stats['records'] == stats['handled'] == 120
+    assert max(peak) <= 2
+    for key, seqs in order.items():
+        assert seqs == sorted(seqs), key
+    commits = [c[TP0] for c in consumer.consumer.commits]
+    assert commits == [20, 40, 60, 80, 100, 120]
+
+def test_handler_error_stops_without_committing(monkeypatch):
+    consumer = _consumer(monkeypatch, [{TP0: _views(0, 2, ['F-22A'])}, {TP0: _views(2, 2, ['F-22A'])}])
+    calls = []
+
+    def handle(events):
+        calls.append(events)
+        if len(calls) == 2:
+            raise RuntimeError("sink down")
+
+    with pytest.raises(RuntimeError):
+        consumer.consume_batches(handlers={'aircraft_view': handle}, max_in_flight=1)
+    assert consumer.consumer.commits == [{TP0: 2}]
+    assert consumer.consumer.closed
+
+def test_process_lanes_and_auto_commit_guard(monkeypatch):
+    consumer = _consumer(monkeypatch, [{TP0: _views(0, 10, ['F-22A', 'B-2'])}])
+    stats = consumer.consume_batches(handlers={'aircraft_view': count_views}, workers=2, executor='process')
+    assert stats['handled'] == 10 and consumer.consumer.commits == [{TP0: 10}]
+
+    auto = HangarStackConsumer('hangarstack.aircraft.views')
+    with pytest.raises(ValueError):
+        auto.consume_batches()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the route latency benchmark over synthetic catalogs.
+"""
+
+from hangar_stack import app as app_module
+from hangar_stack.benchmark_routes import (MODES, ROUTES, compare, load_baseline, main, run, sample_paths,
+                                           save_baseline, synthetic_catalog)
+
+def _slower(results, factor, mode='warm'):
+    return {size: dict(modes, **{mode: {route: dict(r, p95_ms=r['p95_ms'] * factor)
+                                        for route, r in modes[mode].items()}})
+            for size, modes in results.items()}
+
+def test_synthetic_catalog_is_servable_and_restores_the_app(tmp_path):
+    document = synthetic_catalog(400)
+    designations = [a['designation'] for m in document['manufacturers'].values() for a in m['aircraft']]
+    assert len(designations) == len(set(designations)) == 400 and len(document['manufacturers']) == 20
+    assert len(sample_paths(document, 'aircraft_detail', 10)) == 10 and sample_paths(document, 'home', 10) == ['/home']
+
+    original = app_module.database_cache
+    results = run(sizes=[400], duration=0.1, targets=5, workdir=tmp_path)
+    assert app_module.database_cache is original and not list(tmp_path.iterdir())
+    assert set(results['400']) == set(MODES) | {'_load_seconds'}
+    for mode in MODES:
+        assert set(results['400'][mode]) == set(ROUTES)
+        for route in ROUTES:
+            r = results['400'][mode][route]
+            assert r['requests'] > 0 and r['errors'] == 0
+            assert 0 < r['p50_ms'] <= r['p95_ms'] <= r['p99_ms']
+    assert len(app_module.page_cache) == 0
+
+def test_cold_mode_renders_every_request(tmp_path):
+    misses, hits = app_module.page_cache.misses, app_module.page_cache.hits
+    results = run(sizes=[100], routes=['manufacturer'], duration=0.1, targets=2, workdir=tmp_path, modes=['cold'])
+    assert set(results['100']) == {'cold', '_load_seconds'}
+    # Two warmup renders, then one per timed request
+    assert app_module.page_cache.misses - misses == 2 + results['100']['cold']['manufacturer']['requests']
+    assert app_module.page_cache.hits == hits
+
+def test_baseline_comparison_flags_regressions(tmp_path):
+    results = run(sizes=[100], routes=['home', 'api_aircraft'], duration=0.1, targets=5, workdir=tmp_path)
+    path = tmp_path / 'baseline.json'
+    save_baseline(results, path)
+    baseline = load_baseline(path)
+    assert baseline == results and compare(results, baseline) == []
+
+    regressions = compare(_slower(results, 1.5), baseline, threshold=0.2)
+    assert {(size, mode, route, metric) for size, mode, route, metric, *_ in regressions} == \
+        {('100', 'warm', 'home', 'p95_ms'), ('100', 'warm', 'api_aircraft', 'p95_ms')}
+    assert {row[:3] for row in compare(_slower(results, 1.5, 'cold'), baseline, threshold=0.2)} == \
+        {('100', 'cold', 'home'), ('100', 'cold', 'api_aircraft')}
+    assert compare(_slower(results, 1.1), baseline, threshold=0.2) == []
+
+    assert main(['--sizes', '100', '--routes', 'home', '--duration', '0.1', '--targets', '2',
+                 '--baseline', str(tmp_path / 'missing.json'), '--compare']) == 2
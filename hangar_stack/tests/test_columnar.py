@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar spec store and filter parser.
+"""
+
+import pytest
+from hangar_stack.hangar_data.columnar import ColumnarSpecs, parse_filter
+
+def _scan(db, check):
+    return [(m, a['designation']) for m, entry in db['manufacturers'].items()
+            for a in entry['aircraft'] if check(a)]
+
+def test_vectorized_filter_matches_python_scan(db):
+    columns = ColumnarSpecs(db)
+    predicates, _ = parse_filter('mach>1.5&range_nm>=2000&year<1990')
+    total, rows = columns.filter(predicates)
+
+    def check(a):
+        perf = a['specifications']['performance']
+        mach = perf['max_speed'].get('mach')
+        return (isinstance(mach, (int, float)) and mach > 1.5
+                and perf.get('range', {}).get('nautical_miles', 0) >= 2000
+                and a['introduction_year'] < 1990)
+
+    assert [(m, a['designation']) for m, a in rows] == _scan(db, check)
+    assert total == len(rows)
+
+def test_missing_values_never_match(db):
+    columns = ColumnarSpecs(db)
+    # Several aircraft only have combat_radius, not range
+    without_range = _scan(db, lambda a: 'nautical_miles' not in a['specifications']['performance'].get('range', {}))
+    assert without_range
+    for predicates in (parse_filter('range_nm>=0')[0], parse_filter('range_nm<0')[0]):
+        _, rows = columns.filter(predicates)
+        assert not {(m, a['designation']) for m, a in rows} & set(without_range)
+
+def test_status_and_manufacturer_equality_and_limit(db):
+    columns = ColumnarSpecs(db)
+    predicates, options = parse_filter('status=Active&manufacturer=Boeing&limit=2')
+    total, rows = columns.filter(predicates, limit=int(options['limit']))
+    expected = [a for a in db['manufacturers']['Boeing']['aircraft'] if a['status'] == 'Active']
+    assert total == len(expected)
+    assert [a for _, a in rows] == expected[:2]
+
+def test_parse_filter_rejects_bad_terms():
+    for query in ('speed>2', 'mach>fast', 'status>Active', 'mach'):
+        with pytest.raises(ValueError):
+            parse_filter(query)
+    predicates, _ = parse_filter(b'mtow_lb%3E%3D100000')
+    assert (predicates[0].field, predicates[0].op, predicates[0].value) == ('mtow_lb', '>=', 100000.0)
+
+def test_filter_route_rejects_and_caps_limits(monkeypatch):
+    from hangar_stack import app as app_module
+    monkeypatch.setattr(app_module, 'FILTER_MAX_LIMIT', 3)
+    client = app_module.app.test_client()
+    for limit in ('0', '-5', 'many'):
+        response = client.get(f'/api/aircraft/filter?year>1900&limit={limit}')
+        assert response.status_code == 400 and 'error' in response.get_json()
+    body = client.get('/api/aircraft/filter?year>1900&limit=100000').get_json()
+    assert body['total'] > 3 and body['returned'] == 3
+    assert client.get('/api/aircraft/filter?year>1900&limit=2').get_json()['returned'] == 2
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-wide aircraft database cache.
+"""
+
+import json
+import os
+from hangar_stack.hangar_data.database_cache import DatabaseCache
+
+def _write_db(path, version, designations, mtime=None):
+    db = {
+        'database_version': version,
+        'last_updated': '2025-07-16T19:30:00Z',
+        'manufacturers': {
+            'Lockheed Martin': {'aircraft': [{'designation': d, 'name': d} for d in designations]}
+        }
+    }
+    path.write_text(json.dumps(db))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def test_loads_once_and_reuses_snapshot(tmp_path):
+    db_path = tmp_path / 'aircraft_database.json'
+    _write_db(db_path, '1.0.0', ['F-22A'])
+    cache = DatabaseCache(str(db_path), check_interval=0)
+
+    first = cache.get()
+    second = cache.get()
+
+    assert first is second
+    assert first.version == '1.0.0'
+    assert cache.reload_count == 1
+
+def test_background_reload_swaps_snapshot(tmp_path):
+    db_path = tmp_path / 'aircraft_database.json'
+    _write_db(db_path, '1.0.0', ['F-22A'], mtime=1000)
+    cache = DatabaseCache(str(db_path), check_interval=0)
+    old = cache.get()
+
+    _write_db(db_path, '1.1.0', ['F-22A', 'F-35'], mtime=2000)
+    # The reader that notices the change still gets the old snapshot
+    assert cache.get() is old
+    cache.wait_for_reload(timeout=5)
+
+    new = cache.get()
+    assert new.version == '1.1.0'
+    assert new.content_hash != old.content_hash
+    # The old snapshot is untouched
+    assert old.version == '1.0.0'
+    assert len(old.manufacturers['Lockheed Martin']['aircraft']) == 1
+
+def test_touch_without_content_change_keeps_data(tmp_path):
+    db_path = tmp_path / 'aircraft_database.json'
+    _write_db(db_path, '1.0.0', ['F-22A'], mtime=1000)
+    cache = DatabaseCache(str(db_path), check_interval=0)
+    old = cache.get()
+
+    os.utime(db_path, (3000, 3000))
+    cache.get()
+    cache.wait_for_reload(timeout=5)
+
+    new = cache.get()
+    assert new.data is old.data
+    assert new.mtime == 3000
+    assert cache.reload_count == 1
+
+def test_failed_reload_keeps_previous_snapshot(tmp_path):
+    db_path = tmp_path / 'aircraft_database.json'
+    _write_db(db_path, '1.0.0', ['F-22A'], mtime=1000)
+    cache = DatabaseCache(str(db_path), check_interval=0)
+    old = cache.get()
+
+    db_path.write_text('{"manufacturers": ')
+    os.utime(db_path, (2000, 2000))
+    cache.get()
+    cache.wait_for_reload(timeout=5)
+
+    assert cache.get() is old
+    assert cache.last_reload_error is not None
+
+def test_failed_file_is_not_reloaded_until_it_changes(tmp_path):
+    db_path = tmp_path / 'aircraft_database.json'
+    _write_db(db_path, '1.0.0', ['F-22A'], mtime=1000)
+    cache = DatabaseCache(str(db_path), check_interval=0)
+    old = cache.get()
+    attempts = []
+    load = cache._load_stat
+    cache._load_stat = lambda stat: attempts.append(stat.st_mtime) or load(stat)
+
+    db_path.write_text('{"manufacturers": ')
+    os.utime(db_path, (2000, 2000))
+    for _ in range(5):
+        assert cache.get() is old
+        cache.wait_for_reload(timeout=5)
+    assert attempts == [2000] and cache.last_reload_error is not None
+
+    _write_db(db_path, '1.1.0', ['F-22A', 'F-35'], mtime=3000)
+    cache.get()
+    cache.wait_for_reload(timeout=5)
+    assert cache.get().version == '1.1.0' and attempts == [2000, 3000]
+    assert cache.last_reload_error is None
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact binary event encoding and JSON auto-detection.
+"""
+
+import json
+from collections import namedtuple
+import pytest
+from hangar_stack.hangar_kafka import encoding
+from hangar_stack.hangar_kafka.benchmark_encoding import make_events
+from hangar_stack.hangar_kafka.encoding import decode_event, encode_event, event_serializer
+from hangar_stack.hangar_kafka.view_topic_messages import format_message
+
+Message = namedtuple('Message', 'value')
+
+def test_tracking_events_round_trip_smaller_than_json():
+    events = [event for _, event in make_events(400)]
+    assert {e['event_type'] for e in events} == {'aircraft_view', 'user_activity', 'data_update', 'search_query'}
+    for event in events:
+        record = encode_event(event)
+        assert record[0] == encoding.MAGIC and record[2] != encoding.GENERIC_TYPE
+        assert decode_event(record) == event
+        assert list(decode_event(record)) == list(event)
+        assert len(record) < len(event_serializer('json')(event)) * 0.6
+    # Whole seconds: isoformat() leaves out the fraction
+    event = dict(events[0], timestamp='2026-10-16T12:00:00')
+    assert decode_event(encode_event(event)) == event
+
+@pytest.mark.parametrize('event', [
+    {'event_type': 'system_event', 'detail': 'restart'},
+    {'event_type': 'aircraft_view', 'aircraft_designation': 'F-22A', 'user_ip': '10.0.0.1',
+     'user_agent': None, 'timestamp': '2026-10-16T12:00:00.5'},
+    {'event_type': 'aircraft_view', 'aircraft_designation': 'F-22A', 'user_ip': '10.0.0.1',
+     'user_agent': 'x' * 70000, 'timestamp': '2026-10-16T12:00:00.500000'},
+    {'event_type': 'search_query', 'query': 'stealth', 'filters': {}, 'user_ip': '10.0.0.1',
+     'timestamp': '2026-10-16T12:00:00+00:00'},
+    {'event_type': 'data_update', 'update_type': 'aircraft', 'entity_id': 7, 'changes': {'a': [1, 2]},
+     'timestamp': '2026-10-16T12:00:00.000001', 'extra': True},
+])
+def test_irregular_events_fall_back_to_generic_records(event):
+    record = encode_event(event)
+    assert record[0] == encoding.MAGIC and record[2] == encoding.GENERIC_TYPE
+    assert decode_event(record) == event
+
+def test_consumers_read_both_formats():
+    event = {'event_type': 'aircraft_view', 'aircraft_designation': 'B-2', 'user_ip': '10.0.0.2',
+             'user_agent': 'test', 'timestamp': '2026-10-16T12:00:00.250000'}
+    as_json = event_serializer('json')(event)
+    as_binary = event_serializer('binary')(event)
+    assert decode_event(as_json) == decode_event(as_binary) == decode_event(as_json.decode('utf-8')) == event
+    assert format_message(Message(as_binary)) == format_message(Message(as_json)) == format_message(Message(event))
+    assert 'B-2' in format_message(Message(as_binary))
+
+    future = bytes([encoding.MAGIC, encoding.FORMAT_VERSION + 1, 1]) + as_binary[3:]
+    with pytest.raises(ValueError):
+        decode_event(future)
+    with pytest.raises(ValueError):
+        event_serializer('avro')
+    assert json.loads(as_json) == event
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded, non-blocking view-tracking buffer.
+"""
+
+import threading
+import time
+import pytest
+from hangar_stack.hangar_kafka.event_buffer import EventBuffer
+
+class GatedSender:
+    """Send function that blocks until released, to simulate a slow broker"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.sent = []
+
+    def __call__(self, event):
+        self.gate.wait(5)
+        self.sent.append(event)
+
+def _fill(buffer, sender, count):
+    # The first event is picked up by the sender thread and parks on the gate
+    buffer.put('in-flight')
+    deadline = time.monotonic() + 2
+    while buffer.depth and time.monotonic() < deadline:
+        time.sleep(0.001)
+    for i in range(count):
+        buffer.put(i)
+
+def test_events_are_dispatched_in_order():
+    sender = GatedSender()
+    sender.gate.set()
+    buffer = EventBuffer(sender, max_size=100)
+    for i in range(50):
+        assert buffer.put(i)
+    buffer.close()
+    assert sender.sent == list(range(50))
+    assert buffer.stats()['dispatched'] == 50
+
+def test_drop_oldest_keeps_newest_events():
+    sender = GatedSender()
+    buffer = EventBuffer(sender, max_size=3, overflow_policy='drop_oldest')
+    _fill(buffer, sender, 5)
+    assert buffer.dropped_oldest == 2
+    sender.gate.set()
+    buffer.close()
+    assert sender.sent == ['in-flight', 2, 3, 4]
+
+def test_drop_new_rejects_incoming_events():
+    sender = GatedSender()
+    buffer = EventBuffer(sender, max_size=3, overflow_policy='drop_new')
+    _fill(buffer, sender, 5)
+    assert buffer.dropped_new == 2
+    sender.gate.set()
+    buffer.close()
+    assert sender.sent == ['in-flight', 0, 1, 2]
+
+def test_block_policy_gives_up_after_timeout():
+    sender = GatedSender()
+    buffer = EventBuffer(sender, max_size=1, overflow_policy='block', block_timeout=0.05)
+    _fill(buffer, sender, 1)
+    start = time.monotonic()
+    assert buffer.put('late') is False
+    assert time.monotonic() - start >= 0.04
+    assert buffer.dropped_new == 1
+    sender.gate.set()
+    buffer.close()
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EventBuffer(lambda e: None, overflow_policy='spill')
+
+def test_delivery_callbacks_update_counters_under_the_lock():
+    buffer = EventBuffer(lambda event: None, max_size=100)
+    callbacks = [threading.Thread(target=buffer.record_sent), threading.Thread(target=buffer.record_failed)]
+    with buffer._lock:
+        for thread in callbacks:
+            thread.start()
+        time.sleep(0.05)
+        # The producer's I/O thread waits for the sender instead of racing it
+        assert (buffer.sent, buffer.failed) == (0, 0)
+    for thread in callbacks:
+        thread.join(1)
+    assert (buffer.stats()['sent'], buffer.stats()['failed']) == (1, 1)
+    buffer.close()
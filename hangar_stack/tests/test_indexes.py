@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-snapshot aircraft lookup indexes.
+"""
+
+from hangar_stack.hangar_data.indexes import AircraftIndex, variant_designation
+
+def test_lookup_matches_linear_scan(db):
+    index = AircraftIndex(db)
+    for manufacturer, entry in db['manufacturers'].items():
+        for aircraft in entry['aircraft']:
+            expected = next(a for a in entry['aircraft'] if a['designation'] == aircraft['designation'])
+            assert index.get(manufacturer, aircraft['designation']) is expected
+    assert index.get('Boeing', 'NOPE') is None
+    assert index.get('Nobody', 'F-35') is None
+
+def test_sorted_lists_match_per_request_sort(db):
+    index = AircraftIndex(db)
+    assert index.manufacturers == list(db['manufacturers'])
+    for manufacturer, entry in db['manufacturers'].items():
+        expected = sorted(entry['aircraft'], key=lambda x: x.get('introduction_year', 9999))
+        assert index.aircraft_for(manufacturer) == expected
+
+def test_global_designation_and_variant_lookup(db):
+    index = AircraftIndex(db)
+    assert index.find('F-35')[0] == 'Lockheed Martin'
+    # Object-shaped variant
+    manufacturer, base = index.find('KC-130J')
+    assert (manufacturer, base['designation']) == ('Lockheed Martin', 'C-130J-30')
+    # Free-text variant ("KA-6D: Aerial refueling tanker variant")
+    manufacturer, base = index.find('KA-6D')
+    assert (manufacturer, base['designation']) == ('Northrop Grumman', 'A-6E')
+    assert index.find('XB-70') is None
+
+def test_variant_designation_shapes():
+    assert variant_designation({'designation': 'F-104G', 'name': 'Super Starfighter'}) == 'F-104G'
+    assert variant_designation('A-6B: Modified for Iron Hand SAM suppression missions') == 'A-6B'
+    assert variant_designation('EA-6B ICAP II - Improved electronic warfare systems') == 'EA-6B ICAP II'
+    assert variant_designation('') is None
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the whole-catalog lint (python -m hangar_stack validate).
+"""
+
+import json
+import os
+from datetime import date
+import jsonschema
+from hangar_stack.__main__ import main
+from hangar_stack.hangar_data.lint import lint_database, lint_file
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DB_PATH = os.path.join(DATA_DIR, 'aircraft_database.json')
+SCHEMA_PATH = os.path.join(DATA_DIR, 'schema.json')
+TODAY = date(2025, 1, 1)
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def test_reports_every_schema_error():
+    report = lint_file(DB_PATH, SCHEMA_PATH, workers=1, today=TODAY)
+    validator = jsonschema.Draft7Validator(_load(SCHEMA_PATH))
+    expected = sorted(json.dumps(list(e.absolute_path)) + e.message
+                      for e in validator.iter_errors(_load(DB_PATH)))
+    found = sorted(json.dumps(i.path) + i.message for i in report.issues if i.kind == 'schema')
+    assert found == expected
+    assert report.records == sum(len(m['aircraft']) for m in _load(DB_PATH)['manufacturers'].values())
+
+def test_consistency_checks():
+    db = _load(DB_PATH)
+    aircraft = db['manufacturers']['Lockheed Martin']['aircraft'][0]
+    aircraft['specifications']['dimensions']['length']['meters'] = 99.0
+    aircraft['specifications']['weights']['empty']['kilograms'] = aircraft['specifications']['weights']['empty']['pounds']
+    aircraft['last_verified'] = '2030-06-01'
+    report = lint_database(db, _load(SCHEMA_PATH), workers=1, today=TODAY)
+    checks = {(i.check, tuple(i.path[4:])) for i in report.issues
+              if i.kind == 'consistency' and i.manufacturer == 'Lockheed Martin' and i.index == 0}
+    assert checks == {
+        ('feet_meters', ('specifications', 'dimensions', 'length')),
+        ('pounds_kilograms', ('specifications', 'weights', 'empty')),
+        ('last_verified_future', ('last_verified',)),
+    }
+
+def test_process_pool_matches_serial():
+    db = _load(DB_PATH)
+    # A larger catalog so the records span several chunks
+    for entry in db['manufacturers'].values():
+        entry['aircraft'] = entry['aircraft'] * 8
+    schema = _load(SCHEMA_PATH)
+    serial = lint_database(db, schema, workers=1, today=TODAY)
+    parallel = lint_database(db, schema, workers=2, today=TODAY, chunk_size=16)
+    assert parallel.workers == 2
+    assert parallel.issues == serial.issues
+
+def test_cli_writes_ndjson(tmp_path, capsys):
+    output = tmp_path / 'report.ndjson'
+    assert main(['validate', '--format', 'ndjson', '--workers', '1', '--output', str(output)]) == 1
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    summary = lines[-1]['summary']
+    assert summary['issues'] == len(lines) - 1 > 0
+    assert {'kind', 'check', 'path', 'message', 'manufacturer', 'index', 'designation'} <= set(lines[0])
+    assert 'issues in' in capsys.readouterr().err
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for the rendered HTML page cache.
+"""
+
+from hangar_stack.hangar_data.page_cache import PageCache
+
+def test_renders_once_per_key():
+    cache = PageCache()
+    calls = []
+
+    def render():
+        calls.append(1)
+        return '<html>F-35</html>'
+
+    assert cache.get_or_render(('aircraft', 'F-35', 'v1'), render) == '<html>F-35</html>'
+    assert cache.get_or_render(('aircraft', 'F-35', 'v1'), render) == '<html>F-35</html>'
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = PageCache(max_entries=2, max_bytes=25)
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'x' * 10)
+    cache.get_or_render('a', lambda: 'unused')   # 'a' is now most recent
+    cache.put('c', 'x' * 10)                     # over both caps, evicts 'b'
+
+    assert cache.get_or_render('b', lambda: 'y') == 'y'
+    assert cache.current_bytes <= 25
+    assert len(cache) <= 2
+    assert cache.evictions >= 1
+
+def test_oversized_page_is_not_cached():
+    cache = PageCache(max_bytes=5)
+    cache.put('big', 'x' * 6)
+    assert len(cache) == 0
+    assert cache.current_bytes == 0
+
+def test_clear_drops_everything():
+    cache = PageCache()
+    cache.put('a', 'page')
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.current_bytes == 0
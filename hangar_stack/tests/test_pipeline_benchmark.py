@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Tests for the event pipeline load benchmark on the in-process broker.
+"""
+
+from collections import Counter
+from hangar_stack.hangar_kafka.benchmark_pipeline import KeySampler, run_stage, sustainable
+
+def test_zipf_keys_favour_a_few_designations():
+    designations = [f"A-{n}" for n in range(200)]
+    uniform = Counter(KeySampler(designations, 'uniform').sample(20000))
+    zipf = Counter(KeySampler(designations, 'zipf', zipf_s=1.2).sample(20000))
+    top = lambda counts: sum(c for _, c in counts.most_common(10)) / 20000
+    assert top(uniform) < 0.1 and top(zipf) > 0.5
+    assert KeySampler(designations, 'zipf', seed=1).sample(50) == KeySampler(designations, 'zipf', seed=1).sample(50)
+
+def test_stage_reports_latency_lag_and_delivery():
+    result = run_stage(1000, 1.0, producers=2, consumers=2, distribution='zipf', tracking_mode='sync',
+                       sample_interval=0.2)
+    assert result['attempted'] == 1000 and result['delivered'] == 1000 and result['consumed'] == 1000
+    assert result['dropped'] == 0 and sustainable(result)
+    assert 0 < result['e2e']['p50_ms'] <= result['e2e']['p99_ms'] < 5000
+    assert result['send']['p99_ms'] > 0 and result['lag_samples']
+    assert result['produce_rate'] > 800
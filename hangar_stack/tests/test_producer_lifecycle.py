@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the lazily connected, self-healing Kafka producer wrapper.
+"""
+
+import threading
+import time
+from hangar_stack.hangar_kafka.producer_lifecycle import ManagedProducer
+
+class FakeProducer:
+    def __init__(self):
+        self.is_healthy = True
+        self.closed = False
+
+    def healthy(self):
+        return self.is_healthy
+
+    def close(self):
+        self.closed = True
+
+def test_get_never_blocks_on_a_slow_broker(wait_for):
+    gate = threading.Event()
+    created = []
+
+    def factory():
+        gate.wait(5)
+        created.append(FakeProducer())
+        return created[-1]
+
+    managed = ManagedProducer(factory)
+    assert managed.state == 'idle'
+    started = time.perf_counter()
+    assert managed.get() is None
+    assert managed.get() is None
+    assert time.perf_counter() - started < 0.5
+    assert managed.state == 'connecting'
+    gate.set()
+    assert wait_for(lambda: managed.ready)
+    assert managed.get() is created[0]
+    managed.close()
+    assert created[0].closed and managed.state == 'closed'
+    assert managed.get() is None
+
+def test_failed_connects_are_retried_and_missing_kafka_is_final(wait_for):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("no brokers")
+        return FakeProducer()
+
+    managed = ManagedProducer(flaky, retry_initial=0.01)
+    managed.start()
+    assert wait_for(lambda: managed.ready)
+    assert managed.stats()['failures'] == 2 and managed.stats()['connects'] == 1
+    managed.close()
+
+    def not_installed():
+        raise ImportError("No module named 'kafka'")
+
+    missing = ManagedProducer(not_installed)
+    missing.start()
+    assert wait_for(lambda: missing.state == 'unavailable')
+    assert missing.get() is None
+    assert 'kafka' in missing.stats()['last_error']
+
+def test_unhealthy_producer_is_recreated(wait_for):
+    created = []
+
+    def factory():
+        created.append(FakeProducer())
+        return created[-1]
+
+    managed = ManagedProducer(factory, health_interval=0.01)
+    managed.start()
+    assert wait_for(lambda: managed.ready)
+    created[0].is_healthy = False
+    assert wait_for(lambda: len(created) == 2 and managed.get() is created[1])
+    assert created[0].closed
+    assert managed.stats()['reconnects'] == 1
+    managed.close()
+
+def test_forked_child_drops_the_inherited_producer(monkeypatch, wait_for):
+    created = []
+
+    def factory():
+        created.append(FakeProducer())
+        return created[-1]
+
+    managed = ManagedProducer(factory)
+    managed.start()
+    assert wait_for(lambda: managed.ready)
+    # Pretend we are now running in a forked child
+    child_pid = managed._pid + 1
+    monkeypatch.setattr('os.getpid', lambda: child_pid)
+    assert not managed.ready and managed.state == 'idle'
+    assert managed.get() is None
+    assert wait_for(lambda: len(created) == 2 and managed.get() is created[1])
+    assert not created[0].closed
+    managed.close()
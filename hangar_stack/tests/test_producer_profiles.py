@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for the named producer tuning profiles.
+"""
+
+import pytest
+from kafka import KafkaProducer
+from hangar_stack.hangar_kafka.kafka_config import PRODUCER_PROFILES, get_producer_profile
+from hangar_stack.hangar_kafka.kafka_producer import producer_profile_settings, resolve_compression
+
+def test_profiles_only_produce_supported_settings():
+    for name in PRODUCER_PROFILES:
+        settings = producer_profile_settings(name)
+        assert set(settings) <= set(KafkaProducer.DEFAULT_CONFIG)
+
+def test_compression_falls_back_to_available_codec():
+    # gzip ships with Python, so it is always the last resort
+    assert resolve_compression(['no-such-codec', 'gzip']) == 'gzip'
+    assert resolve_compression(None) is None
+    assert producer_profile_settings('high_throughput')['compression_type'] in ('zstd', 'lz4', 'gzip')
+
+def test_durable_profile_waits_for_all_replicas():
+    settings = producer_profile_settings('durable')
+    assert settings['acks'] == 'all'
+    assert settings['max_in_flight_requests_per_connection'] == 1
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        get_producer_profile('turbo')
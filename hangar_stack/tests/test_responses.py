@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for pre-serialized, precompressed API responses.
+"""
+
+import gzip
+import json
+import threading
+from hangar_stack.hangar_data.database_cache import DatabaseSnapshot
+from hangar_stack.hangar_data.responses import ResponseCache
+
+def _snapshot(version, aircraft):
+    raw = json.dumps({
+        'database_version': version,
+        'last_updated': '2025-07-16T19:30:00Z',
+        'manufacturers': {'Boeing': {'aircraft': aircraft}}
+    }).encode('utf-8')
+    return DatabaseSnapshot.from_bytes(raw)
+
+def _payload(snapshot):
+    return lambda: {'manufacturer': 'Boeing', 'aircraft': snapshot.indexes.aircraft_for('Boeing')}
+
+def test_serializes_once_per_snapshot():
+    cache = ResponseCache(json.dumps)
+    snapshot = _snapshot('1.0.0', [{'designation': 'B-52H', 'name': 'Stratofortress' * 20}])
+
+    first = cache.get(snapshot, 'Boeing', _payload(snapshot))
+    second = cache.get(snapshot, 'Boeing', _payload(snapshot))
+
+    assert first is second
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert gzip.decompress(first.encoded['gzip']) == first.body
+    assert first.etag.startswith('1.0.0-')
+
+def test_new_snapshot_drops_entries_but_etag_tracks_content():
+    cache = ResponseCache(json.dumps)
+    aircraft = [{'designation': 'B-52H', 'name': 'Stratofortress'}]
+    old = _snapshot('1.0.0', aircraft)
+    same_content = _snapshot('1.0.0', aircraft + [])
+    changed = _snapshot('1.0.0', aircraft + [{'designation': 'B-1B', 'name': 'Lancer'}])
+
+    a = cache.get(old, 'Boeing', _payload(old))
+    b = cache.get(same_content, 'Boeing', _payload(same_content))
+    c = cache.get(changed, 'Boeing', _payload(changed))
+
+    assert a.etag == b.etag
+    assert c.etag != a.etag
+
+def test_choose_prefers_accepted_encoding():
+    cache = ResponseCache(json.dumps)
+    snapshot = _snapshot('1.0.0', [{'designation': 'B-52H', 'name': 'Stratofortress' * 20}])
+    prepared = cache.get(snapshot, 'Boeing', _payload(snapshot))
+
+    body, encoding = prepared.choose(lambda name: 1 if name == 'gzip' else 0)
+    assert encoding == 'gzip'
+    assert prepared.etag_for(encoding) == prepared.etag + '-gzip'
+    assert prepared.choose(lambda name: 0) == (prepared.body, None)
+
+def test_concurrent_misses_build_outside_the_lock_and_share_one_entry():
+    cache = ResponseCache(json.dumps)
+    snapshot = _snapshot('1.0.0', [{'designation': 'B-52H', 'name': 'Stratofortress'}])
+    # Every thread must be building at once, which deadlocks if building holds the lock
+    building = threading.Barrier(4, timeout=5)
+
+    def payload():
+        building.wait()
+        return _payload(snapshot)()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(snapshot, 'Boeing', payload)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4 and all(r is results[0] for r in results)
+    assert cache.get(snapshot, 'Boeing', payload) is results[0]
+    assert (cache.hits, cache.misses) == (1, 4)
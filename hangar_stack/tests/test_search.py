@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the inverted-index aircraft search.
+"""
+
+from hangar_stack.hangar_data.search import SearchIndex
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else None
+
+def linear_search(db, query):
+    """The original AircraftViewer.search_aircraft scoring loop (tolerating
+    missing or non-numeric specs)"""
+    matches = []
+    query = query.lower()
+    for manufacturer, data in db['manufacturers'].items():
+        for aircraft in data['aircraft']:
+            score = 0
+            designation = aircraft['designation'].lower()
+            name = aircraft['name'].lower()
+            if query == designation or query == name:
+                score = 100
+            elif designation.startswith(query) or name.startswith(query):
+                score = 75
+            elif query in designation or query in name:
+                score = 50
+            specs = aircraft['specifications']
+            mach = _number(specs.get('performance', {}).get('max_speed', {}).get('mach'))
+            mtow = _number(specs.get('weights', {}).get('max_takeoff', {}).get('pounds'))
+            for word in query.split():
+                if word in designation or word in name:
+                    score += 15
+                if 'mach' in word and mach is not None and mach > 1.0:
+                    score += 10
+                elif 'supersonic' in word and mach is not None and mach > 1.0:
+                    score += 10
+                elif 'subsonic' in word and mach is not None and mach < 1.0:
+                    score += 10
+                if ('large' in word or 'heavy' in word) and mtow is not None and mtow > 100000:
+                    score += 10
+                elif ('small' in word or 'light' in word) and mtow is not None and mtow < 50000:
+                    score += 10
+                if word == aircraft.get('status', '').lower():
+                    score += 20
+                if word.isdigit() and str(aircraft.get('introduction_year', '')) == word:
+                    score += 25
+            if score > 0:
+                matches.append((manufacturer, aircraft['designation'], score))
+    matches.sort(key=lambda x: (-x[2], x[1]))
+    return matches
+
+QUERIES = [
+    'F-35', 'f', 'b-', 'lightning', 'light', 'heavy bomber', 'supersonic fighter',
+    'subsonic', 'mach 2', 'active', 'retired 1955', '1962', 'hornet', 'F/A-18',
+    'stratofortress', 'lockheed', 'nothing-like-this', 'a', 'super hornet', 'x',
+    'large', 'small active', 'sr-71a', 'c-130j-30 hercules', '  raptor  ',
+]
+
+def test_scores_match_linear_scan(db):
+    index = SearchIndex(db)
+    for query in QUERIES:
+        got = [(r.manufacturer, r.aircraft['designation'], r.score) for r in index.search(query)]
+        assert got == linear_search(db, query), query
+
+def test_description_words_are_opt_in(db):
+    index = SearchIndex(db)
+    # "reconnaissance" is only in descriptions, never in a designation or name
+    assert index.search('reconnaissance') == []
+    results = index.search('reconnaissance', include_description=True)
+    assert results
+    assert all(r.score == 5 for r in results)
+
+def test_search_route_rejects_and_caps_limits(monkeypatch):
+    from hangar_stack import app as app_module
+    monkeypatch.setattr(app_module, 'SEARCH_MAX_LIMIT', 3)
+    client = app_module.app.test_client()
+    for limit in ('0', '-5', 'many'):
+        response = client.get(f'/api/search?q=a&limit={limit}')
+        assert response.status_code == 400 and 'error' in response.get_json()
+    body = client.get('/api/search?q=a&limit=100000').get_json()
+    assert body['total'] > 3 and len(body['results']) == 3
+    assert len(client.get('/api/search?q=a&limit=2').get_json()['results']) == 2
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the preforking production server.
+"""
+
+import http.client
+import os
+import pytest
+from hangar_stack.benchmark_server import free_port, start_server, stop_server
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork()")
+
+def _get(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, body
+
+def test_workers_serve_and_stop_cleanly():
+    port = free_port()
+    process = start_server(2, port)
+    try:
+        for path in ('/home', '/manufacturer/Boeing', '/api/aircraft/Boeing', '/api/stats'):
+            status, body = _get(port, path)
+            assert status == 200, path
+            assert body
+        assert _get(port, '/manufacturer/Nobody')[0] == 404
+    finally:
+        stop_server(process)
+    assert process.returncode == 0
+    with pytest.raises(OSError):
+        _get(port, '/home')
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-manufacturer sharded database layout.
+"""
+
+import json
+import os
+from hangar_stack.hangar_data.database_cache import DatabaseSnapshot
+from hangar_stack.hangar_data.shards import (ShardedDatabase, join_shards, refresh_manifest,
+                                             split_database, write_shard)
+
+def test_split_and_join_round_trip(tmp_path, db, db_path):
+    manifest = split_database(db_path, str(tmp_path))
+    assert manifest.manufacturers == list(db['manufacturers'])
+    assert manifest.count('Boeing') == len(db['manufacturers']['Boeing']['aircraft'])
+    assert manifest.version == db['database_version']
+    joined = join_shards(str(tmp_path))
+    assert joined == db
+    assert list(joined) == list(db)
+
+def test_shards_load_lazily_with_lru(tmp_path, db_path):
+    split_database(db_path, str(tmp_path))
+    store = ShardedDatabase(str(tmp_path), max_shards=2, check_interval=None)
+    assert store.manifest().manufacturers
+    assert store.loads == 0
+
+    boeing = store.shard('Boeing')
+    assert store.shard('Boeing') is boeing
+    assert store.shard('Unknown') is None
+    eager = DatabaseSnapshot.from_bytes(open(db_path, 'rb').read())
+    assert boeing.indexes.aircraft_for('Boeing') == eager.indexes.aircraft_for('Boeing')
+    assert boeing.stats.for_manufacturer('Boeing').to_dict() == eager.stats.for_manufacturer('Boeing').to_dict()
+
+    store.shard('Lockheed Martin')
+    store.shard('Northrop Grumman')
+    assert (store.loads, store.hits, store.evictions) == (3, 1, 1)
+    assert store.info()['loaded'] == ['Lockheed Martin', 'Northrop Grumman']
+
+def test_changing_one_shard_reloads_only_that_shard(tmp_path, db_path):
+    split_database(db_path, str(tmp_path))
+    store = ShardedDatabase(str(tmp_path), check_interval=0)
+    swaps = []
+    store.add_listener(lambda old, new: swaps.append((old, new)))
+    boeing = store.shard('Boeing')
+    lockheed = store.shard('Lockheed Martin')
+    old_manifest = store.manifest()
+    assert swaps == [(None, old_manifest)]
+
+    entry = dict(boeing.entry, aircraft=boeing.entry['aircraft'][:1])
+    write_shard(str(tmp_path), 'Boeing', entry)
+    os.utime(tmp_path / 'manifest.json', (old_manifest.mtime + 10,) * 2)
+
+    assert store.manifest().count('Boeing') == 1
+    assert swaps[1:] == [(old_manifest, store.manifest())]
+    assert store.shard('Lockheed Martin') is lockheed
+    assert store.shard('Boeing') is not boeing
+    assert store.shard('Boeing').stats.overall.total == 1
+    assert store.full_snapshot().stats.for_manufacturer('Boeing').total == 1
+
+def test_refresh_after_hand_edit(tmp_path, db_path):
+    split_database(db_path, str(tmp_path))
+    path = tmp_path / 'boeing.json'
+    entry = json.loads(path.read_text())
+    entry['aircraft'].pop()
+    path.write_text(json.dumps(entry))
+
+    assert refresh_manifest(str(tmp_path)) == ['Boeing']
+    assert refresh_manifest(str(tmp_path)) == []
+    assert join_shards(str(tmp_path))['manufacturers']['Boeing'] == entry
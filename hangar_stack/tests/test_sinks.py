@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the buffered bulk sinks behind the consumer's aggregates.
+"""
+
+from collections import namedtuple
+import pytest
+from kafka.structs import TopicPartition
+from hangar_stack.hangar_kafka import kafka_consumer
+from hangar_stack.hangar_kafka.sinks import BufferedWriter, MemoryRedis, RedisSink, SqliteSink, create_sink
+
+Record = namedtuple('Record', 'topic key value offset')
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_sqlite_upserts_coalesced_counters_in_bulk(tmp_path):
+    sink = SqliteSink(str(tmp_path / 'aggregates.sqlite'))
+    clock = Clock()
+    writer = BufferedWriter(sink, max_pending=3, flush_interval=60, clock=clock)
+    for designation in ('F-22A', 'F-22A', 'B-2', 'F-22A'):
+        writer.incr('aircraft_views', designation)
+    assert writer.pending == 2 and writer.flushes == 0
+    writer.put('view_windows', 'sliding:1m', '{"total": 4}')
+    # Third distinct key reached max_pending
+    assert writer.flushes == 1 and writer.pending == 0
+    assert sink.counters('aircraft_views') == {'F-22A': 3, 'B-2': 1}
+
+    writer.incr('aircraft_views', 'F-22A', 2)
+    writer.put('view_windows', 'sliding:1m', '{"total": 6}')
+    clock.now = 61
+    writer.incr('search_queries', 'stealth')
+    assert writer.flushes == 2
+    assert sink.counters('aircraft_views') == {'F-22A': 5, 'B-2': 1}
+    assert sink.latest('view_windows') == {'sliding:1m': '{"total": 6}'}
+    stats = writer.stats()
+    assert stats['rows'] == 6 and stats['last_flush_ms'] is not None and stats['rows_per_s'] > 0
+    writer.close()
+
+def test_redis_sink_pipelines_one_round_trip_per_flush():
+    client = MemoryRedis()
+    writer = BufferedWriter(RedisSink(client), max_pending=1000)
+    for n in range(300):
+        writer.incr('aircraft_views', f"A-{n % 30}")
+    writer.put('view_windows', 'tumbling:1h', 'x')
+    assert writer.flush() == 31
+    assert client.round_trips == 1
+    assert client.hget('hangarstack:aircraft_views', 'A-7') == 10
+    assert RedisSink(client).counters('aircraft_views')['A-29'] == 10
+    assert isinstance(create_sink('memory'), RedisSink) and create_sink('none') is None
+    with pytest.raises(ValueError):
+        create_sink('postgres')
+
+def test_failed_flush_keeps_data_for_the_next_one():
+    class FlakySink:
+        def __init__(self):
+            self.fail = True
+            self.written = []
+
+        def write(self, increments, values):
+            if self.fail:
+                raise OSError("disk full")
+            self.written.append((dict(increments), dict(values)))
+
+    sink = FlakySink()
+    writer = BufferedWriter(sink, max_pending=100)
+    writer.incr('user_activity', 'login')
+    writer.put('view_windows', 'sliding:1m', 'old')
+    assert writer.flush() == 0 and writer.failures == 1
+    writer.incr('user_activity', 'login')
+    writer.put('view_windows', 'sliding:1m', 'new')
+    sink.fail = False
+    assert writer.flush() == 2
+    assert sink.written == [({('user_activity', 'login'): 2}, {('view_windows', 'sliding:1m'): 'new'})]
+
+def test_consumer_flushes_aggregates_before_committing(monkeypatch):
+    client = MemoryRedis()
+    seen_at_commit = []
+
+    class FakeKafkaConsumer:
+        def __init__(self, *topics, **config):
+            self.polls = []
+
+        def poll(self, timeout_ms=0, max_records=None):
+            if self.polls:
+                return self.polls.pop(0)
+            owner.stop()
+            return {}
+
+        def commit(self, offsets):
+            seen_at_commit.append(client.hgetall('hangarstack:search_queries'))
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(kafka_consumer, 'KafkaConsumer', FakeKafkaConsumer)
+    writer = BufferedWriter(RedisSink(client), max_pending=1000, flush_interval=3600)
+    owner = kafka_consumer.HangarStackConsumer('hangarstack.search.queries', enable_auto_commit=False, writer=writer)
+    tp = TopicPartition('hangarstack.search.queries', 0)
+    owner.consumer.polls = [{tp: [Record(tp.topic, None, {'event_type': 'search_query', 'query': q}, n)
+                                  for n, q in enumerate(['Stealth', 'stealth ', 'Boeing'])]}]
+    owner.consume_batches()
+    assert seen_at_commit == [{'stealth': 2, 'boeing': 1}]
+
+def test_consumer_holds_back_offsets_while_the_sink_fails(monkeypatch):
+    class DownSink:
+        def __init__(self):
+            self.down = True
+            self.written = {}
+
+        def write(self, increments, values):
+            if self.down:
+                raise ConnectionError("sink unavailable")
+            for key, amount in increments.items():
+                self.written[key] = self.written.get(key, 0) + amount
+
+        def close(self):
+            pass
+
+    commits = []
+
+    class FakeKafkaConsumer:
+        def __init__(self, *topics, **config):
+            self.polls = []
+
+        def poll(self, timeout_ms=0, max_records=None):
+            if self.polls:
+                return self.polls.pop(0)
+            owner.stop()
+            return {}
+
+        def commit(self, offsets):
+            commits.append({tp: meta.offset for tp, meta in offsets.items()})
+
+        def close(self):
+            pass
+
+    def batch(tp, queries, first):
+        return {tp: [Record(tp.topic, None, {'event_type': 'search_query', 'query': q}, first + n)
+                     for n, q in enumerate(queries)]}
+
+    monkeypatch.setattr(kafka_consumer, 'KafkaConsumer', FakeKafkaConsumer)
+    sink = DownSink()
+    writer = BufferedWriter(sink, max_pending=1000, flush_interval=3600)
+    owner = kafka_consumer.HangarStackConsumer('hangarstack.search.queries', enable_auto_commit=False, writer=writer)
+    first, second = (TopicPartition('hangarstack.search.queries', p) for p in (0, 1))
+    owner.consumer.polls = [batch(first, ['a', 'b', 'a'], 0), batch(second, ['c'], 0)]
+    owner.consume_batches(max_in_flight=1)
+    # Nothing reached the sink, so no offset may be committed
+    assert commits == [] and writer.failures >= 2 and writer.pending == 3
+
+    sink.down = False
+    owner._stopping.clear()
+    owner.consumer.polls = [batch(first, ['b'], 3)]
+    owner.consume_batches(max_in_flight=1)
+    # The held-back offsets go out with the first batch that was stored
+    assert commits == [{first: 4, second: 1}]
+    assert sink.written == {('search_queries', 'a'): 2, ('search_queries', 'b'): 2, ('search_queries', 'c'): 1}
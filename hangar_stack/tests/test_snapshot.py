@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled binary database snapshots.
+"""
+
+import os
+import jsonschema
+import numpy as np
+import pytest
+from hangar_stack.__main__ import main
+from hangar_stack.hangar_data.columnar import ColumnarSpecs, NUMERIC_FIELDS, Predicate
+from hangar_stack.hangar_data import database_cache
+from hangar_stack.hangar_data.database_cache import DatabaseCache, DatabaseSnapshot, file_hash
+from hangar_stack.hangar_data.snapshot import SnapshotReader, build_snapshot, open_matching
+from hangar_stack.src.aircraft_viewer import AircraftViewer
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'schema.json')
+
+def test_round_trip(tmp_path, db, db_path):
+    path = str(tmp_path / 'db.snapshot')
+    info = build_snapshot(db_path, path)
+    reader = SnapshotReader(path)
+    assert info.source_hash == file_hash(db_path)
+    assert info.schema_hash is None
+    assert reader.to_data() == db
+    assert list(reader.to_data()) == list(db)
+
+    records = [a for entry in db['manufacturers'].values() for a in entry['aircraft']]
+    assert len(reader) == len(records)
+    assert reader.record(len(records) - 1) == records[-1]
+    for manufacturer, entry in db['manufacturers'].items():
+        assert reader.designations(manufacturer) == [a['designation'] for a in entry['aircraft']]
+
+    columns = reader.columns()
+    expected = ColumnarSpecs(db)
+    for field in NUMERIC_FIELDS:
+        np.testing.assert_array_equal(columns[field], expected.values[field])
+
+def test_validation_errors_abort_the_build(tmp_path, db_path):
+    # The shipped database has records without a source
+    with pytest.raises(jsonschema.ValidationError):
+        build_snapshot(db_path, str(tmp_path / 'db.snapshot'), schema_path=SCHEMA_PATH)
+    assert not (tmp_path / 'db.snapshot').exists()
+    assert os.listdir(tmp_path) == []
+
+def test_open_matching_rejects_stale_or_unvalidated(tmp_path, db_path):
+    path = str(tmp_path / 'db.snapshot')
+    build_snapshot(db_path, path)
+    source_hash = file_hash(db_path)
+    assert open_matching(path, source_hash) is not None
+    assert open_matching(path, 'f' * 64) is None
+    assert open_matching(path, source_hash, schema_hash='0' * 64) is None
+    assert open_matching(str(tmp_path / 'missing.snapshot'), source_hash) is None
+    (tmp_path / 'junk.snapshot').write_bytes(b'not a snapshot')
+    assert open_matching(str(tmp_path / 'junk.snapshot'), source_hash) is None
+
+    # Damaged files fall back to the JSON instead of failing the load
+    whole = open(path, 'rb').read()
+    for cut in (110, 200, len(whole) // 2):
+        (tmp_path / 'cut.snapshot').write_bytes(whole[:cut])
+        assert open_matching(str(tmp_path / 'cut.snapshot'), source_hash) is None
+        cache = DatabaseCache(db_path, check_interval=None, snapshot_path=str(tmp_path / 'cut.snapshot'))
+        assert cache.get().document is not None
+
+def test_info_reports_an_unreadable_source(tmp_path, db_path, capsys):
+    path = str(tmp_path / 'db.snapshot')
+    build_snapshot(db_path, path)
+    assert main(['snapshot', 'info', path, '--source', db_path]) == 0
+    assert main(['snapshot', 'info', path, '--source', str(tmp_path / 'missing.json')]) == 1
+    out, err = capsys.readouterr()
+    assert 'Matches source: unavailable' in out and 'Cannot read source database' in err
+
+def test_cache_prefers_matching_snapshot(tmp_path, db_path):
+    source = tmp_path / 'db.json'
+    source.write_bytes(open(db_path, 'rb').read())
+    snapshot_path = str(tmp_path / 'db.snapshot')
+    build_snapshot(str(source), snapshot_path)
+
+    snapshot = DatabaseCache(str(source), check_interval=None, snapshot_path=snapshot_path).get()
+    eager = DatabaseSnapshot.from_bytes(source.read_bytes())
+    assert snapshot.data == eager.data
+    assert snapshot.content_hash == eager.content_hash
+    assert snapshot.stats.to_dict() == eager.stats.to_dict()
+    predicates = [Predicate('mach', '>', 1.5), Predicate('status', '=', 'Active')]
+    assert snapshot.columns.filter(predicates)[0] == eager.columns.filter(predicates)[0]
+
+    # A touched file no longer matches the recorded stat; its hash still does
+    os.utime(source, ns=(0, 10 ** 9))
+    cache = DatabaseCache(str(source), check_interval=None, snapshot_path=snapshot_path)
+    assert cache.get().document is None and cache.get().content_hash == eager.content_hash
+
+def test_binary_load_reads_no_json_and_decodes_records_on_demand(tmp_path, monkeypatch, db_path):
+    source = tmp_path / 'db.json'
+    source.write_bytes(open(db_path, 'rb').read())
+    snapshot_path = str(tmp_path / 'db.snapshot')
+    build_snapshot(str(source), snapshot_path)
+    eager = DatabaseSnapshot.from_bytes(source.read_bytes())
+
+    def fail(*args, **kwargs):
+        raise AssertionError('the JSON should not be read')
+    monkeypatch.setattr(database_cache, 'open', fail, raising=False)
+    monkeypatch.setattr(SnapshotReader, 'to_data', fail)
+    snapshot = DatabaseCache(str(source), check_interval=None, snapshot_path=snapshot_path).get()
+    assert snapshot.content_hash == eager.content_hash and snapshot.version == eager.version
+    assert snapshot.document is None and not any(snapshot.indexes._records)
+    assert snapshot.stats.to_dict() == eager.stats.to_dict()
+
+    assert snapshot.indexes.manufacturers == eager.indexes.manufacturers
+    boeing = snapshot.indexes.aircraft_for('Boeing')
+    assert boeing == eager.indexes.aircraft_for('Boeing')
+    # Only the manufacturer that was asked for has been decoded
+    assert sum(r is not None for r in snapshot.indexes._records) == len(boeing)
+    assert snapshot.indexes.get('Boeing', boeing[0]['designation']) is boeing[0]
+    for manufacturer, entry in eager.data['manufacturers'].items():
+        for aircraft in entry['aircraft']:
+            assert snapshot.indexes.get(manufacturer, aircraft['designation']) == aircraft
+            assert snapshot.indexes.find(aircraft['designation']) == eager.indexes.find(aircraft['designation'])
+    for variant in list(eager.indexes.by_variant)[:20] + ['no-such-aircraft']:
+        assert snapshot.indexes.find(variant) == eager.indexes.find(variant)
+
+    assert [(r.manufacturer, r.aircraft, r.score) for r in snapshot.search.search('fighter mach')] == \
+        [(r.manufacturer, r.aircraft, r.score) for r in eager.search.search('fighter mach')]
+    assert snapshot.data == eager.data
+    assert snapshot.data['manufacturers']['Boeing']['aircraft'][0] is snapshot.indexes.get(
+        'Boeing', eager.data['manufacturers']['Boeing']['aircraft'][0]['designation'])
+
+def test_viewer_skips_parse_and_validation_with_snapshot(tmp_path, monkeypatch, db, db_path):
+    schema = tmp_path / 'schema.json'
+    schema.write_text('{}')
+    snapshot_path = tmp_path / 'db.snapshot'
+    build_snapshot(db_path, str(snapshot_path), schema_path=str(schema))
+
+    def fail(self):
+        raise AssertionError('JSON should not be parsed')
+    monkeypatch.setattr(AircraftViewer, '_load_database', fail)
+    monkeypatch.setattr(AircraftViewer, '_validate_database', fail)
+    viewer = AircraftViewer(db_path, str(schema), snapshot_path=str(snapshot_path))
+    assert viewer.data == db
+    assert viewer.index.get('Boeing', viewer.index.aircraft_for('Boeing')[0]['designation'])
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Tests for the disk spool that keeps tracking events while Kafka is down.
+"""
+
+import os
+import time
+from types import SimpleNamespace
+from hangar_stack.hangar_kafka import kafka_producer
+from hangar_stack.hangar_kafka.spool import EventSpool, SpoolReplayer, SpoolTracker
+
+def _drain(spool, batch=1000):
+    records, position = spool.read(batch)
+    spool.commit(position)
+    return [(r['k'], r['v']['n']) for r in records]
+
+def test_events_survive_restart_in_order(tmp_path):
+    spool = EventSpool(str(tmp_path), segment_bytes=200, fsync_batch=3)
+    for n in range(10):
+        assert spool.append('views', f"K{n % 3}", {'n': n})
+    assert spool.pending == 10
+    directory = spool.directory
+    assert len([f for f in os.listdir(directory) if f.endswith('.spool')]) > 1
+
+    records, position = spool.read(4)
+    assert [r['v']['n'] for r in records] == [0, 1, 2, 3]
+    spool.commit(position)
+    spool.close()
+    # A crash mid-write leaves a torn line at the end of the newest segment
+    newest = sorted(f for f in os.listdir(directory) if f.endswith('.spool'))[-1]
+    with open(os.path.join(directory, newest), 'ab') as f:
+        f.write(b'{"t":"views","k":"K')
+
+    reopened = EventSpool(str(tmp_path), segment_bytes=200)
+    assert reopened.pending == 6 and reopened.stats()['corrupt'] == 1
+    reopened.append('views', 'K1', {'n': 10})
+    assert [n for _, n in _drain(reopened)] == [4, 5, 6, 7, 8, 9, 10]
+    assert reopened.pending == 0 and reopened.stats()['depth_bytes'] == 0
+    # Delivered segments are deleted
+    assert len([f for f in os.listdir(directory) if f.endswith('.spool')]) <= 1
+
+def test_size_cap_drops_oldest_segments(tmp_path):
+    spool = EventSpool(str(tmp_path), segment_bytes=150, max_bytes=400)
+    for n in range(40):
+        spool.append('views', 'K', {'n': n})
+    stats = spool.stats()
+    assert stats['dropped'] > 0 and stats['depth'] + stats['dropped'] == 40
+    assert stats['depth_bytes'] <= 400 + 150
+    remaining = [n for _, n in _drain(spool)]
+    assert remaining == list(range(40 - len(remaining), 40))
+
+def test_processes_get_separate_slots(tmp_path):
+    first = EventSpool(str(tmp_path))
+    second = EventSpool(str(tmp_path))
+    first.append('views', 'A', {'n': 1})
+    second.append('views', 'B', {'n': 2})
+    assert first.directory != second.directory
+    first.close()
+    # The freed slot (and its undelivered event) is taken over by the next opener
+    third = EventSpool(str(tmp_path))
+    assert third.pending == 1 and third.directory == first.directory
+    assert _drain(third) == [('A', 1)]
+
+def test_replayer_retries_and_keeps_order(tmp_path, wait_for):
+    spool = EventSpool(str(tmp_path))
+    for n in range(25):
+        spool.append('views', f"K{n % 2}", {'n': n})
+    sent = []
+    attempts = []
+
+    def send_batch(records):
+        attempts.append(len(records))
+        if len(attempts) == 1:
+            return False
+        sent.extend(r['v']['n'] for r in records)
+        return True
+
+    replayer = SpoolReplayer(spool, send_batch, rate=1000, batch_size=10, idle_interval=0.01, retry_interval=0.01)
+    assert wait_for(lambda: spool.pending == 0)
+    replayer.close()
+    assert sent == list(range(25)) and attempts[0] == 10
+
+class FakeFuture:
+    def __init__(self, ok):
+        self.ok = ok
+
+    def add_callback(self, fn):
+        if self.ok:
+            fn(SimpleNamespace(topic='views', partition=0))
+        return self
+
+    def add_errback(self, fn):
+        if not self.ok:
+            fn(OSError("broker down"))
+        return self
+
+    def succeeded(self):
+        return self.ok
+
+class FakeKafkaProducer:
+    DEFAULT_CONFIG = {}
+    up = False
+
+    def __init__(self, **config):
+        self.sent = []
+
+    def send(self, topic, value=None, key=None):
+        if FakeKafkaProducer.up:
+            self.sent.append((key, value.get('n')))
+        return FakeFuture(FakeKafkaProducer.up)
+
+    def flush(self, timeout=None):
+        pass
+
+    def close(self):
+        pass
+
+def test_producer_spools_while_down_and_replays_in_order(tmp_path, monkeypatch, wait_for):
+    monkeypatch.setattr(kafka_producer, 'KafkaProducer', FakeKafkaProducer)
+    monkeypatch.setitem(kafka_producer.TRACKING_CONFIG, 'spool_replay_rate', 10000)
+    FakeKafkaProducer.up = False
+    spool = EventSpool(str(tmp_path))
+    SpoolTracker(spool).send_aircraft_view('F-22A', '127.0.0.1', 'test')
+    assert spool.pending == 1
+
+    producer = kafka_producer.HangarStackProducer(tracking_mode='sync', spool=spool)
+    producer.replayer.retry_interval = 0.01
+    producer.replayer.idle_interval = 0.01
+    for n in range(5):
+        producer._send_message('views', {'n': n}, 'F-22A')
+    # Nothing overtakes the spool, so everything queued behind the first event
+    assert spool.pending == 6 and producer.tracking_stats()['spool']['depth'] == 6
+
+    FakeKafkaProducer.up = True
+    assert wait_for(lambda: spool.pending == 0)
+    producer._send_message('views', {'n': 5}, 'F-22A')
+    assert [n for key, n in producer.producer.sent[1:]] == [0, 1, 2, 3, 4, 5]
+    assert producer.producer.sent[0][0] == 'F-22A'
+    producer.close()
+
+def test_live_traffic_faster_than_replay_still_drains(tmp_path, monkeypatch):
+    monkeypatch.setattr(kafka_producer, 'KafkaProducer', FakeKafkaProducer)
+    monkeypatch.setitem(kafka_producer.TRACKING_CONFIG, 'spool_replay_rate', 100)
+    monkeypatch.setitem(kafka_producer.TRACKING_CONFIG, 'spool_replay_max_rate', 100000)
+    FakeKafkaProducer.up = False
+    spool = EventSpool(str(tmp_path))
+    producer = kafka_producer.HangarStackProducer(tracking_mode='sync', spool=spool)
+    producer.replayer.retry_interval = 0.01
+    producer.replayer.idle_interval = 0.01
+    producer.replayer.batch_size = 10
+    for n in range(30):
+        producer._send_message('views', {'n': n}, f"K{n % 3}")
+    assert spool.pending == 30 and spool.stats()['pending_keys'] == 3
+
+    # After the outage K0 stays hot at well over the replay rate, next to new keys
+    FakeKafkaProducer.up = True
+    n = 30
+    deadline = time.monotonic() + 10
+    while spool.pending and time.monotonic() < deadline:
+        producer._send_message('views', {'n': n}, 'K0')
+        producer._send_message('views', {'n': n}, f"L{n}")
+        assert producer.producer.sent[-1] == (f"L{n}", n) or spool.pending
+        n += 1
+        time.sleep(0.001)
+    assert spool.pending == 0 and producer.replayer.rate > 100
+    sent = producer.producer.sent
+    # Fresh keys did not wait for the backlog to drain
+    assert any(k.startswith('L') for k, _ in sent[:sent.index(('K0', 27))])
+    for key in ('K0', 'K1', 'K2'):
+        numbers = [v for k, v in sent if k == key]
+        assert numbers == sorted(numbers) and len(numbers) == len(set(numbers))
+    assert [v for k, v in sent if k == 'K0'][-1] == n - 1
+    producer.close()
+
+class PendingFuture:
+    """A send the broker has not answered yet; resolve() runs its callbacks"""
+
+    def __init__(self, producer, record):
+        self.producer = producer
+        self.record = record
+        self.callbacks = []
+        self.errbacks = []
+
+    def add_callback(self, fn):
+        self.callbacks.append(fn)
+        return self
+
+    def add_errback(self, fn):
+        self.errbacks.append(fn)
+        return self
+
+    def resolve(self, ok):
+        if ok:
+            self.producer.sent.append(self.record)
+        for fn in self.callbacks if ok else self.errbacks:
+            fn(SimpleNamespace(topic='views', partition=0) if ok else OSError("broker down"))
+
+class SlowKafkaProducer(FakeKafkaProducer):
+    """Leaves sends unanswered while ``hold`` is set"""
+    hold = False
+
+    def __init__(self, **config):
+        super().__init__(**config)
+        self.unanswered = []
+
+    def send(self, topic, value=None, key=None):
+        if not SlowKafkaProducer.hold:
+            return super().send(topic, value=value, key=key)
+        future = PendingFuture(self, (key, value.get('n')))
+        self.unanswered.append(future)
+        return future
+
+def test_failed_async_send_is_replayed_before_later_events_for_its_key(tmp_path, monkeypatch, wait_for):
+    monkeypatch.setattr(kafka_producer, 'KafkaProducer', SlowKafkaProducer)
+    monkeypatch.setitem(kafka_producer.TRACKING_CONFIG, 'spool_replay_rate', 10000)
+    FakeKafkaProducer.up = True
+    SlowKafkaProducer.hold = True
+    spool = EventSpool(str(tmp_path))
+    producer = kafka_producer.HangarStackProducer(tracking_mode='async', spool=spool)
+    producer.replayer.retry_interval = 0.01
+    producer.replayer.idle_interval = 0.01
+    kafka = producer.producer
+    producer._send_message('views', {'n': 1}, 'F-22A')
+    assert wait_for(lambda: len(kafka.unanswered) == 1)
+
+    # While the first send is unanswered the key's next event waits; other keys do not
+    SlowKafkaProducer.hold = False
+    producer._send_message('views', {'n': 2}, 'F-22A')
+    producer._send_message('views', {'n': 1}, 'F-35')
+    assert wait_for(lambda: ('F-35', 1) in kafka.sent)
+    assert ('F-22A', 2) not in kafka.sent
+
+    kafka.unanswered[0].resolve(ok=False)
+    assert wait_for(lambda: spool.pending == 0 and ('F-22A', 2) in kafka.sent)
+    producer._send_message('views', {'n': 3}, 'F-22A')
+    assert wait_for(lambda: ('F-22A', 3) in kafka.sent)
+    assert [n for key, n in kafka.sent if key == 'F-22A'] == [1, 2, 3]
+    producer.close()
+
+def test_unlocked_slots_are_taken_over_on_startup(tmp_path):
+    # Three workers spooled events; after a restart with one worker (and a
+    # fourth worker still holding its slot) nothing may be left behind
+    workers = [EventSpool(str(tmp_path)) for _ in range(4)]
+    for w, spool in enumerate(workers):
+        for n in range(3):
+            spool.append('views', f"W{w}", {'n': n})
+    records, position = workers[1].read(1)
+    workers[1].commit(position)
+    for spool in workers[:3]:
+        spool.close()
+
+    restarted = EventSpool(str(tmp_path))
+    assert restarted.pending == 8 and restarted.stats()['adopted'] == 5
+    assert restarted.directory == workers[0].directory
+    assert restarted.has_pending('W2') and not restarted.has_pending('W3')
+    for spool in workers[1:3]:
+        assert not [f for f in os.listdir(spool.directory) if f.endswith('.spool')]
+    assert sorted(_drain(restarted)) == [(f"W{w}", n) for w in range(3) for n in range(3) if (w, n) != (1, 0)]
+    assert workers[3].pending == 3
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the materialized database statistics.
+"""
+
+import copy
+import json
+from hangar_stack.hangar_data.stats import DatabaseStats
+
+def test_manufacturer_counts_match_route_formulas(db):
+    stats = DatabaseStats.from_data(db)
+    for manufacturer, entry in db['manufacturers'].items():
+        aircraft_list = entry['aircraft']
+        s = stats.for_manufacturer(manufacturer)
+        assert s.total == len(aircraft_list)
+        assert s.active == sum(1 for a in aircraft_list if a.get('status') == 'Active')
+        assert s.retired == sum(1 for a in aircraft_list if a.get('status') == 'Retired')
+        assert s.development == sum(1 for a in aircraft_list if 'Development' in str(a.get('status', '')))
+        assert s.variants == sum(len(a.get('variants', [])) for a in aircraft_list)
+        assert s.latest_verified == max(a['last_verified'] for a in aircraft_list if 'last_verified' in a)
+        years = [a['introduction_year'] for a in aircraft_list]
+        assert (s.first_year, s.last_year) == (min(years), max(years))
+
+def test_overall_totals(db):
+    stats = DatabaseStats.from_data(db)
+    assert stats.overall.total == sum(len(m['aircraft']) for m in db['manufacturers'].values())
+    assert stats.to_dict()['overall']['manufacturers'] == len(db['manufacturers'])
+
+def test_incremental_updates_match_full_rebuild(db):
+    stats = DatabaseStats.from_data(db)
+
+    boeing = db['manufacturers']['Boeing']['aircraft']
+    newest = max(boeing, key=lambda a: a['last_verified'])
+    updated = copy.deepcopy(newest)
+    updated['status'] = 'Retired'
+    updated['last_verified'] = '2001-01-01'
+    stats.update_aircraft('Boeing', newest, updated)
+    boeing[boeing.index(newest)] = updated
+
+    removed = boeing.pop(0)
+    stats.remove_aircraft('Boeing', removed)
+
+    added = copy.deepcopy(removed)
+    added['designation'] = 'XB-99'
+    added['introduction_year'] = 2035
+    db['manufacturers']['Lockheed Martin']['aircraft'].append(added)
+    stats.add_aircraft('Lockheed Martin', added)
+
+    assert stats.to_dict() == DatabaseStats.from_data(db).to_dict()
+
+def test_reload_applies_only_changed_records(tmp_path, db):
+    from hangar_stack.hangar_data.database_cache import DatabaseCache
+    path = tmp_path / 'db.json'
+    path.write_text(json.dumps(db))
+    cache = DatabaseCache(str(path), check_interval=None)
+    old = cache.get()
+
+    boeing = db['manufacturers']['Boeing']['aircraft']
+    boeing[0] = dict(boeing[0], status='Retired', last_verified='2001-01-01')
+    boeing.append(dict(boeing[1], designation='XB-99', introduction_year=2035))
+    removed_manufacturer = next(m for m in db['manufacturers'] if m != 'Boeing')
+    del db['manufacturers'][removed_manufacturer]
+    db['manufacturers']['Scaled Composites'] = {'aircraft': [dict(boeing[2], designation='Model 401')]}
+    path.write_text(json.dumps(db))
+    new = cache.reload()
+
+    assert new.stats.to_dict() == DatabaseStats.from_data(db).to_dict()
+    unchanged = [m for m in db['manufacturers'] if m in old.data['manufacturers'] and m != 'Boeing']
+    # Manufacturers without changes keep their stats; the old snapshot's are untouched
+    assert all(new.stats.manufacturers[m] is old.stats.manufacturers[m] for m in unchanged)
+    assert old.stats.to_dict() == DatabaseStats.from_data(old.data).to_dict()
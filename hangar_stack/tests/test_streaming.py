@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming database loader and deferred text fields.
+"""
+
+import json
+from hangar_stack.hangar_data.database_cache import DatabaseCache, DatabaseSnapshot
+from hangar_stack.hangar_data.streaming import DeferredText, PREVIEW_CHARS, stream_database
+
+def test_stream_matches_json_load(db, db_path):
+    seen = []
+    data = stream_database(db_path, on_aircraft=lambda m, a: seen.append((m, a['designation'])))
+    assert data == db
+    assert seen == [(m, a['designation']) for m, entry in db['manufacturers'].items()
+                    for a in entry['aircraft']]
+
+def test_small_chunks_and_non_ascii(tmp_path):
+    long_text = 'Café — “long” description ' * 20
+    db = {
+        'database_version': '1.0',
+        'manufacturers': {
+            'Dassault': {'country': 'France', 'aircraft': [
+                {'designation': 'Rafale', 'description': long_text, 'introduction_year': 2001},
+                {'designation': 'Mirage', 'description': 'short', 'weights': [1, 2.5, None]},
+            ], 'founded': 1929},
+            'Empty': {'aircraft': []},
+        },
+        'last_updated': '2024-01-01',
+    }
+    path = tmp_path / 'db.json'
+    path.write_text(json.dumps(db, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    assert stream_database(str(path), chunk_size=7) == db
+
+    data = stream_database(str(path), lazy_fields=('description',), chunk_size=7)
+    rafale, mirage = data['manufacturers']['Dassault']['aircraft']
+    assert isinstance(rafale['description'], DeferredText)
+    assert mirage['description'] == 'short'
+    assert str(rafale['description']) == long_text
+    assert len(rafale['description']) == len(long_text)
+    assert rafale['description'][:150] == long_text[:150]
+    assert rafale['description'].preview == long_text[:PREVIEW_CHARS]
+
+def test_deferred_text_falls_back_to_preview_when_file_changes(tmp_path):
+    path = tmp_path / 'db.json'
+    text = 'x' * 500
+    path.write_text(json.dumps({'manufacturers': {'A': {'aircraft': [
+        {'designation': 'A-1', 'description': text}]}}}))
+    data = stream_database(str(path), lazy_fields=('description',))
+    deferred = data['manufacturers']['A']['aircraft'][0]['description']
+    path.write_text('{}')
+    assert str(deferred) == text[:PREVIEW_CHARS]
+
+def test_streamed_snapshot_matches_bytes_snapshot(db_path):
+    with open(db_path, 'rb') as f:
+        eager = DatabaseSnapshot.from_bytes(f.read())
+    streamed = DatabaseSnapshot.from_stream(db_path, lazy_fields=('description',))
+    assert streamed.content_hash == eager.content_hash
+    assert streamed.stats.to_dict() == eager.stats.to_dict()
+    assert len(streamed.columns) == len(eager.columns)
+    for manufacturer in eager.indexes.manufacturers:
+        assert ([a['designation'] for a in streamed.indexes.aircraft_for(manufacturer)] ==
+                [a['designation'] for a in eager.indexes.aircraft_for(manufacturer)])
+    for query in ('reconnaissance', 'f-35', 'heavy bomber'):
+        got = [(r.manufacturer, r.aircraft['designation'], r.score)
+               for r in streamed.search.search(query, include_description=True)]
+        want = [(r.manufacturer, r.aircraft['designation'], r.score)
+                for r in eager.search.search(query, include_description=True)]
+        assert got == want
+
+def test_streaming_cache_reuses_snapshot_for_same_content(tmp_path, db_path):
+    path = tmp_path / 'db.json'
+    path.write_bytes(open(db_path, 'rb').read())
+    cache = DatabaseCache(str(path), check_interval=None, streaming=True)
+    first = cache.get()
+    assert cache.reload().data is first.data
+    assert cache.reload_count == 1
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-process multi-topic consumer runner.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from kafka.structs import TopicPartition
+from hangar_stack.hangar_kafka import kafka_consumer
+from hangar_stack.hangar_kafka.topic_runner import MultiTopicRunner
+
+Record = namedtuple('Record', 'topic partition offset key value')
+VIEWS = 'hangarstack.aircraft.views'
+SEARCHES = 'hangarstack.search.queries'
+
+class FakeKafkaConsumer:
+    """Partition logs served a few records at a time, honouring pause()"""
+
+    def __init__(self, *topics, **config):
+        self.topics = topics
+        self.logs = {}
+        self.positions = {}
+        self.paused = set()
+        self.commits = []
+        self.on_idle = None
+
+    def load(self, topic, events):
+        tp = TopicPartition(topic, 0)
+        self.logs[tp] = [Record(topic, 0, n, None, e) for n, e in enumerate(events)]
+        self.positions[tp] = 0
+
+    def assignment(self):
+        return set(self.logs)
+
+    def pause(self, *partitions):
+        self.paused.update(partitions)
+
+    def resume(self, *partitions):
+        self.paused.difference_update(partitions)
+
+    def poll(self, timeout_ms=0, max_records=None):
+        result = {}
+        for tp, log in self.logs.items():
+            if tp in self.paused:
+                continue
+            start = self.positions[tp]
+            chunk = log[start:start + 5]
+            if chunk:
+                result[tp] = chunk
+                self.positions[tp] = start + len(chunk)
+        if not result:
+            time.sleep(0.001)
+            if self.on_idle:
+                self.on_idle()
+        return result
+
+    def commit(self, offsets):
+        self.commits.append({tp.topic: meta.offset for tp, meta in offsets.items()})
+
+    def close(self):
+        pass
+
+def _runner(monkeypatch, queue_size=4):
+    monkeypatch.setattr(kafka_consumer, 'KafkaConsumer', FakeKafkaConsumer)
+    runner = MultiTopicRunner([VIEWS, SEARCHES], queue_size=queue_size, commit_interval=0.01)
+    return runner, runner.consumer.consumer
+
+def test_routes_by_topic_and_event_type(monkeypatch):
+    runner, kafka = _runner(monkeypatch)
+    assert kafka.topics == (VIEWS, SEARCHES)
+    seen = []
+    runner.register('aircraft_view', lambda e: seen.append(('view', e['aircraft_designation'])))
+    runner.register('search_query', lambda e: seen.append(('search', e['query'])), topic=SEARCHES)
+    runner.register('search_query', lambda e: seen.append(('misrouted', e['query'])), topic=VIEWS)
+    kafka.load(VIEWS, [{'event_type': 'aircraft_view', 'aircraft_designation': 'F-22A'},
+                       {'event_type': 'system_event'}])
+    kafka.load(SEARCHES, [{'event_type': 'search_query', 'query': 'stealth'}])
+    kafka.on_idle = lambda: len(seen) == 2 and runner.stop()
+
+    stats = runner.run()
+    assert sorted(seen) == [('search', 'stealth'), ('view', 'F-22A')]
+    assert stats[VIEWS]['processed'] == 2 and stats[SEARCHES]['processed'] == 1
+    assert {topic: offset for commit in kafka.commits for topic, offset in commit.items()} == {VIEWS: 2, SEARCHES: 1}
+
+def test_slow_topic_is_paused_without_blocking_others(monkeypatch):
+    runner, kafka = _runner(monkeypatch)
+    gate = threading.Event()
+    views = []
+    searches = []
+    runner.register('aircraft_view', lambda e: views.append(e['n']))
+    runner.register('search_query', lambda e: (gate.wait(5), searches.append(e['n'])))
+    kafka.load(VIEWS, [{'event_type': 'aircraft_view', 'n': n} for n in range(200)])
+    kafka.load(SEARCHES, [{'event_type': 'search_query', 'n': n} for n in range(50)])
+    observed = {}
+
+    def idle():
+        if len(views) == 200 and not gate.is_set():
+            observed['paused'] = TopicPartition(SEARCHES, 0) in kafka.paused
+            observed['backlog'] = runner.workers[SEARCHES].stats()['backlog']
+            gate.set()
+        if len(searches) == 50:
+            runner.stop()
+    kafka.on_idle = idle
+
+    runner.run()
+    # All views were handled while the search handler was stuck, and the
+    # search topic was paused at the broker with its surplus held back
+    assert observed['paused'] and observed['backlog'] > 0
+    assert views == list(range(200)) and searches == list(range(50))
+    committed = {}
+    for commit in kafka.commits:
+        for topic, offset in commit.items():
+            assert offset >= committed.get(topic, 0)
+            committed[topic] = offset
+    assert committed == {VIEWS: 200, SEARCHES: 50}
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for cached, compiled and incremental schema validation.
+"""
+
+import json
+import os
+import jsonschema
+import pytest
+from hangar_stack.hangar_data.database_cache import DatabaseCache
+from hangar_stack.hangar_data.validation import DatabaseValidator, compile_validator, record_schema_pointers
+
+SCHEMA = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'type': 'object',
+    'required': ['database_version', 'manufacturers'],
+    'properties': {
+        'database_version': {'type': 'string'},
+        'manufacturers': {
+            'type': 'object',
+            'patternProperties': {
+                '^[A-Za-z\\s-]+$': {
+                    'type': 'object',
+                    'required': ['aircraft'],
+                    'properties': {'aircraft': {'type': 'array', 'items': {
+                        'type': 'object',
+                        'required': ['designation', 'name'],
+                        'properties': {'designation': {'type': 'string', 'pattern': '^[A-Z0-9-]+$'},
+                                       'name': {'type': 'string'}},
+                    }}},
+                }
+            },
+        },
+    },
+}
+
+def _db(*designations):
+    return {
+        'database_version': '1.0.0',
+        'manufacturers': {
+            'Lockheed Martin': {'aircraft': [{'designation': d, 'name': d} for d in designations]}
+        }
+    }
+
+@pytest.fixture
+def schema_path(tmp_path):
+    path = tmp_path / 'schema.json'
+    path.write_text(json.dumps(SCHEMA))
+    return str(path)
+
+def test_compiled_validator_is_cached_per_schema_hash():
+    assert compile_validator(SCHEMA) is compile_validator(json.loads(json.dumps(SCHEMA)))
+    assert compile_validator(SCHEMA) is not compile_validator(dict(SCHEMA, required=[]))
+
+def test_only_changed_records_are_revalidated(schema_path):
+    validator = DatabaseValidator(schema_path)
+    first = validator.validate(_db('F-22A', 'F-35', 'SR-71'), 'a')
+    assert (first.records, first.checked, first.cached) == (3, 3, False)
+
+    second = validator.validate(_db('F-22A', 'F-35', 'SR-71', 'U-2S'), 'b')
+    assert (second.records, second.checked) == (4, 1)
+
+    again = validator.validate(_db('F-22A'), 'a')
+    assert again.cached and again.checked == 0
+
+def test_errors_point_into_the_whole_document(schema_path):
+    validator = DatabaseValidator(schema_path)
+    validator.validate(_db('F-22A'))
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        validator.validate(_db('F-22A', 'bad designation'))
+    assert list(excinfo.value.absolute_path) == ['manufacturers', 'Lockheed Martin', 'aircraft', 1, 'designation']
+    # Same verdict as a full validation
+    with pytest.raises(jsonschema.ValidationError):
+        jsonschema.validate(_db('F-22A', 'bad designation'), SCHEMA)
+
+def test_aircraft_array_constraints_force_full_validation(tmp_path):
+    schema = json.loads(json.dumps(SCHEMA))
+    aircraft = schema['properties']['manufacturers']['patternProperties']['^[A-Za-z\\s-]+$']['properties']['aircraft']
+    aircraft.update(minItems=1, uniqueItems=True)
+    assert record_schema_pointers(SCHEMA) is not None and record_schema_pointers(schema) is None
+    path = tmp_path / 'schema.json'
+    path.write_text(json.dumps(schema))
+    validator = DatabaseValidator(str(path))
+    assert validator.validate(_db('F-22A', 'F-35')).checked == 2
+    for data in (_db(), _db('F-22A', 'F-22A')):
+        with pytest.raises(jsonschema.ValidationError):
+            validator.validate(data)
+
+def test_stamp_skips_validation_in_the_next_process(schema_path, tmp_path):
+    stamp = str(tmp_path / 'db.validated')
+    DatabaseValidator(schema_path, stamp_path=stamp).validate(_db('F-22A'), 'a')
+    report = DatabaseValidator(schema_path, stamp_path=stamp).validate(_db('F-22A'), 'a')
+    assert report.cached
+
+    # A different schema does not trust the stamp
+    other = tmp_path / 'other.json'
+    other.write_text(json.dumps(dict(SCHEMA, required=['manufacturers'])))
+    assert not DatabaseValidator(str(other), stamp_path=stamp).is_validated('a')
+
+def test_cache_keeps_previous_snapshot_on_invalid_reload(schema_path, tmp_path):
+    db_path = tmp_path / 'aircraft_database.json'
+    db_path.write_text(json.dumps(_db('F-22A')))
+    os.utime(db_path, (1000, 1000))
+    cache = DatabaseCache(str(db_path), check_interval=0, validator=DatabaseValidator(schema_path))
+    old = cache.get()
+    assert cache.last_validation.checked == 1
+
+    db_path.write_text(json.dumps(_db('F-22A', 'bad designation')))
+    os.utime(db_path, (2000, 2000))
+    cache.get()
+    cache.wait_for_reload(timeout=5)
+    assert cache.get() is old
+    assert isinstance(cache.last_reload_error, jsonschema.ValidationError)
+
+    with pytest.raises(ValueError):
+        DatabaseCache(str(db_path), lazy_fields=['description'], validator=DatabaseValidator(schema_path))
+
+def test_viewer_reports_a_missing_database(schema_path, tmp_path, capsys):
+    from hangar_stack.src.aircraft_viewer import AircraftViewer
+    with pytest.raises(SystemExit) as exit_info:
+        AircraftViewer(str(tmp_path / 'missing.json'), schema_path)
+    assert exit_info.value.code == 1
+    assert 'Error loading database' in capsys.readouterr().out
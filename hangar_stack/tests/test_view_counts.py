@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for windowed view counting with Count-Min Sketch and top-K.
+"""
+
+import random
+from datetime import datetime
+from hangar_stack.hangar_kafka import kafka_consumer
+from hangar_stack.hangar_kafka.view_counts import (
+    CountMinSketch, ViewAggregator, WindowedCounter, event_time,
+)
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_heavy_hitters_survive_unbounded_key_cardinality():
+    rng = random.Random(7)
+    counter = WindowedCounter('1m', 60, 12, width=1024, depth=4, k=10)
+    exact = {}
+    events = [f"BOT-{rng.randrange(10**9)}" for _ in range(20000)]
+    events += ['F-22A'] * 900 + ['B-2'] * 600 + ['C-130J'] * 300
+    rng.shuffle(events)
+    for i, key in enumerate(events):
+        counter.add(key, 1000 + i * 0.001)
+        exact[key] = exact.get(key, 0) + 1
+
+    result = counter.sliding()
+    assert result['total'] == len(events)
+    assert [key for key, _ in result['top'][:3]] == ['F-22A', 'B-2', 'C-130J']
+    for key, estimate in result['top'][:3]:
+        # Never undercounts, and the overcount stays within the sketch bound
+        assert exact[key] <= estimate <= exact[key] + 3 * len(events) // 1024
+    # Fixed memory: one sketch and at most k tracked keys per slot
+    assert all(len(s.sketch.table) == 4 * 1024 and len(s.top.counts) <= 10 for s in counter._ring)
+
+def test_tumbling_window_closes_and_sliding_window_expires():
+    counter = WindowedCounter('1m', 60, 12)
+    for ts in (0, 10, 59):
+        assert counter.add('F-22A', ts) is None
+    counter.add('B-2', 30)
+    closed = counter.add('B-2', 61)
+    assert closed == {'kind': 'tumbling', 'window': '1m', 'start': 0, 'end': 60,
+                      'total': 4, 'top': [('F-22A', 3), ('B-2', 1)]}
+    # Sliding: the last 60s at 5s granularity ending with the slot of t=61
+    assert counter.estimate('F-22A') == 2
+    assert counter.estimate('F-22A', now=125) == 0
+    counter.add('F-22A', 200)
+    assert counter.add('F-22A', 100) is None and counter.late == 1
+
+def test_aggregator_emits_to_sink_and_reads_event_time():
+    clock = Clock(1_000_000.0)
+    emitted = []
+    aggregator = ViewAggregator(emitted.extend, emit_interval=30, clock=clock)
+    assert event_time({'timestamp': '1970-01-12T13:46:40'}, None) == 1_000_000.0
+    assert event_time({'timestamp': 'bogus'}, 5.0) == 5.0
+
+    aggregator.record_event({'aircraft_designation': 'F-22A', 'timestamp': '1970-01-12T13:46:40'})
+    aggregator.record('B-2')
+    assert emitted == []
+    clock.now += 31
+    aggregator.record('F-22A')
+    sliding = [r for r in emitted if r['kind'] == 'sliding']
+    assert [r['window'] for r in sliding] == ['1m', '1h', '24h']
+    assert sliding[0]['total'] == 3 and sliding[0]['top'][0] == ('F-22A', 2)
+    assert aggregator.estimate('F-22A', '24h') == 2
+
+    clock.now += 60
+    aggregator.record('B-2')
+    tumbling = [r for r in emitted if r['kind'] == 'tumbling']
+    assert tumbling and tumbling[0]['window'] == '1m'
+
+def test_sink_errors_do_not_stop_counting():
+    def broken(results):
+        raise OSError("disk full")
+
+    clock = Clock(0.0)
+    aggregator = ViewAggregator(broken, emit_interval=1, clock=clock)
+    for n in range(5):
+        clock.now = n * 61.0
+        aggregator.record('F-22A')
+    assert aggregator.views == 5
+
+def test_consumer_counts_views(monkeypatch):
+    monkeypatch.setattr(kafka_consumer, 'KafkaConsumer', lambda topic, **config: None)
+    emitted = []
+    consumer = kafka_consumer.HangarStackConsumer('hangarstack.aircraft.views', view_sink=emitted.extend)
+    for designation in ('F-22A', 'F-22A', 'B-2'):
+        consumer.handle_aircraft_view({'event_type': 'aircraft_view', 'aircraft_designation': designation,
+                                       'timestamp': datetime.utcnow().isoformat()})
+    assert consumer.view_counts.views == 3
+    assert consumer.view_counts.sliding(n=1)[2]['top'] == [('F-22A', 2)]
+    assert consumer.view_counts.sink == emitted.extend